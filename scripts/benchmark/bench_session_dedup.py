@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+セッションの重複除去（util._summarize_sessions）の従来の実装との一致の確認と所要時間の比較
+
+fixtures.py の代役セッション（睡眠・瞑想・ワークアウト、アプリ間の重複を含む）を日ごとに集計し、
+以下を確認する（一致しない場合は終了コード1）。
+  - 従来の O(n²) のループに優先度順（SESSION_APP_PRIORITY の高い順→開始時刻順）に並べたセッションを
+    渡した結果と、util._summarize_sessions の結果がすべての日で一致すること
+  - セッションの順序を入れ替えても util._summarize_sessions の結果が変わらないこと
+APIが返した順序のまま従来のループに渡した場合に結果が変わる日数（順序に依存していた日）も表示する。
+あわせて、複数日分のセッションを1日にまとめた大きな入力で従来のループとの所要時間を比べる。
+
+使い方:
+    python scripts/benchmark/bench_session_dedup.py
+    python scripts/benchmark/bench_session_dedup.py --days 730 --shuffles 5
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(BENCHMARK_DIR)), "src")
+for path in (BENCHMARK_DIR, SRC_DIR):
+    if path not in sys.path:
+        sys.path.append(path)
+
+
+def legacy_summarize_sessions(sessions):
+    """変更前の util._summarize_sessions（処理済みの区間すべてと比べる O(n²) のループ）"""
+    from activity_types import get_english_name
+    from constants import ACTIVITY_TYPES
+
+    total_sleep_minutes = 0
+    meditation_sessions = 0
+    total_meditation_minutes = 0
+    for session in sessions:
+        activity_type = session.get('activityType', 0)
+        start = int(session['startTimeMillis'])
+        end = int(session['endTimeMillis'])
+        if activity_type == ACTIVITY_TYPES["sleep"]:
+            total_sleep_minutes += (end - start) // (1000 * 60)
+        elif activity_type == ACTIVITY_TYPES["meditation"]:
+            meditation_sessions += 1
+            total_meditation_minutes += (end - start) // (1000 * 60)
+
+    activity_summary = {}
+    processed_times = []
+    for session in sessions:
+        activity_type = session.get('activityType', 0)
+        app_name = session.get('application', {}).get('name', 'Unknown')
+        start_ms = int(session['startTimeMillis'])
+        end_ms = int(session['endTimeMillis'])
+        duration_min = (end_ms - start_ms) // (1000 * 60)
+
+        is_duplicate = False
+        for processed_start, processed_end in processed_times:
+            if not (end_ms <= processed_start or start_ms >= processed_end):
+                if 'AutoSleep' in app_name or 'Strava' in app_name:
+                    continue
+                is_duplicate = True
+                break
+
+        if not is_duplicate and duration_min > 0:
+            processed_times.append((start_ms, end_ms))
+            activity_name = get_english_name(activity_type)
+            activity_summary[activity_name] = activity_summary.get(activity_name, 0) + duration_min
+
+    return {
+        "total_sleep_minutes": total_sleep_minutes,
+        "meditation_sessions": meditation_sessions,
+        "total_meditation_minutes": total_meditation_minutes,
+        "activity_summary": activity_summary,
+    }
+
+
+def _comparable(summary):
+    """比較する項目（activity_summary は順序を問わない。activity_type_ids は従来の実装に無い）"""
+    return {key: value for key, value in summary.items() if key != "activity_type_ids"}
+
+
+def _priority_order(sessions):
+    from util import _session_priority
+
+    return sorted(sessions, key=lambda session: (
+        -_session_priority(session), int(session['startTimeMillis']), -int(session['endTimeMillis']),
+        session.get('application', {}).get('name', 'Unknown'), str(session.get('id', ''))
+    ))
+
+
+def _median_seconds(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='セッションの重複除去が従来の実装と一致するかを確認し、所要時間を比べます')
+    parser.add_argument('--days', type=int, default=730, help='確認する日数（デフォルト: 730）')
+    parser.add_argument('--shuffles', type=int, default=3, help='1日あたりの順序の入れ替え回数（デフォルト: 3）')
+    parser.add_argument('--busy-days', type=int, default=120, help='所要時間の比較で1日にまとめる日数（デフォルト: 120）')
+    parser.add_argument('--repeat', type=int, default=3, help='所要時間の繰り返し回数（デフォルト: 3）')
+    parser.add_argument('--seed', type=int, default=0, help='代役データの乱数シード（デフォルト: 0）')
+    args = parser.parse_args()
+
+    from fixtures import FitFixture
+    from util import _summarize_sessions
+
+    fixture = FitFixture(seed=args.seed)
+    rng = random.Random(args.seed)
+    start = date(2024, 1, 1)
+    days = [fixture._sessions(start + timedelta(days=offset)) for offset in range(args.days)]
+
+    mismatched = []
+    order_dependent = []
+    legacy_order_changes = 0
+    for offset, sessions in enumerate(days):
+        day = start + timedelta(days=offset)
+        summary = _comparable(_summarize_sessions(sessions))
+        if legacy_summarize_sessions(_priority_order(sessions)) != summary:
+            mismatched.append(day)
+        if legacy_summarize_sessions(sessions) != summary:
+            legacy_order_changes += 1
+        for _ in range(args.shuffles):
+            shuffled = sessions[:]
+            rng.shuffle(shuffled)
+            if _comparable(_summarize_sessions(shuffled)) != summary:
+                order_dependent.append(day)
+                break
+
+    print(f"{len(days)}日分のセッション（合計 {sum(len(sessions) for sessions in days)}件）を確認しました")
+    print(f"  従来のループ（優先度順の入力）との一致: {len(days) - len(mismatched)}/{len(days)}日"
+          + (f"  ❌ 不一致: {', '.join(map(str, mismatched[:5]))}" if mismatched else ""))
+    print(f"  順序の入れ替えで結果が変わった日: {len(order_dependent)}日"
+          + (f"  ❌ {', '.join(map(str, order_dependent[:5]))}" if order_dependent else ""))
+    print(f"  APIの順序のままの従来のループと結果が異なる日（従来は順序に依存していた）: {legacy_order_changes}日")
+
+    # 複数端末・長期間で1日のセッション数が多い場合の所要時間
+    busy = [session for sessions in days[:args.busy_days] for session in sessions]
+    legacy_seconds = _median_seconds(lambda: legacy_summarize_sessions(busy), args.repeat)
+    new_seconds = _median_seconds(lambda: _summarize_sessions(busy), args.repeat)
+    print(f"\n{len(busy)}件を1日として集計: 従来 {legacy_seconds * 1000:.2f}ms, 現在 {new_seconds * 1000:.2f}ms")
+
+    return 1 if mismatched or order_dependent else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
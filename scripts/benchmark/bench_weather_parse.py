@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+気象庁の時間別値ページ（hourly_s1.php）の解析方法ごとの所要時間を比べるマイクロベンチマーク
+
+fixtures.py の代役ページを weather_notion.TABLE_PARSERS の各方法で解析し、
+1ページあたりの所要時間と、parse_weather_html の結果がすべての方法で一致することを確認する。
+あわせて、解析済みの観測値の集計を1日ずつ（format_weather_data）行う場合と、
+全日分を 日数×24 の行列で1回に（format_weather_days）行う場合の所要時間も比べる。
+
+使い方:
+    python scripts/benchmark/bench_weather_parse.py
+    python scripts/benchmark/bench_weather_parse.py --pages 100 --repeat 5 --output parse.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(BENCHMARK_DIR)), "src")
+for path in (BENCHMARK_DIR, SRC_DIR, os.path.join(SRC_DIR, "weather")):
+    if path not in sys.path:
+        sys.path.append(path)
+
+# 比較の基準（ページ全体をhtml.parserで木にする、従来の方法）
+BASELINE_PARSER = "beautifulsoup"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='気象庁ページの解析方法ごとの所要時間を比べます')
+    parser.add_argument('--pages', type=int, default=60, help='解析するページ数（日数、デフォルト: 60）')
+    parser.add_argument('--repeat', type=int, default=3, help='繰り返し回数（デフォルト: 3）')
+    parser.add_argument('--seed', type=int, default=0, help='代役データの乱数シード（デフォルト: 0）')
+    parser.add_argument('--output', help='結果のJSONの保存先')
+    args = parser.parse_args()
+
+    from fixtures import jma_hourly_html
+    from weather_notion import (
+        DEFAULT_TABLE_PARSER, TABLE_PARSERS, extract_hourly_observations, format_weather_data, format_weather_days,
+        lxml_html, parse_weather_html
+    )
+
+    parsers = [name for name in TABLE_PARSERS if name != "lxml" or lxml_html is not None]
+    start = date(2025, 1, 1)
+    pages = []
+    for offset in range(args.pages):
+        day = start + timedelta(days=offset)
+        pages.append((day, jma_hourly_html(day.year, day.month, day.day, seed=args.seed)))
+    page_bytes = sum(len(html.encode("utf-8")) for _, html in pages)
+    print(f"{len(pages)}ページ（平均 {page_bytes / len(pages) / 1024:.0f} KiB）を解析します（既定の方法: {DEFAULT_TABLE_PARSER}）")
+
+    # 結果がすべての方法で一致することを確認
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = [parse_weather_html(html, d.year, d.month, d.day, parser=BASELINE_PARSER) for d, html in pages]
+        mismatched = [
+            name for name in parsers
+            if [parse_weather_html(html, d.year, d.month, d.day, parser=name) for d, html in pages] != expected
+        ]
+
+    results = {}
+    for name in parsers:
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            for day, html in pages:
+                parse_weather_html(html, day.year, day.month, day.day, parser=name)
+            timings.append((time.perf_counter() - started) / len(pages))
+        results[name] = {"per_page_ms": round(statistics.median(timings) * 1000, 3)}
+
+    baseline = results[BASELINE_PARSER]["per_page_ms"]
+    print(f"\n{'方法':<14} {'1ページ(ms)':>12} {'速度比':>8}  結果")
+    for name, result in results.items():
+        result["speedup"] = round(baseline / result["per_page_ms"], 2) if result["per_page_ms"] > 0 else None
+        result["identical"] = name not in mismatched
+        mark = "一致" if result["identical"] else "❌ 不一致"
+        print(f"{name:<14} {result['per_page_ms']:>12.3f} {result['speedup']:>7.2f}x  {mark}")
+
+    # 集計（解析済みの観測値から天気データの文字列を作る部分）
+    observations_by_day = [extract_hourly_observations(html) or [] for _, html in pages]
+    dates = [day for day, _ in pages]
+
+    def per_day():
+        return [format_weather_data(obs, d.year, d.month, d.day) for obs, d in zip(observations_by_day, dates)]
+
+    def batch():
+        return format_weather_days(observations_by_day, dates)
+
+    aggregation = {}
+    for name, func in (("per_day", per_day), ("batch", batch)):
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) / len(pages))
+        aggregation[name] = {"per_page_ms": round(statistics.median(timings) * 1000, 3)}
+    aggregation_identical = per_day() == batch()
+    if not aggregation_identical:
+        mismatched.append("aggregation")
+    print(f"\n集計: 1日ずつ {aggregation['per_day']['per_page_ms']:.3f}ms/日, "
+          f"行列で一括 {aggregation['batch']['per_page_ms']:.3f}ms/日  {'一致' if aggregation_identical else '❌ 不一致'}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"pages": len(pages), "repeat": args.repeat, "parsers": results, "aggregation": aggregation},
+                      f, ensure_ascii=False, indent=2)
+        print(f"\n結果を保存しました: {args.output}")
+
+    return 1 if mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
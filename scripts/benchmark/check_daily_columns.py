@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+気象庁の日別値ページ（daily_s1.php）の列の対応（weather_notion.DAILY_COLUMNS）の確認
+
+ページの見出し（table.data2_s の th、rowspan / colspan を展開）から各列の見出しをたどり、
+DAILY_COLUMNS の各列が期待する見出し（例: 気温の最高）の列になっているかを確認する。
+あわせて、すべての解析方法（TABLE_PARSERS）で同じ観測値になり、値が妥当な範囲にあることを確認する
+（期待と異なる場合は終了コード1）。
+
+確認するページ:
+  - fixtures.py の代役のページ（見出しは公開されているページの構成に合わせたもの）
+  - scripts/benchmark/recorded/ に記録した実際のページ（--record で気象庁から取得して保存する）
+
+使い方:
+    python scripts/benchmark/check_daily_columns.py
+    python scripts/benchmark/check_daily_columns.py --record 2024-01          # 東京の2024年1月のページを記録
+    python scripts/benchmark/check_daily_columns.py --record 2024-01 --station 大阪
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+from datetime import date
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(BENCHMARK_DIR)), "src")
+for path in (BENCHMARK_DIR, SRC_DIR, os.path.join(SRC_DIR, "weather")):
+    if path not in sys.path:
+        sys.path.append(path)
+
+RECORDED_DIR = os.path.join(BENCHMARK_DIR, "recorded")
+
+# DAILY_COLUMNS の各列の見出しに含まれるべき語（上の行の見出しから順につないだ文字列に対して確認する）
+EXPECTED_HEADERS = {
+    "day": ("日",),
+    "sea_level_pressure": ("気圧", "海面", "平均"),
+    "precipitation": ("降水量", "合計"),
+    "max_hourly_precipitation": ("降水量", "最大", "1時間"),
+    "temperature_mean": ("気温", "平均"),
+    "temperature_max": ("気温", "最高"),
+    "temperature_min": ("気温", "最低"),
+    "humidity_mean": ("湿度", "平均"),
+    "humidity_min": ("湿度", "最小"),
+    "sunshine": ("日照",),
+    "summary_day": ("天気概況", "昼"),
+    "summary_night": ("天気概況", "夜"),
+}
+
+
+def header_labels(html):
+    """
+    table.data2_s の見出し行（th だけの行）を展開し、列ごとの見出し（上の行から順につないだ文字列）を返す
+    """
+    from lxml import html as lxml_html
+
+    root = lxml_html.document_fromstring(html.encode("utf-8"), parser=lxml_html.HTMLParser(encoding="utf-8"))
+    table = root.xpath('//table[contains(concat(" ", normalize-space(@class), " "), " data2_s ")]')[0]
+    grid = {}  # (行, 列) → 見出し
+    for row_index, row in enumerate(row for row in table.iter("tr") if not list(row.iter("td"))):
+        column = 0
+        for cell in row.iter("th"):
+            while (row_index, column) in grid:
+                column += 1
+            label = re.sub(r"\s+", "", cell.text_content())
+            for dr in range(int(cell.get("rowspan", 1))):
+                for dc in range(int(cell.get("colspan", 1))):
+                    grid[(row_index + dr, column + dc)] = label
+            column += int(cell.get("colspan", 1))
+    columns = max(column for _, column in grid) + 1
+    rows = max(row for row, _ in grid) + 1
+    labels = []
+    for column in range(columns):
+        parts = []
+        for row in range(rows):
+            label = grid.get((row, column))
+            if label and (not parts or parts[-1] != label):  # rowspan で続く同じ見出しは1回だけ
+                parts.append(label)
+        labels.append("/".join(parts))
+    return labels
+
+
+def check_page(name, html):
+    """1ページを確認して不一致の数を返す"""
+    from weather_notion import DAILY_COLUMNS, TABLE_PARSERS, extract_daily_observations
+
+    failures = 0
+    labels = header_labels(html)
+    print(f"{name}: {len(labels)}列")
+    for field, index in DAILY_COLUMNS.items():
+        label = labels[index]
+        ok = all(word in label for word in EXPECTED_HEADERS[field])
+        failures += not ok
+        if not ok:
+            print(f"  ❌ 不一致: {field} の列 {index} の見出しは {label}（期待: {'・'.join(EXPECTED_HEADERS[field])}）")
+
+    results = {}
+    for parser in TABLE_PARSERS:
+        try:
+            results[parser] = extract_daily_observations(html, parser)
+        except ValueError as e:  # lxml が無い環境など
+            print(f"  {parser}: 確認できません（{str(e)}）")
+    observations = next(iter(results.values()))
+    if not observations or any(result != observations for result in results.values()):
+        failures += 1
+        print(f"  ❌ 不一致: 解析方法によって観測値が異なるか、観測値がありません（{', '.join(results)}）")
+    else:
+        implausible = [
+            obs.day for obs in observations
+            if (None not in (obs.temperature_min, obs.temperature_mean, obs.temperature_max)
+                and not obs.temperature_min <= obs.temperature_mean <= obs.temperature_max)
+            or (obs.humidity_mean is not None and not 0 <= obs.humidity_mean <= 100)
+            or (obs.sunshine is not None and not 0 <= obs.sunshine <= 24)
+            or (obs.sea_level_pressure is not None and not 900 <= obs.sea_level_pressure <= 1100)
+        ]
+        failures += bool(implausible)
+        if implausible:
+            print(f"  ❌ 不一致: 値が妥当な範囲にない日があります: {implausible}")
+    if not failures:
+        print(f"  一致: 見出しと DAILY_COLUMNS の{len(DAILY_COLUMNS)}列、{len(observations)}日分の観測値")
+    return failures
+
+
+def record_page(month, station_name):
+    """気象庁から日別値ページを取得して RECORDED_DIR に保存する"""
+    from http_session import get_session
+    from stations import load_stations, select_stations
+    from weather_notion import JMA_BASE_URL, _station_query
+
+    station = select_stations(load_stations(), [station_name])[0] if station_name else load_stations()[0]
+    url = f"{JMA_BASE_URL}/stats/etrn/view/daily_s1.php?{_station_query(station, month.year, month.month)}"
+    response = get_session(JMA_BASE_URL).get(url)
+    response.raise_for_status()
+    os.makedirs(RECORDED_DIR, exist_ok=True)
+    path = os.path.join(RECORDED_DIR, f"daily_s1_{station.prec_no}_{station.block_no}_{month:%Y_%m}.html")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(response.text)
+    print(f"記録しました: {path}（{url}）")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='日別値ページの列の対応（DAILY_COLUMNS）を見出しと照らし合わせて確認します')
+    parser.add_argument('--record', metavar='YYYY-MM', help='気象庁から指定した月の日別値ページを取得して記録する')
+    parser.add_argument('--station', help='--record で取得する地点名（省略時は主地点）')
+    parser.add_argument('--seed', type=int, default=0, help='代役のページの乱数シード（デフォルト: 0）')
+    args = parser.parse_args()
+
+    if args.record:
+        year, month = (int(part) for part in args.record.split("-"))
+        record_page(date(year, month, 1), args.station)
+
+    from fixtures import jma_daily_html
+
+    failures = check_page("代役のページ（fixtures.jma_daily_html）", jma_daily_html(2024, 1, seed=args.seed))
+    recorded = sorted(glob.glob(os.path.join(RECORDED_DIR, "daily_s1_*.html")))
+    for path in recorded:
+        with open(path, encoding="utf-8") as f:
+            failures += check_page(os.path.relpath(path, BENCHMARK_DIR), f.read())
+    if not recorded:
+        print("\n記録した実際のページがありません。--record YYYY-MM で気象庁のページを記録すると、その見出しでも確認します。")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+GitHubの直接コミットの集計（GraphQLの経路とREST APIの経路）の一致の確認
+
+fixtures.py のGitHubの代役（squashマージのコミットを含む）に対して、同じ期間の直接コミットを
+GraphQLの経路（GITHUB_USE_GRAPHQL=true）とREST APIの経路（false）でそれぞれ集計し、
+日付・リポジトリごとのコミット数・変更行数が一致することを確認する（一致しない場合は終了コード1）。
+1日ずつの集計（fetch_direct_commits_for_date）と期間の一括集計（collect_range）の両方を確認する。
+
+あわせて、GraphQLがエラーを返したリポジトリがREST APIで取得し直されることを確認する:
+  - RATE_LIMITED: そのリポジトリをREST APIで取得し、以降のリポジトリもREST APIで取得する
+  - その他のエラー: そのリポジトリだけREST APIで取得する
+
+使い方:
+    python scripts/benchmark/check_github_commit_paths.py
+    python scripts/benchmark/check_github_commit_paths.py --days 30 --seed 1
+"""
+
+import argparse
+import logging
+import os
+import sys
+from datetime import date, timedelta
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(BENCHMARK_DIR)), "src")
+for path in (BENCHMARK_DIR, SRC_DIR, os.path.join(SRC_DIR, "github")):
+    if path not in sys.path:
+        sys.path.append(path)
+
+END_DATE = date(2024, 1, 14)
+
+# (説明, 経路, GraphQLのエラー {リポジトリ名: type}, 集計後に期待する use_graphql)
+CASES = [
+    ("GraphQL", True, {}, True),
+    ("GraphQLがRATE_LIMITED（repo-1）", True, {"repo-1": "RATE_LIMITED"}, False),
+    ("GraphQLがその他のエラー（repo-2）", True, {"repo-2": "SERVICE_UNAVAILABLE"}, True),
+]
+
+
+def _comparable(direct_commits):
+    return sorted((item["repo"], item["commit_count"], item["additions"], item["deletions"]) for item in direct_commits)
+
+
+def collect(github, use_graphql, errors, dates):
+    """
+    直接コミットを集計して ({日付: 1日ずつの集計}, {日付: 一括の集計}, 集計後の use_graphql) を返す
+    """
+    from github_notion import GitHubNotionSync
+
+    github.graphql_errors = dict(errors)
+    sync = GitHubNotionSync()
+    sync.use_graphql = use_graphql
+    repos = sync.get_owned_repos()
+    per_date = {}
+    for day in dates:
+        prs = sync.fetch_prs_for_date(day, repos)
+        per_date[day] = _comparable(sync.fetch_direct_commits_for_date(day, repos, prs))
+    used_graphql = sync.use_graphql
+
+    sync.use_graphql = use_graphql
+    ranged = {day: _comparable(activity[2]) for day, activity in sync.collect_range(dates).items()}
+    return per_date, ranged, used_graphql
+
+
+def main():
+    parser = argparse.ArgumentParser(description='GitHubの直接コミットの集計がGraphQLとREST APIで一致するかを確認します')
+    parser.add_argument('--days', type=int, default=14, help='確認する日数（デフォルト: 14）')
+    parser.add_argument('--seed', type=int, default=0, help='代役データの乱数シード（デフォルト: 0）')
+    args = parser.parse_args()
+
+    from fixtures import FitFixture, FixtureTransport, GitHubFixture, NotionFixture
+    from run_benchmark import BENCH_ENV
+
+    os.environ.update(BENCH_ENV)
+    dates = [END_DATE - timedelta(days=offset) for offset in range(args.days - 1, -1, -1)]
+    github = GitHubFixture(dates[0], dates[-1], seed=args.seed)
+    squashed = sum(1 for data in github.data.values() for pr in data["prs"] if pr.get("merge_commit_sha"))
+
+    failures = 0
+    logging.disable(logging.WARNING)
+    try:
+        with FixtureTransport(FitFixture(args.seed), NotionFixture(), github).installed():
+            rest_per_date, rest_ranged, _ = collect(github, False, {}, dates)
+            print(f"{len(dates)}日分（{dates[0]} - {dates[-1]}、squashマージのPR {squashed}件）を確認しました")
+            print(f"  REST API: 直接コミット {sum(count for items in rest_per_date.values() for _, count, _, _ in items)}件")
+            if rest_per_date != rest_ranged:
+                failures += 1
+                print("  ❌ 不一致: REST APIの1日ずつの集計と一括の集計が異なります")
+
+            for description, use_graphql, errors, expected_use_graphql in CASES:
+                per_date, ranged, used_graphql = collect(github, use_graphql, errors, dates)
+                mismatched = [day for day in dates if per_date[day] != rest_per_date[day] or ranged[day] != rest_per_date[day]]
+                ok = not mismatched and used_graphql == expected_use_graphql
+                failures += not ok
+                print(f"  {'一致' if ok else '❌ 不一致'}: {description}: REST APIと異なる日 {len(mismatched)}日"
+                      + (f"（{', '.join(map(str, mismatched[:5]))}）" if mismatched else "")
+                      + f"、集計後のGraphQLの利用 {used_graphql}（期待 {expected_use_graphql}）")
+    finally:
+        logging.disable(logging.NOTSET)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+共有HTTPセッション（http_session）の再試行の確認
+
+実際のAPIには接続せず、HTTPAdapter.send を決められた順にレスポンス・例外を返す代役に置き換えて、
+リクエストごとの送信回数とレートリミッターのトークンの取得回数を確認する（期待と異なる場合は終了コード1）。
+  - Notionのページ作成（POST /v1/pages）は 502・読み取りのタイムアウト・送信後の切断では再送しない
+  - ページ作成でも 429 と送信前の接続エラーは再試行し、再試行ごとにトークンを取得する
+  - データベースのクエリ・GET/PATCH・GitHubのGraphQLクエリは 5xx・タイムアウトを再試行する
+
+使い方:
+    python scripts/benchmark/check_http_retry.py
+"""
+
+import io
+import os
+import sys
+from urllib.parse import urlsplit
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(BENCHMARK_DIR)), "src")
+for path in (BENCHMARK_DIR, SRC_DIR):
+    if path not in sys.path:
+        sys.path.append(path)
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+import http_session
+
+NOTION_PAGES = "https://api.notion.com/v1/pages"
+NOTION_QUERY = "https://api.notion.com/v1/databases/bench-db/query"
+GITHUB_GRAPHQL = "https://api.github.com/graphql"
+
+
+class CountingLimiter:
+    """acquire() の回数を数えるだけのレートリミッター"""
+
+    def __init__(self):
+        self.acquired = 0
+
+    def acquire(self):
+        self.acquired += 1
+
+
+class ScriptedTransport:
+    """HTTPAdapter.send の代役（steps の順にステータスコードを返すか例外を送出する）"""
+
+    def __init__(self):
+        self.steps = []
+        self.sent = 0
+
+    def send(self, adapter, request, **kwargs):
+        self.sent += 1
+        step = self.steps.pop(0)
+        if isinstance(step, Exception):
+            raise step
+        response = requests.Response()
+        response.status_code = step
+        response._content = b"{}"
+        response.raw = io.BytesIO()
+        response.request = request
+        response.url = request.url
+        return response
+
+
+def _connect_error():
+    """接続の確立に失敗した場合に requests が送出する例外（リクエストは送信されていない）"""
+    return requests.exceptions.ConnectionError(
+        MaxRetryError(None, "/v1/pages", NewConnectionError(None, "Connection refused"))
+    )
+
+
+# (説明, メソッド, URL, リクエストの本文, 代役の応答, 期待する送信回数, 期待する結果)
+CASES = [
+    ("ページ作成が502", "POST", NOTION_PAGES, {}, [502, 200], 1, 502),
+    ("ページ作成が読み取りのタイムアウト", "POST", NOTION_PAGES, {},
+     [requests.exceptions.ReadTimeout(), 200], 1, "ReadTimeout"),
+    ("ページ作成の送信後に切断", "POST", NOTION_PAGES, {},
+     [requests.exceptions.ConnectionError(ProtocolError("Connection aborted.")), 200], 1, "ConnectionError"),
+    ("ページ作成が429", "POST", NOTION_PAGES, {}, [429, 200], 2, 200),
+    ("ページ作成が接続エラー", "POST", NOTION_PAGES, {}, [_connect_error(), 200], 2, 200),
+    ("ページ作成が接続のタイムアウト", "POST", NOTION_PAGES, {},
+     [requests.exceptions.ConnectTimeout(), 200], 2, 200),
+    ("データベースのクエリが502", "POST", NOTION_QUERY, {}, [502, 200], 2, 200),
+    ("ページの更新が読み取りのタイムアウト", "PATCH", NOTION_PAGES + "/bench-page", {},
+     [requests.exceptions.ReadTimeout(), 200], 2, 200),
+    ("GraphQLのクエリが502", "POST", GITHUB_GRAPHQL, {"query": "query { viewer { login } }"}, [502, 200], 2, 200),
+    ("GraphQLのmutationが502", "POST", GITHUB_GRAPHQL, {"query": "mutation { addStar }"}, [502, 200], 1, 502),
+]
+
+
+def main():
+    http_session._backoff_seconds = lambda attempt: 0  # 待ち時間なしで確認する
+    transport = ScriptedTransport()
+    original_send = HTTPAdapter.send
+    HTTPAdapter.send = lambda adapter, request, **kwargs: transport.send(adapter, request, **kwargs)
+    failures = 0
+    try:
+        for description, method, url, body, steps, expected_sent, expected in CASES:
+            limiter = CountingLimiter()
+            # セッションは作成時の条件ごとに共有されるため、ケースごとにリミッター付きで作り直す
+            http_session._sessions.clear()
+            origin = "{0.scheme}://{0.netloc}".format(urlsplit(url))
+            session = http_session.get_session(origin, rate_limiter=limiter)
+            transport.steps = list(steps)
+            transport.sent = 0
+            try:
+                result = session.request(method, url, json=body).status_code
+            except requests.exceptions.RequestException as e:
+                result = type(e).__name__
+            ok = transport.sent == expected_sent and limiter.acquired == expected_sent and result == expected
+            failures += not ok
+            print(f"  {'一致' if ok else '❌ 不一致'}: {description}: 送信 {transport.sent}回 "
+                  f"（期待 {expected_sent}回）、トークン {limiter.acquired}個、結果 {result}")
+    finally:
+        HTTPAdapter.send = original_send
+        http_session._sessions.clear()
+
+    print(f"{len(CASES) - failures}/{len(CASES)}件が期待どおりでした")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Firestoreのウォーターマーク（watermark.FirestoreWatermarkStore）の同時書き込みの確認
+
+Cloud Functionsの別々のインスタンスが同じソースの record() を同時に呼んだ場合を再現する。
+プロセス内に Firestore API の代役（gRPCサーバー、楽観的なトランザクション）を立てて
+FIRESTORE_EMULATOR_HOST で接続し、2つの record() がどちらも読み込みを終えてから書き込むように
+読み込みを待ち合わせる。両方の日付のハッシュが残り、最終同期日が両方の日付の後まで進むことを
+確認する（期待と異なる場合は終了コード1）。
+
+使い方:
+    python scripts/benchmark/check_watermark_firestore.py
+"""
+
+import os
+import sys
+import threading
+import uuid
+from concurrent import futures
+from datetime import date
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(BENCHMARK_DIR)), "src")
+for path in (BENCHMARK_DIR, SRC_DIR):
+    if path not in sys.path:
+        sys.path.append(path)
+
+SOURCE = "bench"
+INITIAL_DATE = "2024-01-01"
+RECORD_DATES = (date(2024, 1, 2), date(2024, 1, 3))
+
+
+class FirestoreStandIn:
+    """
+    Firestore API（BatchGetDocuments / BeginTransaction / Commit / Rollback）の代役
+
+    トランザクション内で読み込んだドキュメントがコミットまでに更新されていた場合は ABORTED を返す
+    （クライアントライブラリの @firestore.transactional が最新の状態から再実行する）。
+    最初の wait_reads 回の読み込みは、その回数の読み込みがそろうまで待ち合わせる。
+    """
+
+    def __init__(self, wait_reads=2):
+        self.documents = {}  # 名前 → (Document, 更新回数)
+        self.transactions = {}  # トランザクションID → {名前: 読み込んだときの更新回数}
+        self.lock = threading.Lock()
+        self.barrier = threading.Barrier(wait_reads, timeout=10)
+        self.waiting_reads = wait_reads
+        self.aborted = 0
+
+    def batch_get(self, request, context):
+        from google.cloud.firestore_v1 import types
+        from google.protobuf import timestamp_pb2
+
+        with self.lock:
+            wait = self.waiting_reads > 0
+            self.waiting_reads -= 1
+        if wait:
+            self.barrier.wait()
+        with self.lock:
+            read_time = timestamp_pb2.Timestamp()
+            read_time.GetCurrentTime()
+            responses = []
+            for name in request.documents:
+                document, version = self.documents.get(name, (None, 0))
+                if request.transaction:
+                    self.transactions[request.transaction][name] = version
+                if document is None:
+                    responses.append(types.BatchGetDocumentsResponse(missing=name, read_time=read_time))
+                else:
+                    responses.append(types.BatchGetDocumentsResponse(found=document, read_time=read_time))
+        yield from responses
+
+    def begin(self, request, context):
+        from google.cloud.firestore_v1 import types
+
+        transaction_id = uuid.uuid4().bytes
+        with self.lock:
+            self.transactions[transaction_id] = {}
+        return types.BeginTransactionResponse(transaction=transaction_id)
+
+    def commit(self, request, context):
+        import grpc
+        from google.cloud.firestore_v1 import types
+        from google.protobuf import timestamp_pb2
+
+        with self.lock:
+            reads = self.transactions.pop(request.transaction, {}) if request.transaction else {}
+            if any(self.documents.get(name, (None, 0))[1] != version for name, version in reads.items()):
+                self.aborted += 1
+                context.abort(grpc.StatusCode.ABORTED, "読み込んだドキュメントが更新されています")
+            commit_time = timestamp_pb2.Timestamp()
+            commit_time.GetCurrentTime()
+            for write in request.writes:
+                document = types.Document(name=write.update.name, fields=write.update.fields,
+                                          create_time=commit_time, update_time=commit_time)
+                version = self.documents.get(document.name, (None, 0))[1]
+                self.documents[document.name] = (document, version + 1)
+            return types.CommitResponse(
+                write_results=[types.WriteResult(update_time=commit_time) for _ in request.writes],
+                commit_time=commit_time
+            )
+
+    def rollback(self, request, context):
+        from google.protobuf import empty_pb2
+
+        with self.lock:
+            self.transactions.pop(request.transaction, None)
+        return empty_pb2.Empty()
+
+    def serve(self):
+        """gRPCサーバーを起動して (サーバー, ポート) を返す"""
+        import grpc
+        from google.cloud.firestore_v1 import types
+        from google.protobuf import empty_pb2
+
+        def unary(handler, request_type, response_type):
+            return grpc.unary_unary_rpc_method_handler(
+                handler, request_deserializer=request_type.deserialize,
+                response_serializer=response_type.serialize
+            )
+
+        handlers = {
+            "BatchGetDocuments": grpc.unary_stream_rpc_method_handler(
+                self.batch_get, request_deserializer=types.BatchGetDocumentsRequest.deserialize,
+                response_serializer=types.BatchGetDocumentsResponse.serialize
+            ),
+            "BeginTransaction": unary(self.begin, types.BeginTransactionRequest, types.BeginTransactionResponse),
+            "Commit": unary(self.commit, types.CommitRequest, types.CommitResponse),
+            "Rollback": grpc.unary_unary_rpc_method_handler(
+                self.rollback, request_deserializer=types.RollbackRequest.deserialize,
+                response_serializer=empty_pb2.Empty.SerializeToString
+            ),
+        }
+        server = grpc.server(futures.ThreadPoolExecutor(8))
+        server.add_generic_rpc_handlers((grpc.method_handlers_generic_handler("google.firestore.v1.Firestore", handlers),))
+        port = server.add_insecure_port("localhost:0")
+        server.start()
+        return server, port
+
+
+def main():
+    os.environ.setdefault("GRPC_VERBOSITY", "ERROR")  # サーバー停止時の接続切断のログを出さない
+    stand_in = FirestoreStandIn()
+    server, port = stand_in.serve()
+    os.environ["FIRESTORE_EMULATOR_HOST"] = f"localhost:{port}"
+    try:
+        from google.cloud import firestore
+        from watermark import FirestoreWatermarkStore
+
+        client = firestore.Client(project="bench-project")
+        client.collection("sync_watermarks").document(SOURCE).set(
+            {"last_synced_date": INITIAL_DATE, "hashes": {INITIAL_DATE: "hash-initial"}}
+        )
+
+        # インスタンスごとにクライアントとストアを分ける（プロセス内のロックは共有されない）
+        stores = [FirestoreWatermarkStore(client=firestore.Client(project="bench-project")) for _ in RECORD_DATES]
+        threads = [
+            threading.Thread(target=store.record, args=(SOURCE, target_date, f"hash-{target_date.isoformat()}"))
+            for store, target_date in zip(stores, RECORD_DATES)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        state = client.collection("sync_watermarks").document(SOURCE).get().to_dict()
+    finally:
+        server.stop(0)
+
+    expected_dates = [INITIAL_DATE] + [target_date.isoformat() for target_date in RECORD_DATES]
+    expected_last = RECORD_DATES[-1].isoformat()
+    hashes_ok = sorted(state.get("hashes", {})) == expected_dates
+    last_ok = state.get("last_synced_date") == expected_last
+    print(f"同時に record() した日付: {', '.join(d.isoformat() for d in RECORD_DATES)}"
+          f"（再実行されたトランザクション {stand_in.aborted}回）")
+    print(f"  {'一致' if hashes_ok else '❌ 不一致'}: ハッシュの日付 {sorted(state.get('hashes', {}))}")
+    print(f"  {'一致' if last_ok else '❌ 不一致'}: 最終同期日 {state.get('last_synced_date')}（期待 {expected_last}）")
+    return 0 if hashes_ok and last_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+複数地点の天気の書き込み（weather_notion.update_notion_database）でデータベースに無いプロパティを除くことの確認
+
+fixtures.py のNotionの代役にデータベースのプロパティ（主地点と大阪の天気のみ、札幌の天気は無い）を設定し、
+本物と同じく無いプロパティを含む更新・作成を 400 で拒否するようにして、3地点の天気を書き込む。
+以下を確認する（期待と異なる場合は終了コード1）。
+  - 既存ページの更新・新規作成・索引を渡さない1日ずつの書き込みのいずれも成功し、
+    主地点と大阪の天気が書き込まれ、札幌の天気のプロパティは送信されないこと
+  - データベースの情報（GET /databases/{id}）の取得がプロセス内で1回だけであること
+
+使い方:
+    python scripts/benchmark/check_weather_station_properties.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+from datetime import date
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(BENCHMARK_DIR)), "src")
+for path in (BENCHMARK_DIR, SRC_DIR, os.path.join(SRC_DIR, "weather")):
+    if path not in sys.path:
+        sys.path.append(path)
+
+# (日付, 索引を共有するか)。1月2日は代役のページが無い（新規作成）
+DATES = ((date(2024, 1, 1), True), (date(2024, 1, 2), True), (date(2024, 1, 3), False))
+
+
+def main():
+    from fixtures import FitFixture, FixtureTransport, GitHubFixture, NotionFixture
+    from run_benchmark import BENCH_ENV, BENCH_STATIONS
+
+    os.environ.update(BENCH_ENV)
+
+    from notion_index import NotionDateIndex
+    from stations import parse_stations
+    from weather_notion import (
+        WEATHER_PROPERTIES, fetch_for_stations, get_weather_data, merge_station_weather, update_notion_database
+    )
+
+    stations = parse_stations(BENCH_STATIONS)
+    known, missing = stations[:2], stations[2]
+    notion = NotionFixture()
+    notion.reset([day for day, _ in DATES], missing_every=2)
+    notion.schema = {"日付": "date", "振り返り": "checkbox"}
+    notion.schema.update({name + station.property_suffix: "rich_text" for station in known for name in WEATHER_PROPERTIES})
+
+    retrieved = []
+    database = notion.database
+    notion.database = lambda database_id: retrieved.append(database_id) or database(database_id)
+
+    failures = 0
+    output = io.StringIO()
+    with FixtureTransport(FitFixture(), notion, GitHubFixture(DATES[0][0], DATES[-1][0])).installed():
+        shared_index = NotionDateIndex(BENCH_ENV["DATABASE_ID"], BENCH_ENV["NOTION_SECRET"])
+        for day, shared in DATES:
+            label = f"{day.year}年{day.month}月{day.day}日"
+            with contextlib.redirect_stdout(output):
+                results = fetch_for_stations(get_weather_data, stations, day.year, day.month, day.day)
+                weather_data = merge_station_weather(results, stations, label)
+                ok = update_notion_database(weather_data, label, shared_index if shared else None, stations)
+
+            page = next((page for page in notion.pages.values()
+                         if page["properties"]["日付"]["date"]["start"] == day.isoformat()
+                         and not page["properties"].get("振り返り", {}).get("checkbox")), None)
+            properties = page["properties"] if page else {}
+            written = [station.name for station in stations if "天気" + station.property_suffix in properties]
+            day_ok = ok and written == [station.name for station in known]
+            failures += not day_ok
+            print(f"  {'一致' if day_ok else '❌ 不一致'}: {day}（{'索引を共有' if shared else '索引なし'}）: "
+                  f"書き込み {'成功' if ok else '失敗'}、天気を書き込んだ地点 {', '.join(written) or 'なし'}"
+                  f"（期待 {', '.join(station.name for station in known)}）")
+
+    warned = "データベースに無いプロパティ" in output.getvalue() and missing.property_suffix in output.getvalue()
+    retrieve_ok = len(retrieved) == 1
+    failures += (not warned) + (not retrieve_ok)
+    print(f"  {'一致' if warned else '❌ 不一致'}: {missing.name} のプロパティが無いことの警告")
+    print(f"  {'一致' if retrieve_ok else '❌ 不一致'}: データベースの情報の取得 {len(retrieved)}回（期待 1回）")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,829 @@
+"""
+ベンチマーク用のAPIの代役（Google Fit・Notion・GitHub・気象庁）
+
+実際のAPIには接続せず、HTTPの送信部分（requests の HTTPAdapter.send と、googleapiclient が
+使う httplib2.Http.request）を差し替えて、プロセス内で生成したレスポンスを返す。
+http_session のレート制限・再試行・計測、googleapiclient のリクエスト組み立てなど、
+送信より手前の処理は本番と同じコードが動く。
+
+レスポンスは乱数のシードと日付から決定的に生成するため、同じ設定なら毎回同じ内容・同じ
+リクエスト数になる（リリース間でAPI呼び出し数を比較できる）。
+"""
+
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import httplib2
+import requests
+import requests.adapters
+from requests.structures import CaseInsensitiveDict
+
+FIT_HOST = "fitness.googleapis.com"
+NOTION_HOST = "api.notion.com"
+GITHUB_HOST = "api.github.com"
+JMA_HOST = "www.data.jma.go.jp"
+HOSTS = (FIT_HOST, NOTION_HOST, GITHUB_HOST, JMA_HOST)
+
+JST = timezone(timedelta(hours=9))
+
+
+class FixtureError(Exception):
+    """代役が想定していないリクエストを受けた場合の例外"""
+
+
+def _day_rng(seed, day, salt=""):
+    """シード・日付ごとに独立した乱数列を返す"""
+    return random.Random(f"{seed}:{salt}:{day.isoformat()}")
+
+
+def _iso_z(dt):
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _parse_iso(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+# Google Fit
+
+class FitFixture:
+    """Google Fit の dataset:aggregate・sessions.list・dataSources.datasets.get の代役"""
+
+    # aggregateBy の順（util._fetch_fit_chunk と同じ）ごとのデータ点数の範囲
+    POINT_COUNTS = (
+        (3, 12),     # 距離
+        (5, 24),     # 歩数
+        (5, 24),     # 消費カロリー
+        (0, 6),      # Heart Points
+        (60, 240),   # 心拍数
+        (0, 4),      # 酸素飽和度
+        (0, 1),      # 体重
+        (0, 1),      # 体脂肪率
+    )
+
+    def __init__(self, seed=0):
+        self.seed = seed
+        self._raw_cache = {}
+
+    def _datasets(self, day):
+        rng = _day_rng(self.seed, day, "fit")
+        datasets = []
+        for index, (low, high) in enumerate(self.POINT_COUNTS):
+            points = []
+            for _ in range(rng.randint(low, high)):
+                if index == 1:
+                    value = {"intVal": rng.randint(50, 2500)}
+                elif index == 4:
+                    value = {"fpVal": rng.gauss(72, 14)}
+                elif index == 5:
+                    value = {"fpVal": rng.uniform(94, 99)}
+                elif index == 6:
+                    value = {"fpVal": rng.uniform(60, 64)}
+                elif index == 7:
+                    value = {"fpVal": rng.uniform(15, 19)}
+                else:
+                    value = {"fpVal": rng.uniform(10, 900)}
+                points.append({"value": [value]})
+            datasets.append({"point": points})
+        return datasets
+
+    def _sessions(self, day):
+        """UTCの1日に終了するセッション（睡眠・瞑想・ワークアウト、アプリ間の重複を含む）"""
+        rng = _day_rng(self.seed, day, "sessions")
+        base = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+        sessions = []
+
+        def add(activity_type, app, start, minutes):
+            end = start + timedelta(minutes=minutes)
+            sessions.append({
+                "id": f"{app}-{activity_type}-{int(start.timestamp())}",
+                "activityType": activity_type,
+                "application": {"name": app},
+                "startTimeMillis": str(int(start.timestamp() * 1000)),
+                "endTimeMillis": str(int(end.timestamp() * 1000)),
+            })
+
+        # 睡眠（AutoSleep と Apple Watch が同じ時間帯を記録することがある）
+        sleep_start = base - timedelta(hours=rng.randint(1, 3))
+        sleep_minutes = rng.randint(300, 480)
+        add(72, "AutoSleep", sleep_start, sleep_minutes)
+        if rng.random() < 0.5:
+            add(72, "Apple Watch", sleep_start + timedelta(minutes=10), sleep_minutes - 20)
+
+        # ワークアウト（Strava と Nike Run Club の重複を含む）
+        for _ in range(rng.randint(0, 3)):
+            start = base + timedelta(hours=rng.randint(6, 20), minutes=rng.randint(0, 59))
+            activity_type = rng.choice((7, 8, 1, 108, 80))
+            minutes = rng.randint(10, 90)
+            add(activity_type, rng.choice(("Strava", "Health", "Google Fit")), start, minutes)
+            if rng.random() < 0.3:
+                add(activity_type, "Nike Run Club", start + timedelta(minutes=2), minutes)
+
+        # 瞑想
+        for _ in range(rng.randint(0, 2)):
+            start = base + timedelta(hours=rng.randint(6, 22))
+            add(45, "Calm", start, rng.randint(5, 20))
+        return sessions
+
+    def aggregate(self, body):
+        start = int(body["startTimeMillis"])
+        end = int(body["endTimeMillis"])
+        duration = int(body["bucketByTime"]["durationMillis"])
+        buckets = []
+        current = start
+        while current < end:
+            day = datetime.fromtimestamp(current / 1000).date()
+            buckets.append({
+                "startTimeMillis": str(current),
+                "endTimeMillis": str(min(current + duration, end)),
+                "dataset": self._datasets(day),
+            })
+            current += duration
+        return {"bucket": buckets}
+
+    def list_sessions(self, query):
+        start = _parse_iso(query["startTime"])
+        end = _parse_iso(query["endTime"])
+        start_ms = int(start.timestamp() * 1000)
+        end_ms = int(end.timestamp() * 1000)
+        sessions = []
+        day = start.date() - timedelta(days=1)
+        while day <= end.date() + timedelta(days=1):
+            for session in self._sessions(day):
+                if start_ms <= int(session["endTimeMillis"]) <= end_ms:
+                    sessions.append(session)
+            day += timedelta(days=1)
+        return {"session": sessions} if sessions else {}
+
+    # dataSources.datasets.get のデータソースID（の一部）ごとの POINT_COUNTS の位置
+    RAW_SOURCE_INDEX = (
+        ("distance", 0), ("step_count", 1), ("calories", 2), ("heart_minutes", 3),
+        ("heart_rate", 4), ("oxygen", 5), ("weight", 6), ("body.fat", 7),
+    )
+
+    def _raw_points(self, data_source_id, day):
+        """UTCの1日に始まる生のデータ点（開始時刻順、ページごとに作り直さないよう保持する）"""
+        cached = self._raw_cache.get((data_source_id, day))
+        if cached is not None:
+            return cached
+        index = next(i for name, i in self.RAW_SOURCE_INDEX if name in data_source_id)
+        rng = _day_rng(self.seed, day, f"raw:{data_source_id}")
+        base_ns = int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp()) * 10 ** 9
+        low, high = self.POINT_COUNTS[index]
+        starts = sorted(rng.randrange(0, 24 * 3600 - 60) for _ in range(rng.randint(low, high) * 4))
+        points = []
+        for second in starts:
+            start_ns = base_ns + second * 10 ** 9
+            value = self._raw_value(rng, index)
+            points.append({
+                "startTimeNanos": str(start_ns),
+                "endTimeNanos": str(start_ns + 60 * 10 ** 9),
+                "dataTypeName": data_source_id.split(":")[1],
+                "value": [value],
+            })
+        self._raw_cache[(data_source_id, day)] = points
+        return points
+
+    @staticmethod
+    def _raw_value(rng, index):
+        if index == 1:
+            return {"intVal": rng.randint(10, 600)}
+        if index == 4:
+            return {"fpVal": rng.gauss(72, 14)}
+        if index == 5:
+            return {"fpVal": rng.uniform(94, 99)}
+        if index == 6:
+            return {"fpVal": rng.uniform(60, 64)}
+        if index == 7:
+            return {"fpVal": rng.uniform(15, 19)}
+        return {"fpVal": rng.uniform(1, 200)}
+
+    def dataset(self, data_source_id, dataset_id, query):
+        """dataSources.datasets.get（範囲内に始まるデータ点を limit 件ずつ返す。pageToken は位置）"""
+        start_ns, end_ns = (int(value) for value in dataset_id.split("-"))
+        points = []
+        day = datetime.fromtimestamp(start_ns / 10 ** 9, tz=timezone.utc).date()
+        last_day = datetime.fromtimestamp(end_ns / 10 ** 9, tz=timezone.utc).date()
+        while day <= last_day:
+            points.extend(
+                point for point in self._raw_points(data_source_id, day)
+                if start_ns <= int(point["startTimeNanos"]) < end_ns
+            )
+            day += timedelta(days=1)
+        offset = int(query.get("pageToken") or 0)
+        limit = int(query.get("limit") or len(points) or 1)
+        result = {
+            "dataSourceId": data_source_id,
+            "minStartTimeNs": str(start_ns),
+            "maxEndTimeNs": str(end_ns),
+            "point": points[offset:offset + limit],
+        }
+        if offset + limit < len(points):
+            result["nextPageToken"] = str(offset + limit)
+        return result
+
+
+# Notion
+
+def _read_rich_text(segments):
+    result = []
+    for segment in segments:
+        text = segment.get("text", {})
+        content = text.get("content", "")
+        result.append({
+            "type": "text",
+            "text": {"content": content, "link": text.get("link")},
+            "annotations": {
+                "bold": False, "italic": False, "strikethrough": False,
+                "underline": False, "code": False, "color": "default",
+                **segment.get("annotations", {})
+            },
+            "plain_text": content,
+            "href": (text.get("link") or {}).get("url"),
+        })
+    return result
+
+
+def _read_property(name, prop):
+    """書き込み形式のプロパティをNotionが返す読み取り形式に変換する"""
+    prop_type = next(key for key in prop if key not in ("type", "id"))
+    value = prop[prop_type]
+    if prop_type in ("rich_text", "title"):
+        value = _read_rich_text(value)
+    elif prop_type == "date" and value is not None:
+        value = {"start": value.get("start"), "end": value.get("end"), "time_zone": None}
+    elif prop_type == "select" and value is not None:
+        value = {"id": value.get("name"), "color": "default", **value}
+    return {"id": name, "type": prop_type, prop_type: value}
+
+
+class NotionFixture:
+    """
+    Notion のデータベース検索・ページ更新・ページ作成の代役（ページを保持する）
+
+    schema（{プロパティ名: 種類}）を設定すると、データベースの情報（GET /databases/{id}）を返し、
+    schema に無いプロパティを含む更新・作成を本物と同じく 400（validation_error）で拒否する。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pages = {}
+        self._next_id = 0
+        self.schema = None
+
+    def reset(self, dates, missing_every=0, reflection_every=0):
+        """
+        日付ごとのページを用意する
+
+        Args:
+            dates: ページを作る日付のリスト
+            missing_every: N日ごとにページを作らない（新規作成の経路を通すため、0 で全日作成）
+            reflection_every: N日ごとに「振り返り」済みの重複ページも作る（0 で作らない）
+        """
+        with self._lock:
+            self.pages = {}
+            self._next_id = 0
+            for index, day in enumerate(dates):
+                if missing_every and index % missing_every == missing_every - 1:
+                    continue
+                self._add(day, reflection=False)
+                if reflection_every and index % reflection_every == 0:
+                    self._add(day, reflection=True)
+
+    def _new_id(self):
+        self._next_id += 1
+        return f"bench-page-{self._next_id:06d}"
+
+    def _add(self, day, reflection):
+        page_id = self._new_id()
+        self.pages[page_id] = {
+            "object": "page",
+            "id": page_id,
+            "properties": {
+                "日付": _read_property("日付", {"date": {"start": day.isoformat()}}),
+                "振り返り": _read_property("振り返り", {"checkbox": reflection}),
+            }
+        }
+
+    def query(self, body):
+        start = end = None
+        for condition in body.get("filter", {}).get("and", []):
+            date_filter = condition.get("date", {})
+            start = date_filter.get("on_or_after", start)
+            end = date_filter.get("on_or_before", end)
+        page_size = int(body.get("page_size", 100))
+        offset = int(body.get("start_cursor") or 0)
+        with self._lock:
+            matches = []
+            for page in self.pages.values():
+                page_date = ((page["properties"].get("日付") or {}).get("date") or {}).get("start")
+                if page_date and (start is None or page_date[:10] >= start) and (end is None or page_date[:10] <= end):
+                    matches.append(json.loads(json.dumps(page)))
+        chunk = matches[offset:offset + page_size]
+        has_more = offset + page_size < len(matches)
+        return {
+            "object": "list",
+            "results": chunk,
+            "has_more": has_more,
+            "next_cursor": str(offset + page_size) if has_more else None,
+        }
+
+    def database(self, database_id):
+        """データベースの情報（schema が無い場合はNone）"""
+        if self.schema is None:
+            return None
+        return {
+            "object": "database",
+            "id": database_id,
+            "properties": {
+                name: {"id": name, "name": name, "type": prop_type, prop_type: {}}
+                for name, prop_type in self.schema.items()
+            },
+        }
+
+    def validation_error(self, body):
+        """schema に無いプロパティがあれば、Notionが返すエラーの本文を返す（無ければNone）"""
+        unknown = [name for name in body.get("properties", {}) if self.schema is not None and name not in self.schema]
+        if not unknown:
+            return None
+        return {
+            "object": "error", "status": 400, "code": "validation_error",
+            "message": f"{unknown[0]} is not a property that exists.",
+        }
+
+    def update(self, page_id, body):
+        with self._lock:
+            page = self.pages.get(page_id)
+            if page is None:
+                return None
+            for name, prop in body.get("properties", {}).items():
+                page["properties"][name] = _read_property(name, prop)
+            return json.loads(json.dumps(page))
+
+    def create(self, body):
+        with self._lock:
+            page_id = self._new_id()
+            page = {
+                "object": "page",
+                "id": page_id,
+                "properties": {
+                    name: _read_property(name, prop) for name, prop in body.get("properties", {}).items()
+                }
+            }
+            self.pages[page_id] = page
+            return json.loads(json.dumps(page))
+
+
+# GitHub
+
+class GitHubFixture:
+    """GitHub REST / GraphQL の代役（期間内にIssue・PR・コミットを散らばらせたリポジトリ）"""
+
+    def __init__(self, start_date, end_date, seed=0, repo_count=6, login="bench-user"):
+        self.login = login
+        self.graphql_errors = {}  # リポジトリ名 → GraphQLのエラーの type（例: RATE_LIMITED）
+        rng = random.Random(f"{seed}:github")
+        start = datetime(start_date.year, start_date.month, start_date.day, tzinfo=JST) - timedelta(days=1)
+        span_hours = max(48, ((end_date - start_date).days + 2) * 24)
+
+        def at():
+            return start + timedelta(hours=rng.uniform(0, span_hours))
+
+        self.repos = []
+        self.data = {}
+        for index in range(repo_count):
+            name = f"repo-{index}"
+            self.repos.append({
+                "id": index,
+                "name": name,
+                "full_name": f"{login}/{name}",
+                "owner": {"login": login, "type": "User"},
+                "default_branch": "main",
+                "updated_at": _iso_z(start + timedelta(hours=span_hours - index)),
+            })
+
+            activity = max(1, span_hours // 24)
+            issues = []
+            for number in range(1, activity // 2 + 2):
+                closed = at()
+                issues.append({
+                    "number": number, "title": f"{name} issue {number}",
+                    "html_url": f"https://github.com/{login}/{name}/issues/{number}",
+                    "state": "closed", "closed_at": _iso_z(closed), "updated_at": _iso_z(closed),
+                })
+            issues.sort(key=lambda issue: issue["updated_at"], reverse=True)
+
+            commits = []
+            for number in range(activity * 2 + 4):
+                committed = at()
+                commits.append({
+                    "sha": f"{index:02d}{number:06d}" + "0" * 32,
+                    "parents": [{}] * (2 if rng.random() < 0.1 else 1),
+                    "commit": {"committer": {"date": _iso_z(committed)}},
+                    "stats": {"additions": rng.randint(1, 400), "deletions": rng.randint(0, 200)},
+                })
+            commits.sort(key=lambda commit: commit["commit"]["committer"]["date"], reverse=True)
+
+            prs = []
+            pr_commits = {}
+            for number in range(1000, 1000 + activity // 2 + 2):
+                merged = at()
+                prs.append({
+                    "number": number, "title": f"{name} pull {number}",
+                    "html_url": f"https://github.com/{login}/{name}/pull/{number}",
+                    "state": "closed",
+                    "merged_at": _iso_z(merged) if rng.random() < 0.85 else None,
+                    "merge_commit_sha": None,
+                    "updated_at": _iso_z(merged),
+                })
+                pr_commits[number] = [commit["sha"] for commit in rng.sample(commits, min(3, len(commits)))]
+            prs.sort(key=lambda pr: pr["updated_at"], reverse=True)
+
+            sha_to_prs = {}
+            for number, shas in pr_commits.items():
+                for sha in shas:
+                    sha_to_prs.setdefault(sha, []).append(number)
+
+            # 一部のPRはsquashマージ（マージ日時に親1つのコミットを追加し、merge_commit_sha をそのSHAにする。
+            # PRのコミット一覧には含まれず、GraphQLの関連PRには含まれる）
+            squash_rng = random.Random(f"{seed}:github:squash:{name}")
+            for pr in prs:
+                if not pr["merged_at"] or squash_rng.random() >= 0.5:
+                    continue
+                sha = f"{index:02d}9{pr['number']:05d}" + "0" * 32
+                commits.append({
+                    "sha": sha,
+                    "parents": [{}],
+                    "commit": {"committer": {"date": pr["merged_at"]}},
+                    "stats": {"additions": squash_rng.randint(1, 400), "deletions": squash_rng.randint(0, 200)},
+                })
+                pr["merge_commit_sha"] = sha
+                sha_to_prs[sha] = [pr["number"]]
+            commits.sort(key=lambda commit: commit["commit"]["committer"]["date"], reverse=True)
+
+            self.data[name] = {
+                "issues": issues, "prs": prs, "commits": commits,
+                "pr_commits": pr_commits, "sha_to_prs": sha_to_prs,
+                "merged": {pr["number"] for pr in prs if pr["merged_at"]},
+            }
+
+    @staticmethod
+    def _page(items, params, default_per_page=30):
+        per_page = int(params.get("per_page", default_per_page))
+        page = int(params.get("page", 1))
+        return items[(page - 1) * per_page:page * per_page]
+
+    def get(self, path, params):
+        parts = path.strip("/").split("/")
+        if path == "/user":
+            return 200, {"login": self.login}
+        if path == "/user/repos":
+            return 200, self._page(self.repos, params)
+        if path == "/user/orgs":
+            return 200, []
+        if len(parts) < 4 or parts[0] != "repos" or parts[2] not in self.data:
+            return 404, {"message": "Not Found"}
+
+        data = self.data[parts[2]]
+        resource = parts[3:]
+        if resource == ["issues"]:
+            since = _parse_iso(params["since"]) if "since" in params else None
+            issues = [issue for issue in data["issues"] if since is None or _parse_iso(issue["updated_at"]) >= since]
+            return 200, self._page(issues, params)
+        if resource == ["pulls"]:
+            return 200, self._page(data["prs"], params)
+        if len(resource) == 3 and resource[0] == "pulls" and resource[2] == "commits":
+            shas = data["pr_commits"].get(int(resource[1]), [])
+            return 200, [{"sha": sha} for sha in shas]
+        if resource == ["commits"]:
+            since = _parse_iso(params["since"])
+            until = _parse_iso(params["until"])
+            commits = [
+                {"sha": commit["sha"], "parents": commit["parents"], "commit": commit["commit"]}
+                for commit in data["commits"]
+                if since <= _parse_iso(commit["commit"]["committer"]["date"]) <= until
+            ]
+            return 200, self._page(commits, params)
+        if len(resource) == 2 and resource[0] == "commits":
+            for commit in data["commits"]:
+                if commit["sha"] == resource[1]:
+                    return 200, commit
+        return 404, {"message": "Not Found"}
+
+    def graphql(self, body):
+        variables = body.get("variables", {})
+        data = self.data.get(variables.get("name"))
+        if data is None:
+            return 200, {"data": {"repository": None}}
+        error_type = self.graphql_errors.get(variables.get("name"))
+        if error_type:
+            return 200, {"data": {"repository": None}, "errors": [{"type": error_type, "message": f"{error_type} (fixture)"}]}
+        since = _parse_iso(variables["since"])
+        until = _parse_iso(variables["until"])
+        commits = [
+            commit for commit in data["commits"]
+            if since <= _parse_iso(commit["commit"]["committer"]["date"]) <= until
+        ]
+        offset = int(variables.get("cursor") or 0)
+        chunk = commits[offset:offset + 100]
+        nodes = [{
+            "oid": commit["sha"],
+            "committedDate": commit["commit"]["committer"]["date"],
+            "additions": commit["stats"]["additions"],
+            "deletions": commit["stats"]["deletions"],
+            "parents": {"totalCount": len(commit["parents"])},
+            "associatedPullRequests": {"nodes": [
+                {"number": number, "merged": number in data["merged"]}
+                for number in data["sha_to_prs"].get(commit["sha"], [])
+            ]},
+        } for commit in chunk]
+        has_next = offset + 100 < len(commits)
+        return 200, {"data": {"repository": {"ref": {"target": {"history": {
+            "pageInfo": {"hasNextPage": has_next, "endCursor": str(offset + 100) if has_next else None},
+            "nodes": nodes,
+        }}}}}}
+
+
+# 気象庁
+
+JMA_CONDITIONS = ("快晴", "晴れ", "薄曇", "曇", "雨", "雪", "霧", "雷")
+
+
+def jma_hourly_html(year, month, day, seed=0):
+    """
+    気象庁 hourly_s1.php と同じ構造のHTML（表 table.data2_s、見出し3行 + 1時〜24時の24行）
+
+    本物のページと同程度の大きさになるよう、表の前後にナビゲーションなどの要素を入れる。
+    """
+    rng = random.Random(f"{seed}:jma:{year:04d}-{month:02d}-{day:02d}")
+    base_pressure = 1010 + rng.uniform(-10, 10)
+    base_temp = rng.uniform(0, 25)
+
+    rows = []
+    for hour in range(1, 25):
+        pressure = base_pressure + rng.uniform(-4, 4) + (-8 if hour > 18 and rng.random() < 0.3 else 0)
+        cells = [
+            str(hour),
+            f"{pressure - 3:.1f}",
+            "--" if rng.random() < 0.05 else f"{pressure:.1f}",
+            rng.choice(("--", "--", "0.0", "0.5", "1.5", "×")),
+            "--" if rng.random() < 0.03 else f"{base_temp + rng.uniform(-5, 8):.1f}",
+            f"{rng.uniform(-5, 15):.1f}",
+            f"{rng.uniform(5, 20):.1f}",
+            "--" if rng.random() < 0.03 else str(rng.randint(20, 99)),
+            f"{rng.uniform(0, 8):.1f}",
+            rng.choice(("北", "北東", "東", "南東", "南", "南西", "西", "北西")),
+            rng.choice(("", "0.0", "0.3", "1.0", "--")),
+            "", "--", "--",
+        ]
+        if rng.random() < 0.6 and hour % 3 != 0:
+            cells.append("")
+        else:
+            condition = rng.choice(JMA_CONDITIONS)
+            cells.append(f'<img src="../../data/image/tenki/small/{condition}.gif" alt="{condition}">')
+        cells += ["", ""]
+        rows.append(
+            '<tr class="mtx" style="text-align:right;">'
+            + "".join(f'<td class="data_0_0">{cell}</td>' for cell in cells)
+            + "</tr>"
+        )
+
+    header = "".join('<tr class="mtx"><th scope="col">時</th></tr>' for _ in range(3))
+    navigation = "".join(
+        f'<div class="nav{i}"><ul><li><a href="/obd/stats/etrn/index.php?n={i}">リンク{i}</a></li>'
+        f'<li>項目 {i}</li></ul><p>説明文 {i}</p></div>'
+        for i in range(400)
+    )
+    return (
+        '<!DOCTYPE html><html lang="ja"><head><meta charset="utf-8"><title>気象庁｜過去の気象データ検索</title></head>'
+        f'<body>{navigation}<table id="tablefix1" class="data2_s">{header}{"".join(rows)}</table>'
+        f'{navigation}</body></html>'
+    )
+
+
+def _header_row(cells):
+    return '<tr class="mtx">' + "".join(
+        f'<th scope="col"{f" rowspan={rows}" if rows > 1 else ""}{f" colspan={cols}" if cols > 1 else ""}>{label}</th>'
+        for label, rows, cols in cells
+    ) + "</tr>"
+
+
+# daily_s1.php の見出し4行（公開されているページの列の構成に合わせる。(見出し, 行数, 列数)）
+JMA_DAILY_HEADER = "".join(_header_row(cells) for cells in (
+    (("日", 4, 1), ("気圧(hPa)", 1, 2), ("降水量(mm)", 1, 3), ("気温(℃)", 1, 3), ("湿度(%)", 1, 2),
+     ("風向・風速(m/s)", 1, 6), ("日照<br>時間<br>(h)", 4, 1), ("雪(cm)", 1, 2), ("天気概況", 2, 2)),
+    (("現地", 1, 1), ("海面", 1, 1), ("合計", 3, 1), ("最大", 2, 2), ("平均", 3, 1), ("最高", 3, 1),
+     ("最低", 3, 1), ("平均", 3, 1), ("最小", 3, 1), ("平均<br>風速", 3, 1), ("最大風速", 2, 2),
+     ("最大瞬間風速", 2, 2), ("最多<br>風向", 3, 1), ("降雪", 1, 1), ("最深積雪", 1, 1)),
+    (("平均", 2, 1), ("平均", 2, 1), ("合計", 2, 1), ("値", 2, 1), ("昼<br>(06:00-18:00)", 2, 1),
+     ("夜<br>(18:00-翌日06:00)", 2, 1)),
+    (("1時間", 1, 1), ("10分間", 1, 1), ("風速", 1, 1), ("風向", 1, 1), ("風速", 1, 1), ("風向", 1, 1)),
+))
+
+
+def jma_daily_html(year, month, seed=0):
+    """
+    気象庁 daily_s1.php（日別値）と同じ構造のHTML（見出し4行 + 月の日数分の行、22列）
+
+    列: 日, 気圧(現地・海面), 降水量(合計・最大1時間・最大10分間), 気温(平均・最高・最低),
+        湿度(平均・最小), 風(平均風速・最大風速・風向・最大瞬間風速・風向・最多風向),
+        日照時間, 雪(降雪・最深積雪), 天気概況(昼・夜)
+    """
+    rng = random.Random(f"{seed}:jma-daily:{year:04d}-{month:02d}")
+    days = (datetime(year + month // 12, month % 12 + 1, 1) - datetime(year, month, 1)).days
+    summaries = ("晴", "快晴", "曇", "薄曇", "雨", "晴後曇", "曇一時雨", "雨後晴", "雪")
+
+    def mark(value):
+        # 品質情報の記号（準正常値・資料不足値）がまれに付く
+        roll = rng.random()
+        return f"{value} )" if roll < 0.03 else f"{value} ]" if roll < 0.04 else value
+
+    rows = []
+    for day in range(1, days + 1):
+        mean_temp = rng.uniform(0, 28)
+        precipitation = rng.choice(("--", "--", "0.0", "0.5", f"{rng.uniform(1, 40):.1f}"))
+        cells = [
+            f'<a href="hourly_s1.php?prec_no=44&amp;block_no=47662&amp;year={year}&amp;month={month:02d}&amp;day={day:02d}&amp;view=p1">{day}</a>',
+            f"{rng.uniform(995, 1020):.1f}",
+            mark(f"{rng.uniform(998, 1025):.1f}"),
+            precipitation,
+            "--" if precipitation == "--" else f"{rng.uniform(0, 10):.1f}",
+            "--" if precipitation == "--" else f"{rng.uniform(0, 4):.1f}",
+            mark(f"{mean_temp:.1f}"),
+            f"{mean_temp + rng.uniform(1, 8):.1f}",
+            f"{mean_temp - rng.uniform(1, 8):.1f}",
+            str(rng.randint(30, 95)),
+            str(rng.randint(10, 60)),
+            f"{rng.uniform(1, 6):.1f}",
+            f"{rng.uniform(3, 12):.1f}", "北西",
+            f"{rng.uniform(6, 20):.1f}", "北",
+            "北西",
+            "×" if rng.random() < 0.02 else f"{rng.uniform(0, 12):.1f}",
+            "--", "--",
+            rng.choice(summaries), rng.choice(summaries),
+        ]
+        rows.append(
+            '<tr class="mtx" style="text-align:right;">'
+            + "".join(f'<td class="data_0_0">{cell}</td>' for cell in cells)
+            + "</tr>"
+        )
+
+    header = JMA_DAILY_HEADER
+    navigation = "".join(
+        f'<div class="nav{i}"><ul><li><a href="/obd/stats/etrn/index.php?n={i}">リンク{i}</a></li></ul></div>'
+        for i in range(200)
+    )
+    return (
+        '<!DOCTYPE html><html lang="ja"><head><meta charset="utf-8"><title>気象庁｜過去の気象データ検索</title></head>'
+        f'<body>{navigation}<table id="tablefix1" class="data2_s">{header}{"".join(rows)}</table>'
+        f'{navigation}</body></html>'
+    )
+
+
+# 送信の差し替え
+
+class FixtureTransport:
+    """
+    requests と httplib2 の送信を差し替えて、ホストごとに代役へ振り分ける
+
+    Args:
+        fit / notion / github: 各サービスの代役
+        latency: {ホスト: 秒} 送信ごとに待機する時間（ネットワーク遅延の模擬）
+        seed: 気象庁ページの乱数シード
+    """
+
+    def __init__(self, fit, notion, github, latency=None, seed=0):
+        self.fit = fit
+        self.notion = notion
+        self.github = github
+        self.latency = dict(latency or {})
+        self.seed = seed
+        self._lock = threading.Lock()
+        self.calls = {}
+        self._jma_pages = {}
+
+    def reset_counts(self):
+        with self._lock:
+            self.calls = {}
+
+    def _count(self, host):
+        with self._lock:
+            self.calls[host] = self.calls.get(host, 0) + 1
+
+    def _jma_page(self, query):
+        key = (int(query["year"]), int(query["month"]), int(query["day"]))
+        page = self._jma_pages.get(key)
+        if page is None:
+            page = jma_hourly_html(*key, seed=self.seed).encode("utf-8")
+            self._jma_pages[key] = page
+        return page
+
+    def handle(self, method, url, body):
+        """
+        Returns:
+            (ステータス, Content-Type, 本文のbytes)
+        """
+        parts = urlsplit(url)
+        host = parts.netloc
+        self._count(host)
+        delay = self.latency.get(host, 0)
+        if delay > 0:
+            time.sleep(delay)
+
+        query = dict(parse_qsl(parts.query))
+        payload = json.loads(body) if body else {}
+        path = parts.path
+
+        if host == JMA_HOST and path.endswith("/hourly_s1.php"):
+            return 200, "text/html; charset=utf-8", self._jma_page(query)
+        if host == JMA_HOST and path.endswith("/daily_s1.php"):
+            html = jma_daily_html(int(query["year"]), int(query["month"]), seed=self.seed)
+            return 200, "text/html; charset=utf-8", html.encode("utf-8")
+
+        if host == FIT_HOST:
+            if path.endswith("/dataset:aggregate") and method == "POST":
+                result = self.fit.aggregate(payload)
+            elif path.endswith("/sessions") and method == "GET":
+                result = self.fit.list_sessions(query)
+            elif "/dataSources/" in path and "/datasets/" in path and method == "GET":
+                source_path, dataset_id = unquote(path).split("/dataSources/", 1)[1].split("/datasets/")
+                result = self.fit.dataset(source_path, dataset_id, query)
+            else:
+                raise FixtureError(f"{method} {url}")
+            return 200, "application/json", json.dumps(result).encode("utf-8")
+
+        if host == NOTION_HOST:
+            if method == "POST" and path.endswith("/query"):
+                status, result = 200, self.notion.query(payload)
+            elif method == "GET" and path.startswith("/v1/databases/"):
+                result = self.notion.database(path.rsplit("/", 1)[-1])
+                status = 200 if result is not None else 404
+                result = result or {"object": "error", "status": 404, "code": "object_not_found"}
+            elif method in ("PATCH", "POST") and path.startswith("/v1/pages") and self.notion.validation_error(payload):
+                status, result = 400, self.notion.validation_error(payload)
+            elif method == "PATCH" and path.startswith("/v1/pages/"):
+                result = self.notion.update(path.rsplit("/", 1)[-1], payload)
+                status = 200 if result is not None else 404
+                result = result or {"object": "error", "status": 404, "code": "object_not_found"}
+            elif method == "POST" and path == "/v1/pages":
+                status, result = 200, self.notion.create(payload)
+            else:
+                raise FixtureError(f"{method} {url}")
+            return status, "application/json", json.dumps(result, ensure_ascii=False).encode("utf-8")
+
+        if host == GITHUB_HOST:
+            if method == "POST" and path == "/graphql":
+                status, result = self.github.graphql(payload)
+            elif method == "GET":
+                status, result = self.github.get(path, query)
+            else:
+                raise FixtureError(f"{method} {url}")
+            return status, "application/json; charset=utf-8", json.dumps(result).encode("utf-8")
+
+        raise FixtureError(f"{method} {url}")
+
+    def _requests_send(self, adapter, request, **kwargs):
+        body = request.body.decode("utf-8") if isinstance(request.body, bytes) else request.body
+        status, content_type, content = self.handle(request.method, request.url, body)
+        response = requests.Response()
+        response.status_code = status
+        response._content = content
+        response.headers = CaseInsensitiveDict({"Content-Type": content_type, "Content-Length": str(len(content))})
+        response.url = request.url
+        response.request = request
+        response.encoding = "utf-8"
+        response.reason = "OK" if status < 400 else "Error"
+        return response
+
+    def _httplib2_request(self, http, uri, method="GET", body=None, headers=None, *args, **kwargs):
+        if isinstance(body, bytes):
+            body = body.decode("utf-8")
+        status, content_type, content = self.handle(method, uri, body)
+        return httplib2.Response({"status": str(status), "content-type": content_type}), content
+
+    @contextmanager
+    def installed(self):
+        """with ブロック内の requests / httplib2 の送信を代役に向ける"""
+        transport = self
+        original_send = requests.adapters.HTTPAdapter.send
+        original_request = httplib2.Http.request
+
+        def send(adapter, request, **kwargs):
+            return transport._requests_send(adapter, request, **kwargs)
+
+        def request(http, uri, method="GET", body=None, headers=None, *args, **kwargs):
+            return transport._httplib2_request(http, uri, method, body, headers, *args, **kwargs)
+
+        requests.adapters.HTTPAdapter.send = send
+        httplib2.Http.request = request
+        try:
+            yield self
+        finally:
+            requests.adapters.HTTPAdapter.send = original_send
+            httplib2.Http.request = original_request
+
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+実際のAPIに接続せずに同期処理の所要時間とAPI呼び出し数を計測するベンチマーク
+
+Google Fit・Notion・GitHub・気象庁への送信を fixtures.py の代役に差し替え、次の処理を計測する:
+    fit_day           util.get_google_fit_data（1日分）
+    fit_hourly_week   fit_aggregate.aggregate_fit_data（7日分、1時間単位のバケット）
+    weather_day       weather_notion.get_weather_data（1日分）
+    weather_stations_day  weather_notion.fetch_for_stations（1日分、BENCH_STATIONS の3地点を並行して取得）
+    github_sync_date  GitHubNotionSync.sync_date（1日分、Notionへの書き込みを含む）
+    backfill          backfill.Backfill.run（--days 日分、全ソース、デフォルト365日）
+
+結果はJSONのレポートに保存する（リリース間でAPI呼び出し数・所要時間を比較するため）。
+--compare に以前のレポートを渡すと、呼び出し数の増加や所要時間の悪化を検出して終了コード1を返す。
+
+使い方:
+    python scripts/benchmark/run_benchmark.py
+    python scripts/benchmark/run_benchmark.py --latency notion=350,github=80,fit=120,jma=150
+    python scripts/benchmark/run_benchmark.py --only fit_day,weather_day --repeat 20
+    python scripts/benchmark/run_benchmark.py --output base.json
+    python scripts/benchmark/run_benchmark.py --compare base.json --tolerance 0.2
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(BENCHMARK_DIR))
+SRC_DIR = os.path.join(PROJECT_ROOT, "src")
+for path in (BENCHMARK_DIR, SRC_DIR, os.path.join(SRC_DIR, "weather"), os.path.join(SRC_DIR, "github")):
+    if path not in sys.path:
+        sys.path.append(path)
+
+REPORT_SCHEMA = "sync-benchmark/1"
+DEFAULT_END_DATE = "2025-06-30"
+DEFAULT_DAYS = 365
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.25
+BENCHMARKS = ("fit_day", "fit_hourly_week", "weather_day", "weather_stations_day", "github_sync_date", "backfill")
+
+# ベンチマーク中に使う環境変数（本物の認証情報・キャッシュ・ウォーターマークは使わない）
+BENCH_ENV = {
+    "NOTION_SECRET": "bench-notion-secret",
+    "DATABASE_ID": "bench-database",
+    "GITHUB_TOKEN": "bench-github-token",
+    "GITHUB_HTTP_CACHE_PATH": "none",
+    "JMA_ARCHIVE_PATH": "none",
+    "WEATHER_STATIONS_PATH": "none",
+    "SYNC_WATERMARK_BACKEND": "none",
+    "NOTION_RATE_LIMIT": "0",
+    "METRICS_OTEL": "false",
+}
+
+# weather_stations_day で取得する地点（代役のページは地点によらず同じ）
+BENCH_STATIONS = {
+    "stations": [
+        {"name": "東京", "prec_no": 44, "block_no": 47662},
+        {"name": "大阪", "prec_no": 62, "block_no": 47772},
+        {"name": "札幌", "prec_no": 14, "block_no": 47412},
+    ]
+}
+
+
+def parse_latency(value):
+    """
+    --latency の値を {ホスト: 秒} に変換する
+
+    "50" のように数値だけならすべてのホストに、"notion=350,github=80" のように
+    指定すればホストごとに（ミリ秒で）遅延を入れる
+    """
+    from fixtures import FIT_HOST, GITHUB_HOST, HOSTS, JMA_HOST, NOTION_HOST
+
+    aliases = {"fit": FIT_HOST, "notion": NOTION_HOST, "github": GITHUB_HOST, "jma": JMA_HOST}
+    latency = {}
+    if not value:
+        return latency
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if "=" not in item:
+            for host in HOSTS:
+                latency[host] = float(item) / 1000
+            continue
+        name, ms = item.split("=", 1)
+        host = aliases.get(name.strip(), name.strip())
+        if host not in HOSTS:
+            raise argparse.ArgumentTypeError(f"不明なホスト: {name}（指定可能: {', '.join(aliases)}）")
+        latency[host] = float(ms) / 1000
+    return latency
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextlib.contextmanager
+def quiet(verbose):
+    """同期処理の標準出力・INFOログを抑える（--verbose の場合はそのまま出す）"""
+    if verbose:
+        yield
+        return
+    logging.disable(logging.WARNING)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+class BenchmarkRunner:
+    """代役の送信を差し替えた状態で各ベンチマークを実行し、レポートを組み立てる"""
+
+    def __init__(self, args):
+        from fixtures import FitFixture, FixtureTransport, GitHubFixture, NotionFixture
+
+        self.args = args
+        self.end_date = datetime.strptime(args.end_date, "%Y-%m-%d").date()
+        self.dates = [self.end_date - timedelta(days=offset) for offset in range(args.days - 1, -1, -1)]
+        self.notion = NotionFixture()
+        self.transport = FixtureTransport(
+            FitFixture(args.seed),
+            self.notion,
+            GitHubFixture(self.dates[0], self.dates[-1], seed=args.seed),
+            latency=parse_latency(args.latency),
+            seed=args.seed
+        )
+
+    def reset_notion(self, dates):
+        # 一部の日付はページ無し（新規作成）、一部は「振り返り」済みの重複ページありにする
+        self.notion.reset(dates, missing_every=10, reflection_every=7)
+
+    # 各ベンチマーク（setupは計測外、戻り値の関数を計測する）
+
+    def setup_fit_day(self):
+        from google.oauth2.credentials import Credentials
+        from util import get_google_fit_data
+
+        credentials = Credentials(token="bench-google-token")
+        return lambda: get_google_fit_data(credentials, self.end_date) is not None
+
+    def setup_fit_hourly_week(self):
+        from fit_aggregate import aggregate_fit_data
+        from google.oauth2.credentials import Credentials
+
+        credentials = Credentials(token="bench-google-token")
+        start = self.end_date - timedelta(days=6)
+        return lambda: len(aggregate_fit_data(credentials, start, self.end_date, bucket="hour").start_millis) == 7 * 24
+
+    def setup_weather_day(self):
+        from weather_notion import get_weather_data
+
+        day = self.end_date
+        return lambda: get_weather_data(day.year, day.month, day.day) is not None
+
+    def setup_weather_stations_day(self):
+        from stations import parse_stations
+        from weather_notion import fetch_for_stations, get_weather_data, merge_station_weather
+
+        day = self.end_date
+        stations = parse_stations(BENCH_STATIONS)
+
+        def run():
+            results = fetch_for_stations(get_weather_data, stations, day.year, day.month, day.day)
+            return merge_station_weather(results, stations, f"{day.year}年{day.month}月{day.day}日")["_is_complete"]
+        return run
+
+    def setup_github_sync_date(self):
+        from github_notion import GitHubNotionSync
+        from notion_index import NotionDateIndex
+
+        self.reset_notion([self.end_date])
+        sync = GitHubNotionSync()
+        sync.page_index = NotionDateIndex(sync.database_id, sync.notion_token)
+        return lambda: sync.sync_date(self.end_date)
+
+    def setup_backfill(self):
+        import main
+        from backfill import SOURCES, Backfill
+        from google.oauth2.credentials import Credentials
+
+        self.reset_notion(self.dates)
+        credentials = Credentials(token="bench-google-token")
+        main.get_credentials = lambda: credentials
+        backfill = Backfill(self.dates, SOURCES, workers=self.args.jobs, weather_sleep=0)
+        return backfill.run
+
+    def run_one(self, name, repeat):
+        from instrumentation import start_run, summary
+
+        walls = []
+        ok = True
+        last = None
+        for _ in range(repeat):
+            with quiet(self.args.verbose):
+                func = getattr(self, f"setup_{name}")()
+                self.transport.reset_counts()
+                start_run(name)
+                started = time.perf_counter()
+                try:
+                    result = bool(func())
+                except Exception as e:
+                    print(f"エラー: {name}: {e}", file=sys.stderr)
+                    result = False
+                walls.append(time.perf_counter() - started)
+            ok = ok and result
+            last = summary()
+
+        calls = dict(sorted(self.transport.calls.items()))
+        return {
+            "ok": ok,
+            "wall_s": {
+                "min": round(min(walls), 4),
+                "median": round(statistics.median(walls), 4),
+                "max": round(max(walls), 4),
+                "runs": [round(wall, 4) for wall in walls],
+            },
+            "calls_total": sum(calls.values()),
+            "calls": calls,
+            "http": last["http"],
+            "spans": last["spans"],
+        }
+
+    def run(self, names):
+        results = {}
+        with self.transport.installed():
+            for name in names:
+                repeat = self.args.backfill_repeat if name == "backfill" else self.args.repeat
+                print(f"計測中: {name}（{repeat}回）...", flush=True)
+                results[name] = self.run_one(name, repeat)
+        return results
+
+
+def compare(report, baseline, tolerance):
+    """
+    レポートを以前のレポートと比較して結果を表示する
+
+    Returns:
+        list: 悪化した項目の説明（無ければ空）
+    """
+    regressions = []
+    print(f"\n=== 比較（基準: {baseline.get('git_commit') or '-'} {baseline.get('created_at', '')}）===")
+    for name, result in report["benchmarks"].items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if base is None:
+            print(f"  {name}: 基準に無し")
+            continue
+        calls, base_calls = result["calls_total"], base["calls_total"]
+        wall, base_wall = result["wall_s"]["median"], base["wall_s"]["median"]
+        ratio = wall / base_wall if base_wall > 0 else 1.0
+        print(f"  {name}: 呼び出し数 {base_calls} → {calls}, 所要時間(中央値) {base_wall:.3f}s → {wall:.3f}s ({ratio:.2f}x)")
+        if calls > base_calls:
+            regressions.append(f"{name}: API呼び出し数が増加 ({base_calls} → {calls})")
+        if ratio > 1 + tolerance:
+            regressions.append(f"{name}: 所要時間が {ratio:.2f} 倍（許容 {1 + tolerance:.2f} 倍）")
+    return regressions
+
+
+def print_results(results):
+    print("\n=== 結果 ===")
+    print(f"{'ベンチマーク':<18} {'中央値(s)':>10} {'最小(s)':>9} {'呼び出し数':>10}  内訳")
+    for name, result in results.items():
+        mark = "" if result["ok"] else "  ❌ 失敗"
+        detail = ", ".join(f"{host}={count}" for host, count in result["calls"].items())
+        print(f"{name:<18} {result['wall_s']['median']:>10.4f} {result['wall_s']['min']:>9.4f} "
+              f"{result['calls_total']:>10}  {detail}{mark}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='APIの代役を使って同期処理の所要時間とAPI呼び出し数を計測します')
+    parser.add_argument('--only', default=",".join(BENCHMARKS),
+                        help=f'実行するベンチマーク（カンマ区切り: {",".join(BENCHMARKS)}）')
+    parser.add_argument('--latency', default="",
+                        help='送信ごとの遅延（ミリ秒）。全ホスト共通なら "50"、ホスト別なら "notion=350,github=80,fit=120,jma=150"')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help=f'1日分のベンチマークの繰り返し回数（デフォルト: {DEFAULT_REPEAT}）')
+    parser.add_argument('--backfill-repeat', type=int, default=1, help='backfillの繰り返し回数（デフォルト: 1）')
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS, help=f'backfillの日数（デフォルト: {DEFAULT_DAYS}）')
+    parser.add_argument('--end-date', default=DEFAULT_END_DATE, help=f'対象期間の最終日（デフォルト: {DEFAULT_END_DATE}）')
+    parser.add_argument('-j', '--jobs', type=int, default=3, help='backfillのワーカー数（デフォルト: 3）')
+    parser.add_argument('--seed', type=int, default=0, help='代役データの乱数シード（デフォルト: 0）')
+    parser.add_argument('--notion-rate', type=float, default=0,
+                        help='Notionのレート制限（リクエスト/秒、デフォルト: 0 = 無効）')
+    parser.add_argument('--output', help='レポートの保存先（デフォルト: .cache/benchmark/report-<日時>.json）')
+    parser.add_argument('--compare', help='比較する以前のレポート')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f'所要時間の悪化とみなす割合（デフォルト: {DEFAULT_TOLERANCE}）')
+    parser.add_argument('--verbose', action='store_true', help='同期処理の出力をそのまま表示する')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown or not names:
+        print(f"エラー: 不明なベンチマーク: {', '.join(unknown) or '(なし)'}（指定可能: {', '.join(BENCHMARKS)}）")
+        return 1
+    if args.days < 1 or args.repeat < 1 or args.backfill_repeat < 1:
+        print("エラー: --days・--repeat・--backfill-repeat は1以上を指定してください")
+        return 1
+
+    env = dict(BENCH_ENV, NOTION_RATE_LIMIT=str(args.notion_rate))
+    os.environ.update(env)
+    os.environ.pop("METRICS_FILE", None)
+    os.environ.pop("NOTION_RATE_LIMIT_PATH", None)
+    # weather_notion・github_notion はインポート時に .env を読み込むため、先に読み込んでから上書きする
+    with quiet(args.verbose):
+        import weather_notion  # noqa: F401
+        import github_notion  # noqa: F401
+    os.environ.update(env)
+
+    runner = BenchmarkRunner(args)
+    results = runner.run(names)
+
+    report = {
+        "schema": REPORT_SCHEMA,
+        "created_at": datetime.now().astimezone().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "end_date": args.end_date,
+            "days": args.days,
+            "repeat": args.repeat,
+            "backfill_repeat": args.backfill_repeat,
+            "jobs": args.jobs,
+            "seed": args.seed,
+            "latency_ms": {host: round(seconds * 1000, 3) for host, seconds in runner.transport.latency.items()},
+            "notion_rate": args.notion_rate,
+        },
+        "benchmarks": results,
+    }
+
+    print_results(results)
+
+    output = args.output or os.path.join(
+        PROJECT_ROOT, ".cache", "benchmark", f"report-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nレポートを保存しました: {output}")
+
+    exit_code = 0 if all(result["ok"] for result in results.values()) else 1
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("\n悪化を検出しました:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            exit_code = 1
+        else:
+            print("\n悪化はありません")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Google Fitの同期をトリガーするPub/Subメッセージの一括発行
+
+日付ごとに gcloud pubsub topics publish を呼ぶ代わりに、google-cloud-pubsub の
+バッチ設定で期間内のすべての日付を1プロセスから発行する（発行結果はfutureで待つ）。
+メッセージごとにメッセージIDと発行にかかった時間を表示し、最後に件数と時間の集計を表示する。
+
+使い方:
+    python scripts/utils/publish_fit.py 2025-04-20               # 1日分
+    python scripts/utils/publish_fit.py 2025-01-01 2025-12-31    # 期間
+    python scripts/utils/publish_fit.py                          # 日付なし（前日分の処理をトリガー）
+    python scripts/utils/publish_fit.py 2025-04-01 2025-04-10 --emulator localhost:8085 --create-topic
+
+環境変数:
+    GCP_PROJECT: プロジェクトID（--project で上書き）
+    PUBSUB_EMULATOR_HOST: 設定されている場合はPub/Subエミュレーターに発行する（--emulator と同じ）
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent import futures
+from datetime import datetime, timedelta
+
+DEFAULT_TOPIC = "fit"
+# エミュレーターでプロジェクトIDが未設定の場合に使うID
+EMULATOR_PROJECT = "local-project"
+# 日付を指定しない場合のメッセージ（Cloud Functions側で前日分を処理する）
+TRIGGER_MESSAGE = "trigger"
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"日付はYYYY-MM-DD形式で指定してください: {value}")
+
+def build_messages(start_date, end_date):
+    """発行するメッセージ（日付の文字列）のリスト"""
+    if start_date is None:
+        return [TRIGGER_MESSAGE]
+    end_date = end_date or start_date
+    if end_date < start_date:
+        raise ValueError("開始日は終了日より前である必要があります")
+    return [(start_date + timedelta(days=i)).isoformat() for i in range((end_date - start_date).days + 1)]
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+def publish_messages(project, topic, messages, max_messages=100, max_latency=0.05, create_topic=False):
+    """
+    メッセージをバッチで発行し、すべての発行結果を待つ
+
+    Returns:
+        list: メッセージごとの (メッセージ, メッセージID または None, 発行にかかった秒数, 例外 または None)
+    """
+    from google.api_core.exceptions import AlreadyExists
+    from google.cloud import pubsub_v1
+
+    batch_settings = pubsub_v1.types.BatchSettings(
+        max_messages=max_messages,
+        max_bytes=1024 * 1024,
+        max_latency=max_latency,
+    )
+    publisher = pubsub_v1.PublisherClient(batch_settings=batch_settings)
+    topic_path = publisher.topic_path(project, topic)
+    if create_topic:
+        try:
+            publisher.create_topic(name=topic_path)
+            print(f"トピックを作成しました: {topic_path}")
+        except AlreadyExists:
+            pass
+
+    # コールバックでは完了時刻だけを記録し、結果と例外は待機後に future から読む
+    finished = {}
+
+    def on_done(index):
+        def callback(future):
+            finished[index] = time.perf_counter()
+        return callback
+
+    publish_futures = []
+    started_at = []
+    for index, message in enumerate(messages):
+        started_at.append(time.perf_counter())
+        future = publisher.publish(topic_path, message.encode("utf-8"))
+        future.add_done_callback(on_done(index))
+        publish_futures.append(future)
+
+    futures.wait(publish_futures, return_when=futures.ALL_COMPLETED)
+    waited_at = time.perf_counter()
+    results = []
+    for index, future in enumerate(publish_futures):
+        # コールバックがまだ呼ばれていない場合は待機が終わった時刻で代用する
+        elapsed = finished.get(index, waited_at) - started_at[index]
+        error = future.exception()
+        results.append((messages[index], None if error else future.result(), elapsed, error))
+    publisher.stop()
+    return results
+
+def print_report(results, total_seconds):
+    """メッセージごとのメッセージID・発行時間と、件数・時間の集計を表示する（失敗があればFalse）"""
+    failures = 0
+    for message, message_id, elapsed, error in results:
+        if error is not None:
+            failures += 1
+            print(f"  {message}: 失敗 ({elapsed * 1000:.0f}ms) {str(error)}")
+        else:
+            print(f"  {message}: message_id={message_id} ({elapsed * 1000:.0f}ms)")
+
+    latencies = sorted(elapsed for _, _, elapsed, _ in results)
+    print(
+        f"発行: {len(results) - failures}/{len(results)}件 合計 {total_seconds:.2f}秒 "
+        f"（発行時間 p50 {_percentile(latencies, 0.5) * 1000:.0f}ms / "
+        f"p95 {_percentile(latencies, 0.95) * 1000:.0f}ms / 最大 {latencies[-1] * 1000:.0f}ms）"
+    )
+    return failures == 0
+
+def main():
+    parser = argparse.ArgumentParser(description='Google Fitの同期をトリガーするPub/Subメッセージを一括発行します')
+    parser.add_argument('start_date', nargs='?', type=parse_date, help='開始日 YYYY-MM-DD形式（省略時は前日分の処理をトリガー）')
+    parser.add_argument('end_date', nargs='?', type=parse_date, help='終了日 YYYY-MM-DD形式（省略時は開始日のみ）')
+    parser.add_argument('--project', default=os.getenv("GCP_PROJECT"), help='プロジェクトID（デフォルト: 環境変数 GCP_PROJECT）')
+    parser.add_argument('--topic', default=DEFAULT_TOPIC, help=f'トピック名（デフォルト: {DEFAULT_TOPIC}）')
+    parser.add_argument('--emulator', help='Pub/Subエミュレーターのホスト（例: localhost:8085）')
+    parser.add_argument('--create-topic', action='store_true', help='トピックが無ければ作成する（エミュレーター用）')
+    parser.add_argument('--max-messages', type=int, default=100, help='1バッチの最大メッセージ数（デフォルト: 100）')
+    parser.add_argument('--max-latency', type=float, default=0.05, help='バッチを送信するまでの最大待ち時間（秒、デフォルト: 0.05）')
+    args = parser.parse_args()
+
+    if args.emulator:
+        os.environ["PUBSUB_EMULATOR_HOST"] = args.emulator
+    emulator_host = os.getenv("PUBSUB_EMULATOR_HOST")
+    project = args.project or (EMULATOR_PROJECT if emulator_host else None)
+    if not project:
+        print("エラー: プロジェクトIDがありません。GCP_PROJECT を設定するか --project を指定してください。")
+        sys.exit(1)
+
+    try:
+        messages = build_messages(args.start_date, args.end_date)
+    except ValueError as e:
+        print(f"エラー: {str(e)}")
+        sys.exit(1)
+
+    target = f"エミュレーター {emulator_host}" if emulator_host else f"プロジェクト {project}"
+    print(f"Pub/Subトピック {args.topic} に{len(messages)}件を発行します（{target}）")
+    started = time.perf_counter()
+    results = publish_messages(
+        project, args.topic, messages,
+        max_messages=args.max_messages, max_latency=args.max_latency, create_topic=args.create_topic
+    )
+    if not print_report(results, time.perf_counter() - started):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
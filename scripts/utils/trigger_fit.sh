@@ -11,67 +11,16 @@ set -a
 source "$PROJECT_ROOT/.env"
 set +a
 
-# 引数チェック
-if [ $# -eq 1 ]; then
-    # 1つの引数の場合：単一の日付を処理
-    TARGET_DATE=$1
-    echo "対象日付: ${TARGET_DATE}"
-    
-    # 日付を指定してPub/Subメッセージを発行
-    echo "Pub/Subトピックを発行: ${TARGET_DATE}"
-    gcloud pubsub topics publish fit \
-        --message="${TARGET_DATE}" \
-        --project=${GCP_PROJECT}
-    
-elif [ $# -eq 2 ]; then
-    # 2つの引数の場合：日付範囲を処理
-    START_DATE=$1
-    END_DATE=$2
-    echo "日付範囲: ${START_DATE} から ${END_DATE}"
-    
-    # 日付をループで処理
-    current_date="$START_DATE"
-    # 日付を数値に変換して比較
-    while true; do
-        echo "処理中: ${current_date}"
-        
-        # 各日付に対してPub/Subメッセージを発行
-        gcloud pubsub topics publish fit \
-            --message="${current_date}" \
-            --project=${GCP_PROJECT}
-        
-        # 終了日に達したら終了
-        if [ "$current_date" = "$END_DATE" ]; then
-            break
-        fi
-        
-        # 次の日付に進む（macOSとLinux両方に対応）
-        if [[ "$OSTYPE" == "darwin"* ]]; then
-            # macOS
-            current_date=$(date -j -v+1d -f "%Y-%m-%d" "$current_date" +"%Y-%m-%d")
-        else
-            # Linux
-            current_date=$(date -d "$current_date + 1 day" +"%Y-%m-%d")
-        fi
-        
-        # 日付が終了日を超えたらループを終了（安全対策）
-        current_num=$(echo "$current_date" | tr -d '-')
-        end_num=$(echo "$END_DATE" | tr -d '-')
-        if [ "$current_num" -gt "$end_num" ]; then
-            echo "警告: 終了日を超えました。処理を終了します。"
-            break
-        fi
-        
-        # API制限を避けるため少し待機
-        sleep 2
-    done
-    
-else
-    # 引数がない場合は通常の自動処理をトリガー
-    echo "Pub/Subトピックを発行して処理をトリガー"
-    gcloud pubsub topics publish fit \
-        --message="trigger" \
-        --project=${GCP_PROJECT}
+# Pub/Subメッセージを発行（日付範囲も1プロセスでまとめて発行し、メッセージIDと発行時間を表示）
+#   引数1つ: 単一の日付、引数2つ: 日付範囲、引数なし: 通常の自動処理をトリガー
+if [ $# -gt 2 ]; then
+    echo "使い方: $0 [開始日 [終了日]]（YYYY-MM-DD形式）"
+    exit 1
+fi
+echo "Pub/Subトピックを発行: ${*:-trigger}"
+if ! python3 "$SCRIPT_DIR/publish_fit.py" "$@" --project="${GCP_PROJECT}"; then
+    echo "エラー: Pub/Subメッセージの発行に失敗しました"
+    exit 1
 fi
 
 # ログを表示（最新の50件、レベルをINFOに設定）
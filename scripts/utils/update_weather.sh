@@ -18,6 +18,10 @@ usage() {
     echo "オプション:"
     echo "  --no-notion - Notionに保存せず、表示のみ"
     echo "  --sleep N   - リクエスト間の待機秒数（デフォルト: 2.0秒）"
+    echo "  --monthly   - 日別値ページから1か月1リクエストで取得（気圧は時間別値ページから日ごとに取得）"
+    echo "  --no-pressure-spans - --monthly の場合に気圧を取得・更新しない"
+    echo "  --replay-only - 気象庁に接続せず、アーカイブ済みのページだけから作り直す"
+    echo "  --stations A,B - 取得する地点名（weather_stations.json に登録済みの地点、省略時はすべて）"
     echo "  --help      - このヘルプを表示"
     echo ""
     echo "例:"
@@ -26,6 +30,7 @@ usage() {
     echo "  $(basename $0) 2023-11-01 2023-11-05 # 指定期間の天気データを更新"
     echo "  $(basename $0) --no-notion          # Notionに保存せず、表示のみ"
     echo "  $(basename $0) 2023-11-01 --sleep 3 # スクレイピング間隔を3秒に設定"
+    echo "  $(basename $0) 2024-01-01 2024-12-31 --monthly # 1年分を月単位で取得"
     exit 1
 }
 
@@ -34,6 +39,10 @@ START_DATE=""
 END_DATE=""
 NO_NOTION=""
 SLEEP_VALUE="2.0"
+MONTHLY=""
+PRESSURE_SPANS=""
+REPLAY_ONLY=""
+STATIONS=""
 
 while [[ $# -gt 0 ]]; do
     case $1 in
@@ -44,6 +53,27 @@ while [[ $# -gt 0 ]]; do
             NO_NOTION="--no-notion"
             shift
             ;;
+        --monthly)
+            MONTHLY="--monthly"
+            shift
+            ;;
+        --no-pressure-spans)
+            PRESSURE_SPANS="--no-pressure-spans"
+            shift
+            ;;
+        --replay-only)
+            REPLAY_ONLY="--replay-only"
+            shift
+            ;;
+        --stations)
+            if [[ $# -gt 1 ]]; then
+                STATIONS="$2"
+                shift 2
+            else
+                echo "エラー: --stations オプションには値が必要です"
+                usage
+            fi
+            ;;
         --sleep)
             if [[ $# -gt 1 ]]; then
                 SLEEP_VALUE="$2"
@@ -83,6 +113,18 @@ if [[ -n "$NO_NOTION" ]]; then
     COMMAND="${COMMAND} ${NO_NOTION}"
 fi
 
+if [[ -n "$MONTHLY" ]]; then
+    COMMAND="${COMMAND} ${MONTHLY} ${PRESSURE_SPANS}"
+fi
+
+if [[ -n "$REPLAY_ONLY" ]]; then
+    COMMAND="${COMMAND} ${REPLAY_ONLY}"
+fi
+
+if [[ -n "$STATIONS" ]]; then
+    COMMAND="${COMMAND} --stations \"${STATIONS}\""
+fi
+
 COMMAND="${COMMAND} --sleep ${SLEEP_VALUE}"
 
 # コマンドの実行
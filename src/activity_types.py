@@ -3,6 +3,8 @@ Google Fit アクティビティタイプの日本語マッピング
 Activity Types from Google Fit API with Japanese translations
 """
 
+from types import MappingProxyType
+
 # Google Fit Activity Types mapping
 # https://developers.google.com/fit/rest/v1/reference/activity-types
 ACTIVITY_TYPES = {
@@ -142,6 +144,19 @@ ACTIVITY_TYPES = {
 }
 
 
+# インポート時に作る読み取り専用の索引（ID→日本語名、ID→英語名、英語名→ID）
+ACTIVITY_NAMES_JA = MappingProxyType({type_id: names["ja"] for type_id, names in ACTIVITY_TYPES.items()})
+ACTIVITY_NAMES_EN = MappingProxyType({type_id: names["en"] for type_id, names in ACTIVITY_TYPES.items()})
+# 同じ英語名のIDが複数ある場合（睡眠の段階 103/109 など）は先に定義されたID
+_ids_by_en = {}
+for _type_id, _names in ACTIVITY_TYPES.items():
+    _ids_by_en.setdefault(_names["en"], _type_id)
+ACTIVITY_IDS_BY_EN = MappingProxyType(_ids_by_en)
+del _ids_by_en, _type_id, _names
+
+_NAMES_BY_LANG = {"ja": ACTIVITY_NAMES_JA, "en": ACTIVITY_NAMES_EN}
+
+
 def get_activity_name(activity_type: int, lang: str = "ja") -> str:
     """
     アクティビティタイプIDから名前を取得
@@ -154,11 +169,19 @@ def get_activity_name(activity_type: int, lang: str = "ja") -> str:
         Activity name in specified language
     """
     if activity_type in ACTIVITY_TYPES:
-        return ACTIVITY_TYPES[activity_type].get(lang, f"Activity Type {activity_type}")
+        names = _NAMES_BY_LANG.get(lang)
+        return names[activity_type] if names is not None else f"Activity Type {activity_type}"
     else:
         return f"その他 (Type {activity_type})" if lang == "ja" else f"Other (Type {activity_type})"
 
 
+def canonical_activity_id(activity_type: int) -> int:
+    """英語名が同じIDを1つにまとめたID（集計のキーに使う。未定義のIDはそのまま）"""
+    if activity_type in ACTIVITY_NAMES_EN:
+        return ACTIVITY_IDS_BY_EN[ACTIVITY_NAMES_EN[activity_type]]
+    return activity_type
+
+
 def get_japanese_name(activity_type: int) -> str:
     """アクティビティタイプIDから日本語名を取得"""
     return get_activity_name(activity_type, "ja")
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Google Fit・天気・GitHubのデータを期間指定でまとめてNotionに同期するスクリプト
+（batch_process.sh のPython版。1つのプロセス内でワーカープール・HTTPセッション・Notion索引を共有する）
+
+使い方:
+    python src/backfill.py 2025-04-01 2025-04-30
+    python -m src.backfill 2025-04-01 2025-04-30 --sources fit,weather -j 4
+    python src/backfill.py 2025-04-01 2025-04-30 --sources github
+
+処理の流れ:
+    1. 期間全体のNotionページを1回の走査で索引化（全ソースで共有）
+    2. Google Fit・GitHubは期間全体をまとめて取得（ソースごとに並列）
+    3. 日付ごとのタスクをワーカープールで並列実行（同じ日付内は Fit → 天気 → GitHub の順に書き込み、
+       ページの新規作成が重複しないようにする）
+    4. 日付・ソースごとの結果と、スループット（日/秒、ソースごとのAPI呼び出し数）を表示
+"""
+
+import os
+import sys
+import time
+import argparse
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (SRC_DIR, os.path.join(SRC_DIR, "weather"), os.path.join(SRC_DIR, "github")):
+    if path not in sys.path:
+        sys.path.append(path)
+
+from instrumentation import finish_run, get_call_counts, label as call_label, start_run
+from notion_index import NotionDateIndex
+from rate_limit import TokenBucket
+from watermark import get_watermark_store
+
+SOURCES = ("fit", "weather", "github")
+DEFAULT_WORKERS = 3
+# 気象庁サイトへのリクエスト間隔（秒、スクレイピングのマナー。update_weather.py と同じ既定値）
+DEFAULT_WEATHER_SLEEP = 2.0
+
+STATUS_OK = "ok"
+STATUS_SKIPPED = "skipped"
+STATUS_ERROR = "error"
+_STATUS_MARKS = {STATUS_OK: "✅", STATUS_SKIPPED: "➖", STATUS_ERROR: "❌"}
+
+
+def load_env_file():
+    """
+    .envファイルから環境変数を読み込む（python-dotenvの代替）
+    """
+    env_path = os.path.join(os.path.dirname(SRC_DIR), '.env')
+    if os.path.exists(env_path):
+        with open(env_path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#') and '=' in line:
+                    key, value = line.split('=', 1)
+                    os.environ[key.strip()] = value.strip()
+
+
+def date_range(start_date, end_date):
+    """start_date〜end_date（両端含む）の日付リストを返す"""
+    dates = []
+    current = start_date
+    while current <= end_date:
+        dates.append(current)
+        current += timedelta(days=1)
+    return dates
+
+
+class Backfill:
+    """期間内の各日付・各ソースの同期を1つのプロセスで実行する"""
+
+    def __init__(self, dates, sources, workers=DEFAULT_WORKERS, weather_sleep=DEFAULT_WEATHER_SLEEP):
+        self.dates = dates
+        self.sources = [source for source in SOURCES if source in sources]
+        self.workers = max(1, workers)
+        self.weather_sleep = weather_sleep
+        self.results = {}   # {(date, source): (status, message)}
+        self.page_index = None
+        self.fit_data = {}
+        self.github_sync = None
+        self.github_activity = {}
+        self.watermarks = None
+        self.jma_bucket = None
+        self.elapsed = 0.0
+
+    def _set_result(self, date, source, status, message=""):
+        self.results[(date, source)] = (status, message)
+
+    def _fail_source(self, source, message):
+        """ソースの準備に失敗した場合、全日付をエラーにして以降の処理から外す"""
+        print(f"エラー: {source} の準備に失敗しました: {message}")
+        for date in self.dates:
+            self._set_result(date, source, STATUS_ERROR, message)
+        self.sources.remove(source)
+
+    # 準備（期間一括の取得）
+
+    def prepare(self):
+        """Notion索引の読み込みと、期間一括で取得できるソースの先読み"""
+        database_id = os.getenv("DATABASE_ID")
+        self.page_index = NotionDateIndex(database_id).load(self.dates[0], self.dates[-1])
+        # 天気・GitHubで同じウォーターマークのファイルに書き込むため、1つのストアを共有する
+        self.watermarks = get_watermark_store("local")
+
+        prefetchers = []
+        if "fit" in self.sources:
+            prefetchers.append(("fit", self._prefetch_fit))
+        if "github" in self.sources:
+            prefetchers.append(("github", self._prefetch_github))
+        if "weather" in self.sources:
+            self._prepare_weather()
+
+        if not prefetchers:
+            return
+
+        def run(item):
+            source, prefetch = item
+            with call_label(source):
+                try:
+                    prefetch()
+                    return source, None
+                except (Exception, SystemExit) as e:  # GitHubNotionSyncは設定不備で SystemExit を送出する
+                    traceback.print_exc()
+                    return source, str(e) or e.__class__.__name__
+
+        with ThreadPoolExecutor(max_workers=len(prefetchers)) as executor:
+            for source, error in executor.map(run, prefetchers):
+                if error is not None:
+                    self._fail_source(source, error)
+
+    def _prefetch_fit(self):
+        from main import get_credentials
+        from util import get_google_fit_data_range
+
+        credentials = get_credentials()
+        if not credentials:
+            raise ValueError("認証情報が取得できません。scripts/utils/auth.pyを実行してください。")
+        print(f"Google Fitデータを一括取得中: {self.dates[0]} - {self.dates[-1]}")
+        self.fit_data = get_google_fit_data_range(credentials, self.dates[0], self.dates[-1])
+
+    def _prefetch_github(self):
+        from github_notion import GitHubNotionSync
+
+        self.github_sync = GitHubNotionSync()
+        self.github_sync.page_index = self.page_index
+        self.github_sync.watermarks = self.watermarks
+        activity = self.github_sync.collect_range(self.dates)
+        if activity is None:
+            raise RuntimeError("GitHub活動データの一括取得に失敗しました")
+        self.github_activity = activity
+
+    def _prepare_weather(self):
+        # 日付を並列に処理しても、気象庁へのリクエストは weather_sleep 秒に1回に抑える
+        if self.weather_sleep > 0:
+            self.jma_bucket = TokenBucket(1.0 / self.weather_sleep, 1)
+
+    # 日付ごとの書き込み
+
+    def _sync_fit(self, date):
+        from main import process_data_for_date
+
+        result = process_data_for_date(date, self.fit_data[date], self.page_index)
+        if result.get("status") != "success":
+            return STATUS_ERROR, result.get("message", "")
+        if result.get("details", {}).get("skipped"):
+            return STATUS_SKIPPED, "unchanged"
+        return STATUS_OK, ""
+
+    def _sync_weather(self, date):
+        from jma_archive import KIND_HOURLY
+        from stations import load_stations
+        from update_weather import save_weather_data
+        from weather_notion import requires_request
+
+        # アーカイブ済みの日付は気象庁にリクエストしないため待機しない
+        stations = load_stations()
+        if self.jma_bucket is not None and requires_request(KIND_HOURLY, date.year, date.month, date.day, stations):
+            self.jma_bucket.acquire()
+        if save_weather_data(date, True, self.page_index, self.watermarks):
+            return STATUS_OK, ""
+        return STATUS_ERROR, "天気データの取得または保存に失敗しました"
+
+    def _sync_github(self, date):
+        if self.github_sync.write_date(date, *self.github_activity[date]):
+            return STATUS_OK, ""
+        return STATUS_ERROR, "Notionへの書き込みに失敗しました"
+
+    def sync_day(self, date):
+        """1日分をソースの順（Fit → 天気 → GitHub）に同期する"""
+        handlers = {"fit": self._sync_fit, "weather": self._sync_weather, "github": self._sync_github}
+        for source in self.sources:
+            with call_label(source):
+                try:
+                    status, message = handlers[source](date)
+                except Exception as e:
+                    traceback.print_exc()
+                    status, message = STATUS_ERROR, str(e)
+            self._set_result(date, source, status, message)
+
+    def run(self):
+        """
+        期間内の全日付を同期する
+
+        Returns:
+            bool: すべて成功（またはスキップ）した場合はTrue
+        """
+        started = time.monotonic()
+        start_run("backfill", start_date=str(self.dates[0]), end_date=str(self.dates[-1]),
+                  sources=",".join(self.sources), workers=self.workers)
+        with call_label("notion-index"):
+            self.prepare()
+
+        if self.sources:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(self.dates))) as executor:
+                list(executor.map(self.sync_day, self.dates))
+
+        self.elapsed = time.monotonic() - started
+        self.print_report()
+        success = all(status != STATUS_ERROR for status, _ in self.results.values())
+        finish_run(success=success, days=len(self.dates))
+        return success
+
+    # 結果表示
+
+    def print_report(self):
+        sources = [source for source in SOURCES if any(key[1] == source for key in self.results)]
+
+        print("\n=== 日付・ソースごとの結果 ===")
+        print("日付        " + "  ".join(f"{source:<8}" for source in sources))
+        for date in self.dates:
+            cells = []
+            for source in sources:
+                status, _ = self.results.get((date, source), (STATUS_SKIPPED, ""))
+                cells.append(f"{_STATUS_MARKS[status]} {status:<6}")
+            print(f"{date}  " + "  ".join(cells))
+
+        errors = [(key, message) for key, (status, message) in sorted(self.results.items()) if status == STATUS_ERROR]
+        if errors:
+            print("\nエラー:")
+            for (date, source), message in errors:
+                print(f"  {date} {source}: {message}")
+
+        print("\n=== スループット ===")
+        days_per_second = len(self.dates) / self.elapsed if self.elapsed > 0 else 0.0
+        print(f"  {len(self.dates)}日 / {self.elapsed:.1f}秒 ({days_per_second:.2f}日/秒, ワーカー数: {self.workers})")
+        for source in sources:
+            counts = self.results_by_status(source)
+            print(f"  {source}: 成功 {counts[STATUS_OK]}, スキップ {counts[STATUS_SKIPPED]}, エラー {counts[STATUS_ERROR]}")
+
+        print("  API呼び出し数:")
+        calls_by_label = {}
+        for (label, host), count in get_call_counts().items():
+            calls_by_label.setdefault(label or "other", {})[host] = count
+        for label in sorted(calls_by_label):
+            hosts = calls_by_label[label]
+            detail = ", ".join(f"{host}={count}" for host, count in sorted(hosts.items()))
+            print(f"    {label}: {sum(hosts.values())} ({detail})")
+
+    def results_by_status(self, source):
+        counts = {STATUS_OK: 0, STATUS_SKIPPED: 0, STATUS_ERROR: 0}
+        for (_, result_source), (status, _) in self.results.items():
+            if result_source == source:
+                counts[status] += 1
+        return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Google Fit・天気・GitHubのデータを期間指定でNotionに同期します')
+    parser.add_argument('start_date', help='開始日 YYYY-MM-DD形式')
+    parser.add_argument('end_date', help='終了日 YYYY-MM-DD形式')
+    parser.add_argument('--sources', default=",".join(SOURCES),
+                        help='同期するデータ（カンマ区切り: fit,weather,github、デフォルト: すべて）')
+    parser.add_argument('-j', '--jobs', type=int, default=DEFAULT_WORKERS,
+                        help=f'並列に処理する日数（デフォルト: {DEFAULT_WORKERS}）')
+    parser.add_argument('--weather-sleep', type=float, default=DEFAULT_WEATHER_SLEEP,
+                        help=f'気象庁へのリクエスト間隔（秒、デフォルト: {DEFAULT_WEATHER_SLEEP}）')
+    args = parser.parse_args()
+
+    try:
+        start_date = datetime.strptime(args.start_date, "%Y-%m-%d").date()
+        end_date = datetime.strptime(args.end_date, "%Y-%m-%d").date()
+    except ValueError:
+        print("エラー: 日付はYYYY-MM-DD形式で指定してください")
+        return 1
+    if end_date < start_date:
+        print("エラー: 開始日は終了日より前である必要があります")
+        return 1
+
+    sources = [source.strip() for source in args.sources.split(",") if source.strip()]
+    unknown = [source for source in sources if source not in SOURCES]
+    if unknown or not sources:
+        print(f"エラー: 不明なデータソース: {', '.join(unknown) or '(なし)'}（指定可能: {', '.join(SOURCES)}）")
+        return 1
+
+    load_env_file()
+    if not os.getenv("NOTION_SECRET") or not os.getenv("DATABASE_ID"):
+        print("エラー: 環境変数 NOTION_SECRET または DATABASE_ID が設定されていません。")
+        return 1
+
+    dates = date_range(start_date, end_date)
+    print(f"日付範囲 {start_date} から {end_date} まで（{len(dates)}日）を同期します: {', '.join(sources)}")
+
+    backfill = Backfill(dates, sources, args.jobs, args.weather_sleep)
+    return 0 if backfill.run() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
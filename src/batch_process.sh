@@ -32,6 +32,7 @@ function show_usage {
   echo "  $0 --fit-only 2023-10-01 2023-10-31    # バイタルデータのみ更新"
   echo "  $0 --weather-only 2023-10-01 2023-10-31 # 天候データのみ更新"
   echo "  $0 --github-only 2023-10-01 2023-10-31  # GitHub活動データのみ更新"
+  echo "Python版: python src/backfill.py 開始日 終了日 [--sources fit,weather,github] [-j N]"
   exit 1
 }
 
@@ -158,6 +159,15 @@ if [ "$PROCESS_FIT" = false ] && [ "$PROCESS_WEATHER" = false ] && [ "$PROCESS_G
   exit 1
 fi
 
+# 並列実行時は各プロセスのNotionへのリクエストをSQLiteのトークンバケットで共有して制限する
+# （インテグレーションあたり約3リクエスト/秒。NOTION_RATE_LIMIT_PATHが設定済みならそれを使う）
+if [ "$PARALLEL" -gt 1 ] && [ -z "$NOTION_RATE_LIMIT_PATH" ]; then
+  export NOTION_RATE_LIMIT_PATH="$PROJECT_ROOT/.cache/notion_rate_limit.sqlite3"
+fi
+if [ -n "$NOTION_RATE_LIMIT_PATH" ]; then
+  echo "Notionレート制限: プロセス間で共有 ($NOTION_RATE_LIMIT_PATH)"
+fi
+
 echo "処理を開始します..."
 echo
 
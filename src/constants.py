@@ -21,6 +21,18 @@ DATA_TYPES = {
     "body_fat": "com.google.body.fat.percentage",  # 体脂肪率
 }
 
+# Google Fit Raw Data Sources（データ型ごとの統合済みストリーム。生のデータ点の取得に使う）
+RAW_DATA_SOURCES = {
+    "distance": "derived:com.google.distance.delta:com.google.android.gms:merge_distance_delta",
+    "steps": "derived:com.google.step_count.delta:com.google.android.gms:estimated_steps",
+    "calories": "derived:com.google.calories.expended:com.google.android.gms:merge_calories_expended",
+    "active_minutes": "derived:com.google.heart_minutes:com.google.android.gms:merge_heart_minutes",
+    "heart_rate": "derived:com.google.heart_rate.bpm:com.google.android.gms:merge_heart_rate_bpm",
+    "oxygen": "derived:com.google.oxygen_saturation:com.google.android.gms:merged",
+    "weight": "derived:com.google.weight:com.google.android.gms:merge_weight",
+    "body_fat": "derived:com.google.body.fat.percentage:com.google.android.gms:merged",
+}
+
 # Activity Types
 ACTIVITY_TYPES = {
     "sleep": 72,  # SLEEP activity type
@@ -30,3 +42,17 @@ ACTIVITY_TYPES = {
     "cycling": 1,  # BIKING activity type
     "strength_training": 80,  # STRENGTH_TRAINING activity type
 }
+
+# Session App Priority（時間帯の重なるセッションのうち集計に使うアプリの優先度。アプリ名の部分一致、大きいほど優先）
+SESSION_APP_PRIORITY = (
+    ("AutoSleep", 2),  # 睡眠: AutoSleep > Apple Watch > その他
+    ("Strava", 2),  # ワークアウト: Strava > Nike Run Club > その他
+    ("Apple Watch", 1),
+    ("Nike Run Club", 1),
+)
+# 優先度1の段は従来の実装に無かった変更点: 従来はAutoSleep / Strava以外を返された順に先着で採用していたため、
+# 重なったセッションのどちらを集計するかがAPIの返す順序で変わっていた。現在はApple Watch / Nike Run Clubを
+# その他のアプリより常に優先し、同じ優先度では開始時刻の早い順に採用する（順序に依存しない）。
+# 従来のループとの一致は scripts/benchmark/bench_session_dedup.py で確認できる。
+# この優先度以上のアプリのセッションは、他のセッションと重なっていても常に集計する
+SESSION_PRIORITY_ALWAYS_KEEP = 2
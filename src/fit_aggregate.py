@@ -0,0 +1,280 @@
+"""
+Google Fitの任意のバケット幅（1時間・1日・1週間）での集計
+
+dataset.aggregate を指定したバケット幅で呼び出し、結果を列形式（バケットの開始時刻の配列と、
+データ型ごとの値の配列）で返す。各バケットのデータ点は取得時に1回だけ走査するため、
+時間ごとの歩数・心拍数のプロファイルや週・月単位の集計を作るときに
+bucket['dataset'][i]['point'] を項目ごとに辿り直す必要がない。
+
+    result = aggregate_fit_data(credentials, date(2025, 6, 1), date(2025, 6, 30), bucket="hour")
+    result.columns["steps"]       # 720時間分の歩数（numpy配列）
+    monthly = rollup(aggregate_fit_data(credentials, start, end, bucket="day"), "month")
+
+使い方:
+    python fit_aggregate.py 2025-06-01 2025-06-07 --bucket hour
+    python fit_aggregate.py 2025-01-01 2025-06-30 --bucket day --rollup month
+"""
+
+import argparse
+import json
+import sys
+from collections import namedtuple
+from datetime import date as date_type, datetime, time as dt_time, timedelta
+
+import numpy as np
+
+from constants import DATA_TYPES
+from instrumentation import record_http, span
+from util import DAY_MILLIS, FIT_API_HOST, _local_millis, get_fitness_service
+
+HOUR_MILLIS = 60 * 60 * 1000
+WEEK_MILLIS = 7 * DAY_MILLIS
+# バケット幅（週は月曜始まり）
+BUCKET_MILLIS = {"hour": HOUR_MILLIS, "day": DAY_MILLIS, "week": WEEK_MILLIS}
+# 1回のAPI呼び出しで扱う日数（バケット数と応答の大きさを抑える。週はバケット幅の倍数）
+CHUNK_DAYS = {"hour": 7, "day": 30, "week": 84}
+# rollup() でまとめられる期間
+ROLLUP_PERIODS = ("week", "month")
+
+# 列の定義: (列名, データ型のキー, 値の位置, バケット内の集約方法)
+#   sum: 合計（データ点が無ければ0）、mean / max / min / last: 平均・最大・最小・最後の値（無ければNaN）
+# 心拍数の集計値（com.google.heart_rate.summary）は値が [平均, 最大, 最小] の順に入る
+FIT_COLUMNS = (
+    ("distance_km", "distance", 0, "sum"),
+    ("steps", "steps", 0, "sum"),
+    ("calories", "calories", 0, "sum"),
+    ("heart_points", "active_minutes", 0, "sum"),
+    ("heart_rate_avg", "heart_rate", 0, "mean"),
+    ("heart_rate_max", "heart_rate", 1, "max"),
+    ("heart_rate_min", "heart_rate", 2, "min"),
+    ("oxygen_avg", "oxygen", 0, "mean"),
+    ("weight", "weight", 0, "last"),
+    ("body_fat", "body_fat", 0, "last"),
+)
+COLUMN_SCALE = {"distance_km": 1 / 1000}
+
+# 列形式の集計結果
+#   bucket: "hour" / "day" / "week"（rollup後は "week" / "month"）
+#   start_millis: バケットの開始時刻（UNIXミリ秒）のint64配列
+#   columns: {列名: float配列}
+FitColumns = namedtuple("FitColumns", ["bucket", "start_millis", "columns"])
+
+
+def _point_value(point, position):
+    """データ点の position 番目の値（無ければ先頭の値）"""
+    values = point.get("value", [])
+    if not values:
+        return None
+    value = values[position] if position < len(values) else values[0]
+    if "fpVal" in value:
+        return value["fpVal"]
+    return value.get("intVal")
+
+
+def _bucket_range(start_date, end_date, bucket):
+    """バケットの境界にそろえた期間（週は月曜〜日曜にそろえる）"""
+    if bucket == "week":
+        start_date -= timedelta(days=start_date.weekday())
+        end_date += timedelta(days=6 - end_date.weekday())
+    return start_date, end_date
+
+
+def _request_body(data_type_keys, start_millis, end_millis, duration_millis):
+    return {
+        "aggregateBy": [{"dataTypeName": DATA_TYPES[key]} for key in data_type_keys],
+        "bucketByTime": {"durationMillis": duration_millis},
+        "startTimeMillis": start_millis,
+        "endTimeMillis": end_millis,
+    }
+
+
+def _fill_columns(columns, buckets, first_millis, duration_millis, data_type_keys, specs):
+    """APIのバケットの各データ点を1回だけ走査し、バケットの開始時刻に対応する行に書き込む"""
+    dataset_index = {key: index for index, key in enumerate(data_type_keys)}
+    size = len(next(iter(columns.values())))
+    for bucket in buckets:
+        row = (int(bucket["startTimeMillis"]) - first_millis) // duration_millis
+        if not 0 <= row < size:
+            continue
+        datasets = bucket.get("dataset", [])
+        for key, index in dataset_index.items():
+            points = datasets[index].get("point", []) if index < len(datasets) else []
+            # 同じデータ型の列が使う値の位置ごとに、データ点を1回の走査で集める
+            values_by_position = {position: [] for _, position, _ in specs[key]}
+            for point in points:
+                for position, values in values_by_position.items():
+                    value = _point_value(point, position)
+                    if value is not None:
+                        values.append(value)
+
+            for name, position, how in specs[key]:
+                values = values_by_position[position]
+                if how == "sum":
+                    columns[name][row] = sum(values)
+                elif not values:
+                    continue
+                elif how == "mean":
+                    columns[name][row] = sum(values) / len(values)
+                elif how == "max":
+                    columns[name][row] = max(values)
+                elif how == "min":
+                    columns[name][row] = min(values)
+                else:
+                    columns[name][row] = values[-1]
+
+
+def aggregate_fit_data(credentials, start_date, end_date, bucket="day", metrics=None):
+    """
+    Google Fitのデータを指定した幅のバケットで集計し、列形式で返す
+
+    Args:
+        credentials: Google認証情報
+        start_date: 開始日（datetime.date）
+        end_date: 終了日（datetime.date、開始日を含む）
+        bucket: "hour" / "day" / "week"（週は月曜〜日曜にそろえる）
+        metrics: 取得する列名のリスト（省略時は FIT_COLUMNS のすべて）
+
+    Returns:
+        FitColumns: 期間内のすべてのバケットの行（データの無い行は sum の列が0、それ以外はNaN）
+    """
+    if bucket not in BUCKET_MILLIS:
+        raise ValueError(f"バケット幅は {', '.join(BUCKET_MILLIS)} のいずれかを指定してください: {bucket}")
+    if end_date < start_date:
+        raise ValueError("開始日は終了日より前である必要があります")
+
+    selected = [spec for spec in FIT_COLUMNS if metrics is None or spec[0] in metrics]
+    unknown = set(metrics or ()) - {spec[0] for spec in FIT_COLUMNS}
+    if unknown:
+        raise ValueError(f"不明な列名です: {', '.join(sorted(unknown))}")
+
+    # データ型ごとに必要な列（同じデータ型の複数の列はデータ点の1回の走査で埋める）
+    specs = {}
+    for name, key, position, how in selected:
+        specs.setdefault(key, []).append((name, position, how))
+    data_type_keys = list(specs)
+
+    start_date, end_date = _bucket_range(start_date, end_date, bucket)
+    duration_millis = BUCKET_MILLIS[bucket]
+    first_millis = _local_millis(datetime.combine(start_date, dt_time.min))
+    end_millis = _local_millis(datetime.combine(end_date + timedelta(days=1), dt_time.min))
+    rows = (end_millis - first_millis) // duration_millis
+    start_millis = first_millis + np.arange(rows, dtype=np.int64) * duration_millis
+    columns = {
+        name: np.zeros(rows) if how == "sum" else np.full(rows, np.nan)
+        for name, _, _, how in selected
+    }
+
+    fitness_service = get_fitness_service(credentials)
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(end_date, chunk_start + timedelta(days=CHUNK_DAYS[bucket] - 1))
+        body = _request_body(
+            data_type_keys,
+            _local_millis(datetime.combine(chunk_start, dt_time.min)),
+            _local_millis(datetime.combine(chunk_end + timedelta(days=1), dt_time.min)),
+            duration_millis
+        )
+        with span("fit.fetch"):
+            dataset = fitness_service.users().dataset().aggregate(userId="me", body=body).execute()
+        record_http(FIT_API_HOST, len(json.dumps(dataset)))
+        with span("fit.transform"):
+            _fill_columns(columns, dataset.get("bucket", []), first_millis, duration_millis, data_type_keys, specs)
+        chunk_start = chunk_end + timedelta(days=1)
+
+    for name, scale in COLUMN_SCALE.items():
+        if name in columns:
+            columns[name] = columns[name] * scale
+    return FitColumns(bucket, start_millis, columns)
+
+
+def bucket_starts(result):
+    """バケットの開始時刻（ローカル時刻のdatetime）のリスト"""
+    return [datetime.fromtimestamp(millis / 1000) for millis in result.start_millis.tolist()]
+
+
+def _period_key(start, period):
+    if period == "week":
+        return start.date() - timedelta(days=start.weekday())
+    return date_type(start.year, start.month, 1)
+
+
+def _rollup_column(values, boundaries, how):
+    """連続するバケットのまとまり（boundaries はまとまりの先頭の行）ごとに列を集約する"""
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+    if how == "sum":
+        return np.add.reduceat(filled, boundaries)
+
+    counts = np.add.reduceat(present.astype(np.int64), boundaries)
+    if how == "mean":
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rolled = np.add.reduceat(filled, boundaries) / counts
+    elif how == "max":
+        rolled = np.fmax.reduceat(values, boundaries)
+    elif how == "min":
+        rolled = np.fmin.reduceat(values, boundaries)
+    else:
+        # まとまりの中で最後に値のある行
+        last_rows = np.maximum.reduceat(np.where(present, np.arange(len(values)), -1), boundaries)
+        rolled = values[np.maximum(last_rows, 0)]
+    return np.where(counts > 0, rolled, np.nan)
+
+
+def rollup(result, period):
+    """
+    1時間・1日単位の集計結果を週（月曜始まり）・月単位にまとめる
+
+    合計の列は合計、平均の列はバケットの平均の平均（値の無いバケットを除く）、
+    最大・最小の列は最大・最小、最後の値の列は期間内で最後の値になる。
+    """
+    if period not in ROLLUP_PERIODS:
+        raise ValueError(f"期間は {', '.join(ROLLUP_PERIODS)} のいずれかを指定してください: {period}")
+
+    keys = [_period_key(start, period) for start in bucket_starts(result)]
+    # バケットは時刻順のため、同じ期間の行は連続している
+    boundaries = np.array([row for row, key in enumerate(keys) if row == 0 or key != keys[row - 1]], dtype=np.int64)
+    how_by_name = {name: how for name, _, _, how in FIT_COLUMNS}
+    columns = {
+        name: _rollup_column(values, boundaries, how_by_name[name])
+        for name, values in result.columns.items()
+    }
+    start_millis = np.array(
+        [_local_millis(datetime.combine(keys[row], dt_time.min)) for row in boundaries.tolist()], dtype=np.int64
+    )
+    return FitColumns(period, start_millis, columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Google Fitのデータを指定した幅のバケットで集計して表示します')
+    parser.add_argument('start_date', help='開始日 YYYY-MM-DD形式')
+    parser.add_argument('end_date', nargs='?', help='終了日 YYYY-MM-DD形式（省略時は開始日と同じ）')
+    parser.add_argument('--bucket', choices=list(BUCKET_MILLIS), default='day', help='バケット幅（デフォルト: day）')
+    parser.add_argument('--rollup', choices=list(ROLLUP_PERIODS), help='集計結果を週・月単位にまとめる')
+    parser.add_argument('--metrics', help='表示する列名（カンマ区切り、省略時はすべて）')
+    args = parser.parse_args()
+
+    from main import get_credentials
+
+    start_date = datetime.strptime(args.start_date, "%Y-%m-%d").date()
+    end_date = datetime.strptime(args.end_date, "%Y-%m-%d").date() if args.end_date else start_date
+    metrics = [name.strip() for name in args.metrics.split(",")] if args.metrics else None
+
+    credentials = get_credentials()
+    if not credentials:
+        print("エラー: 認証情報が取得できません。scripts/utils/auth.pyを実行してください。")
+        return 1
+
+    result = aggregate_fit_data(credentials, start_date, end_date, args.bucket, metrics)
+    if args.rollup:
+        result = rollup(result, args.rollup)
+
+    names = list(result.columns)
+    print("\t".join(["start"] + names))
+    for row, start in enumerate(bucket_starts(result)):
+        values = [result.columns[name][row] for name in names]
+        print("\t".join([start.strftime("%Y-%m-%d %H:%M")] + ["" if np.isnan(v) else f"{v:g}" for v in values]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
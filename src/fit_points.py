@@ -0,0 +1,410 @@
+"""
+Google Fitの生のデータ点のローカル保存（時系列ストア）と、ローカルのデータからの日ごとの再集計
+
+dataSources.datasets.get（ナノ秒の範囲指定）でデータ型ごとの統合済みストリームの生のデータ点を
+ページ単位で取得し、ジェネレーターで1ページずつ列形式（開始・終了のナノ秒と値）に変換して
+データ型・月ごとのファイルに追記する。ソースごとに読み込み済みの時刻（ハイウォーターマーク）を
+記録するため、2回目以降は前回の続きだけを取得する（後から同期されたデータ点を拾うため
+LOOKBACK_NANOS だけ遡り、保存済みのデータ点は追記しない）。
+
+日ごとの集計値は daily_metrics() でローカルのデータだけから計算し直せるため、
+集計方法を変えた場合でもAPIを呼び直す必要がない。
+
+保存形式（Parquet は依存を増やすため使わず、numpy の固定長レコードをそのまま追記する）:
+    <保存先>/<データ型のキー>/<YYYY-MM>.bin  POINT_DTYPE のレコード（開始時刻のローカルの月で分ける）
+    <保存先>/manifest.json                  ソースごとのハイウォーターマーク
+
+使い方:
+    python fit_points.py ingest --since 2025-01-01
+    python fit_points.py daily 2025-06-01 2025-06-30
+
+環境変数:
+    FIT_POINT_STORE_PATH: 保存先のディレクトリ（デフォルト: .cache/fit_points）
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import date as date_type, datetime, time as dt_time, timedelta
+
+import numpy as np
+
+from constants import RAW_DATA_SOURCES
+from fit_aggregate import COLUMN_SCALE, FitColumns
+from instrumentation import record_http, span
+from util import FIT_API_HOST, _local_millis, get_fitness_service
+
+DEFAULT_STORE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ".cache", "fit_points"
+)
+MANIFEST_NAME = "manifest.json"
+
+# 1件のデータ点（開始・終了はUNIXナノ秒、値は先頭の値）
+POINT_DTYPE = np.dtype([("start_ns", "<i8"), ("end_ns", "<i8"), ("value", "<f8")])
+NANOS_PER_MILLI = 1000 * 1000
+DAY_NANOS = 24 * 60 * 60 * 1000 * NANOS_PER_MILLI
+# 2回目以降の取得で遡る時間（デバイスの同期が遅れて後から届くデータ点を拾う）
+LOOKBACK_NANOS = 3 * DAY_NANOS
+# 記録が無いソースを取得し始める日（今日から遡る日数、--since で変更可能）
+DEFAULT_SINCE_DAYS = 30
+# 1ページあたりのデータ点数
+PAGE_LIMIT = 1000
+
+# ローカルのデータから再集計する列: (列名, データ型のキー, 1日の中での集約方法)
+# 列名は fit_aggregate.FIT_COLUMNS と同じ（心拍数は生のbpmから平均・最大・最小を計算する）
+DAILY_COLUMNS = (
+    ("distance_km", "distance", "sum"),
+    ("steps", "steps", "sum"),
+    ("calories", "calories", "sum"),
+    ("heart_points", "active_minutes", "sum"),
+    ("heart_rate_avg", "heart_rate", "mean"),
+    ("heart_rate_max", "heart_rate", "max"),
+    ("heart_rate_min", "heart_rate", "min"),
+    ("oxygen_avg", "oxygen", "mean"),
+    ("weight", "weight", "last"),
+    ("body_fat", "body_fat", "last"),
+)
+
+
+def _local_nanos(dt):
+    """ローカル時刻のdatetimeをUNIXナノ秒に変換する"""
+    return _local_millis(dt) * NANOS_PER_MILLI
+
+
+def _month_start(value):
+    return date_type(value.year, value.month, 1)
+
+
+def _next_month(month):
+    return date_type(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def iter_point_pages(fitness_service, data_source_id, start_ns, end_ns, limit=PAGE_LIMIT):
+    """
+    データソースの生のデータ点を1ページずつ返すジェネレーター
+
+    Args:
+        fitness_service: get_fitness_service() のクライアント
+        data_source_id: データソースID（RAW_DATA_SOURCES の値など）
+        start_ns / end_ns: 取得する範囲（UNIXナノ秒）
+        limit: 1ページあたりのデータ点数
+
+    Yields:
+        list: 1ページ分のデータ点（APIの point 要素）
+    """
+    datasets = fitness_service.users().dataSources().datasets()
+    page_token = None
+    while True:
+        with span("fit.points.fetch"):
+            page = datasets.get(
+                userId="me",
+                dataSourceId=data_source_id,
+                datasetId=f"{start_ns}-{end_ns}",
+                limit=limit,
+                pageToken=page_token
+            ).execute()
+        record_http(FIT_API_HOST, len(json.dumps(page)))
+        points = page.get("point", [])
+        if points:
+            yield points
+        page_token = page.get("nextPageToken")
+        if not page_token or not points:
+            break
+
+
+def points_to_records(points):
+    """APIのデータ点のリストを POINT_DTYPE の配列にする（値の無いデータ点は除く）"""
+    records = np.empty(len(points), dtype=POINT_DTYPE)
+    size = 0
+    for point in points:
+        values = point.get("value", [])
+        if not values:
+            continue
+        value = values[0].get("fpVal", values[0].get("intVal"))
+        if value is None:
+            continue
+        records[size] = (int(point["startTimeNanos"]), int(point["endTimeNanos"]), value)
+        size += 1
+    return records[:size]
+
+
+class PointStore:
+    """データ型・月ごとのファイルに生のデータ点を保存するローカルの時系列ストア"""
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _partition_path(self, key, month):
+        return os.path.join(self.path, key, f"{month:%Y-%m}.bin")
+
+    def read_partition(self, key, month):
+        """1か月分のデータ点（追記順）。書き込み途中で終わった末尾のレコードは読み飛ばす"""
+        path = self._partition_path(key, month)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=POINT_DTYPE)
+        count = os.path.getsize(path) // POINT_DTYPE.itemsize
+        return np.fromfile(path, dtype=POINT_DTYPE, count=count)
+
+    def partitions(self, records):
+        """
+        データ点を開始時刻のローカルの月ごとに分ける
+
+        Returns:
+            list: [(月の1日のdate, その月のデータ点の配列)]
+        """
+        if records.size == 0:
+            return []
+        first = _month_start(datetime.fromtimestamp(int(records["start_ns"].min()) / 1e9))
+        last = _month_start(datetime.fromtimestamp(int(records["start_ns"].max()) / 1e9))
+        months = [first]
+        while months[-1] < last:
+            months.append(_next_month(months[-1]))
+        boundaries = np.array([_local_nanos(datetime.combine(month, dt_time.min)) for month in months], dtype=np.int64)
+        index = np.clip(np.searchsorted(boundaries, records["start_ns"], side="right") - 1, 0, len(months) - 1)
+        return [(month, records[index == i]) for i, month in enumerate(months) if (index == i).any()]
+
+    def append(self, key, month, records):
+        """1か月分のデータ点をファイルの末尾に追記する"""
+        path = self._partition_path(key, month)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "ab") as f:
+            records.tofile(f)
+
+    def load(self, key, start_date, end_date):
+        """
+        期間内（ローカル時刻の開始日〜終了日）に始まるデータ点を開始時刻順に返す
+
+        同じデータ点（開始・終了・値が同じ）が重複して保存されている場合は1件にまとめる。
+        """
+        chunks = []
+        month = _month_start(start_date)
+        while month <= end_date:
+            chunks.append(self.read_partition(key, month))
+            month = _next_month(month)
+        records = np.concatenate(chunks) if chunks else np.empty(0, dtype=POINT_DTYPE)
+        start_ns = _local_nanos(datetime.combine(start_date, dt_time.min))
+        end_ns = _local_nanos(datetime.combine(end_date + timedelta(days=1), dt_time.min))
+        records = records[(records["start_ns"] >= start_ns) & (records["start_ns"] < end_ns)]
+        return np.unique(records)
+
+    def _read_manifest(self):
+        path = os.path.join(self.path, MANIFEST_NAME)
+        if not os.path.exists(path):
+            return {"sources": {}}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"警告: {MANIFEST_NAME} を読み込めません（初期状態として扱います）: {str(e)}")
+            return {"sources": {}}
+
+    def high_water(self, source_id):
+        """ソースを読み込み済みの時刻（UNIXナノ秒）。記録が無ければNone"""
+        state = self._read_manifest()["sources"].get(source_id)
+        return int(state["high_water_ns"]) if state else None
+
+    def set_high_water(self, source_id, key, high_water_ns):
+        with self._lock:
+            manifest = self._read_manifest()
+            manifest["sources"][source_id] = {
+                "data_type": key,
+                "high_water_ns": int(high_water_ns),
+                "updated_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            os.makedirs(self.path, exist_ok=True)
+            path = os.path.join(self.path, MANIFEST_NAME)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+            os.replace(tmp_path, path)
+
+
+def get_point_store():
+    """環境変数 FIT_POINT_STORE_PATH の保存先のストア"""
+    return PointStore(os.getenv("FIT_POINT_STORE_PATH") or DEFAULT_STORE_PATH)
+
+
+def _new_records(store, key, month, records, since_ns, seen):
+    """
+    保存済みのデータ点を除く
+
+    取得範囲の開始（since_ns）以降に保存済みのデータ点だけを月ごとに1回読み込んで覚えておく
+    （1回の取得の中ではページ同士は重ならないため、追記したデータ点は覚えなくてよい）。
+    """
+    stored = seen.get(month)
+    if stored is None:
+        existing = store.read_partition(key, month)
+        existing = existing[existing["start_ns"] >= since_ns]
+        stored = set(zip(existing["start_ns"].tolist(), existing["end_ns"].tolist()))
+        seen[month] = stored
+    if not stored:
+        return records
+    keep = [(start, end) not in stored for start, end in zip(records["start_ns"].tolist(), records["end_ns"].tolist())]
+    return records[np.array(keep, dtype=bool)]
+
+
+def ingest_source(fitness_service, store, key, since_ns, until_ns):
+    """
+    1つのデータ型の生のデータ点を前回の続きから取得して保存する
+
+    Returns:
+        int: 追記したデータ点の数
+    """
+    source_id = RAW_DATA_SOURCES[key]
+    high_water = store.high_water(source_id)
+    start_ns = since_ns if high_water is None else max(0, high_water - LOOKBACK_NANOS)
+    if start_ns >= until_ns:
+        return 0
+
+    appended = 0
+    seen = {}
+    for points in iter_point_pages(fitness_service, source_id, start_ns, until_ns):
+        with span("fit.points.store"):
+            for month, records in store.partitions(points_to_records(points)):
+                records = _new_records(store, key, month, records, start_ns, seen)
+                if records.size:
+                    store.append(key, month, records)
+                    appended += int(records.size)
+    # すべてのページを保存してから進める（途中で失敗した場合は次回に同じ範囲を取り直す）
+    store.set_high_water(source_id, key, until_ns)
+    return appended
+
+
+def ingest(credentials, store=None, since_date=None, data_type_keys=None):
+    """
+    データ型ごとの生のデータ点を前回の続きから取得してローカルに保存する
+
+    Args:
+        credentials: Google認証情報
+        store: 保存先（省略時は get_point_store()）
+        since_date: 記録が無いソースを取得し始める日（省略時は DEFAULT_SINCE_DAYS 日前）
+        data_type_keys: 取得するデータ型のキー（省略時は RAW_DATA_SOURCES のすべて）
+
+    Returns:
+        dict: {データ型のキー: 追記したデータ点の数}
+    """
+    store = store or get_point_store()
+    keys = list(data_type_keys or RAW_DATA_SOURCES)
+    unknown = [key for key in keys if key not in RAW_DATA_SOURCES]
+    if unknown:
+        raise ValueError(f"不明なデータ型です: {', '.join(unknown)}（指定可能: {', '.join(RAW_DATA_SOURCES)}）")
+    if since_date is None:
+        since_date = date_type.today() - timedelta(days=DEFAULT_SINCE_DAYS)
+    since_ns = _local_nanos(datetime.combine(since_date, dt_time.min))
+    until_ns = time.time_ns()
+
+    fitness_service = get_fitness_service(credentials)
+    return {key: ingest_source(fitness_service, store, key, since_ns, until_ns) for key in keys}
+
+
+def _aggregate_rows(values, rows, size, how):
+    """行番号ごとにデータ点の値を集約する（データ点の無い行は sum なら0、それ以外はNaN）"""
+    if how == "sum":
+        return np.bincount(rows, weights=values, minlength=size)
+    counts = np.bincount(rows, minlength=size)
+    if how == "mean":
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result = np.bincount(rows, weights=values, minlength=size) / counts
+    elif how == "max":
+        result = np.full(size, -np.inf)
+        np.maximum.at(result, rows, values)
+    elif how == "min":
+        result = np.full(size, np.inf)
+        np.minimum.at(result, rows, values)
+    else:
+        # データ点は開始時刻順のため、行ごとに最後の位置の値
+        last = np.full(size, -1)
+        np.maximum.at(last, rows, np.arange(len(values)))
+        result = values[np.maximum(last, 0)] if len(values) else np.zeros(size)
+    return np.where(counts > 0, result, np.nan)
+
+
+def daily_metrics(store, start_date, end_date, metrics=None):
+    """
+    ローカルに保存したデータ点から日ごとの集計値を計算する（APIは呼ばない）
+
+    データ点は開始時刻のローカルの日付で集計する。結果は fit_aggregate.aggregate_fit_data() と同じ
+    列形式のため、fit_aggregate.rollup() で週・月単位にまとめられる。
+
+    Args:
+        store: PointStore
+        start_date / end_date: 期間（datetime.date、両端を含む）
+        metrics: 計算する列名のリスト（省略時は DAILY_COLUMNS のすべて）
+
+    Returns:
+        FitColumns: bucket="day" の集計結果
+    """
+    if end_date < start_date:
+        raise ValueError("開始日は終了日より前である必要があります")
+    selected = [spec for spec in DAILY_COLUMNS if metrics is None or spec[0] in metrics]
+    unknown = set(metrics or ()) - {spec[0] for spec in DAILY_COLUMNS}
+    if unknown:
+        raise ValueError(f"不明な列名です: {', '.join(sorted(unknown))}")
+
+    days = (end_date - start_date).days + 1
+    boundaries = np.array(
+        [_local_millis(datetime.combine(start_date + timedelta(days=i), dt_time.min)) for i in range(days + 1)],
+        dtype=np.int64
+    )
+    columns = {}
+    loaded = {}
+    with span("fit.points.daily"):
+        for name, key, how in selected:
+            if key not in loaded:
+                records = store.load(key, start_date, end_date)
+                rows = np.searchsorted(boundaries * NANOS_PER_MILLI, records["start_ns"], side="right") - 1
+                loaded[key] = (records["value"], rows)
+            values, rows = loaded[key]
+            columns[name] = _aggregate_rows(values, rows, days, how) * COLUMN_SCALE.get(name, 1)
+    return FitColumns("day", boundaries[:-1], columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Google Fitの生のデータ点をローカルに保存し、日ごとに集計し直します')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = subparsers.add_parser('ingest', help='前回の続きから生のデータ点を取得して保存する')
+    ingest_parser.add_argument('--since', help=f'記録が無いデータ型を取得し始める日 YYYY-MM-DD形式（省略時は{DEFAULT_SINCE_DAYS}日前）')
+    ingest_parser.add_argument('--types', help=f'取得するデータ型（カンマ区切り、省略時はすべて: {",".join(RAW_DATA_SOURCES)}）')
+
+    daily_parser = subparsers.add_parser('daily', help='保存済みのデータ点から日ごとの集計値を表示する')
+    daily_parser.add_argument('start_date', help='開始日 YYYY-MM-DD形式')
+    daily_parser.add_argument('end_date', nargs='?', help='終了日 YYYY-MM-DD形式（省略時は開始日と同じ）')
+    daily_parser.add_argument('--metrics', help='表示する列名（カンマ区切り、省略時はすべて）')
+    args = parser.parse_args()
+
+    store = get_point_store()
+    if args.command == 'daily':
+        start_date = datetime.strptime(args.start_date, "%Y-%m-%d").date()
+        end_date = datetime.strptime(args.end_date, "%Y-%m-%d").date() if args.end_date else start_date
+        metrics = [name.strip() for name in args.metrics.split(",")] if args.metrics else None
+        result = daily_metrics(store, start_date, end_date, metrics)
+        names = list(result.columns)
+        print("\t".join(["date"] + names))
+        for row in range(len(result.start_millis)):
+            values = [result.columns[name][row] for name in names]
+            print("\t".join([(start_date + timedelta(days=row)).isoformat()] + ["" if np.isnan(v) else f"{v:g}" for v in values]))
+        return 0
+
+    from main import get_credentials
+
+    credentials = get_credentials()
+    if not credentials:
+        print("エラー: 認証情報が取得できません。scripts/utils/auth.pyを実行してください。")
+        return 1
+
+    since_date = datetime.strptime(args.since, "%Y-%m-%d").date() if args.since else None
+    keys = [key.strip() for key in args.types.split(",")] if args.types else None
+    appended = ingest(credentials, store, since_date, keys)
+    for key, count in appended.items():
+        print(f"{key}: {count}件を追記しました")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,21 +7,39 @@ GitHub活動データ（Issue、PR）をNotionの日記データベースに同
     NOTION_SECRET: Notion Integration トークン
     DATABASE_ID: Notion データベース ID
     GCP_PROJECT: Google Cloud プロジェクト ID（Firestore用）
+    GITHUB_MAX_CONCURRENCY: GitHub APIの同時実行リクエスト数の上限（オプション、デフォルト: 4）
+    GITHUB_USE_GRAPHQL: false の場合、コミット履歴の取得にGraphQLを使わずREST APIのみ使用（オプション）
+    GITHUB_HTTP_CACHE_PATH: 一覧取得APIのETagキャッシュ（SQLite）の保存先（オプション、none で無効）
+    GITHUB_HTTP_CACHE_MAX_MB: ETagキャッシュの最大サイズ（MB、オプション、デフォルト: 50）
+    SYNC_WATERMARK_BACKEND: 同期ウォーターマークの保存先（local / firestore / none、オプション、デフォルト: local）
+    SYNC_WATERMARK_PATH: localの場合のウォーターマークファイルの保存先（オプション）
 """
 
 import os
 import sys
+import contextvars
 import datetime
+import hashlib
 import json
 import logging
 import re
-from typing import List, Dict, Optional, Tuple
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional, Tuple
 
 import requests
 
 # 親ディレクトリのモジュールをインポート可能にする
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from http_cache import ConditionalRequestCache, DEFAULT_CACHE_MAX_BYTES
+from http_session import get_github_session, get_notion_session
+from instrumentation import finish_run, span, start_run
+from notion_diff import diff_properties, apply_properties
+from notion_index import NotionDateIndex
+from watermark import get_watermark_store, properties_hash
+
 # .envファイルから環境変数を手動で読み込む
 def load_env_file():
     """
@@ -41,11 +59,67 @@ load_env_file()
 # 日本時間タイムゾーン
 JST = datetime.timezone(datetime.timedelta(hours=9))
 
+# GitHub APIの同時実行リクエスト数の上限（環境変数 GITHUB_MAX_CONCURRENCY で変更可能）
+DEFAULT_GITHUB_MAX_CONCURRENCY = 4
+# レート制限時の再試行回数と1回あたりの最大待機秒数
+GITHUB_RATE_LIMIT_RETRIES = 3
+GITHUB_RATE_LIMIT_MAX_WAIT = 300
+
+# 同期ウォーターマークのソース名
+WATERMARK_SOURCE = "github"
+
+# 一覧取得APIのETagキャッシュの既定の保存先（GitHub Actionsではcacheアクションで持ち越す）
+DEFAULT_GITHUB_HTTP_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    '.cache', 'github_http_cache.sqlite3'
+)
+
+# デフォルトブランチのコミット履歴を変更行数・親数・関連PRとともに一括取得するGraphQLクエリ
+COMMIT_HISTORY_QUERY = """
+query($owner: String!, $name: String!, $branch: String!, $since: GitTimestamp!, $until: GitTimestamp!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    ref(qualifiedName: $branch) {
+      target {
+        ... on Commit {
+          history(first: 100, since: $since, until: $until, after: $cursor) {
+            pageInfo { hasNextPage endCursor }
+            nodes {
+              oid
+              committedDate
+              additions
+              deletions
+              parents { totalCount }
+              associatedPullRequests(first: 10) { nodes { number merged } }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
 # ロギング設定
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
+# 以降のリポジトリもREST APIで取得するGraphQLのエラーの種類（アクセス権がない・レート制限に達した）
+GRAPHQL_DISABLING_ERRORS = ("FORBIDDEN", "INSUFFICIENT_SCOPES", "RATE_LIMITED")
+
+
+class GraphQLUnavailableError(Exception):
+    """
+    GraphQLでコミット履歴を取得できなかった場合の例外（REST APIにフォールバックする）
+
+    disable がTrueの場合（アクセス権がない・レート制限に達した）は、以降のリポジトリもREST APIで取得する
+    """
+
+    def __init__(self, message: str, disable: bool = True):
+        super().__init__(message)
+        self.disable = disable
+
+
 class GitHubNotionSync:
     """GitHub活動データをNotionに同期するクラス"""
 
@@ -70,22 +144,31 @@ class GitHubNotionSync:
 
         logger.info("環境変数チェック: GITHUB_TOKEN=設定済み, NOTION_SECRET=設定済み, DATABASE_ID=設定済み")
 
-        # GitHubのAPIヘッダー
-        self.github_headers = {
-            "Authorization": f"token {self.github_token}",
-            "Accept": "application/vnd.github+json"
-        }
+        # 日付→Notionページの索引（期間処理ではrun()でまとめて読み込む）
+        self.page_index = NotionDateIndex(self.database_id, self.notion_token)
 
-        # NotionのAPIヘッダー
-        self.notion_headers = {
-            "Authorization": f"Bearer {self.notion_token}",
-            "Notion-Version": "2022-06-28",
-            "Content-Type": "application/json"
-        }
+        # コミット履歴はGraphQLで一括取得（GITHUB_USE_GRAPHQL=false でREST APIのみ使用）
+        self.use_graphql = os.getenv('GITHUB_USE_GRAPHQL', 'true').lower() != 'false'
+
+        # リポジトリ・PR単位の並列取得の設定
+        self.max_concurrency = max(1, int(os.getenv('GITHUB_MAX_CONCURRENCY', DEFAULT_GITHUB_MAX_CONCURRENCY)))
+        self._request_slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._rate_limit_lock = threading.Lock()
+        self._rate_limited_until = 0.0
+
+        # ホストごとの共有セッション（keep-aliveで接続を使い回す）
+        self.github_session = get_github_session(self.github_token, pool_size=self.max_concurrency)
+        self.notion_session = get_notion_session(self.notion_token)
+
+        # 一覧取得APIの条件付きリクエスト用キャッシュ（304はレート制限に数えられない）
+        self.http_cache = self._open_http_cache()
+
+        # 同期ウォーターマーク（最終同期日と日付ごとの書き込み内容のハッシュ）
+        self.watermarks = get_watermark_store("local")
 
         # GitHubトークンの有効性を確認
         try:
-            resp = requests.get("https://api.github.com/user", headers=self.github_headers)
+            resp = self.github_session.get("https://api.github.com/user")
             if resp.ok:
                 user_data = resp.json()
                 logger.info(f"GitHub認証OK: ユーザー={user_data.get('login')}")
@@ -96,6 +179,136 @@ class GitHubNotionSync:
             logger.error(f"GitHub API接続エラー: {e}")
             sys.exit(1)
 
+    def _open_http_cache(self) -> Optional[ConditionalRequestCache]:
+        """
+        ETagキャッシュを開く（GITHUB_HTTP_CACHE_PATH=none の場合や開けない場合はNone）
+
+        Returns:
+            キャッシュまたはNone
+        """
+        path = os.getenv('GITHUB_HTTP_CACHE_PATH', DEFAULT_GITHUB_HTTP_CACHE_PATH)
+        if not path or path.lower() == 'none':
+            return None
+        try:
+            max_mb = os.getenv('GITHUB_HTTP_CACHE_MAX_MB')
+            max_bytes = int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_CACHE_MAX_BYTES
+            cache = ConditionalRequestCache(path, max_bytes=max_bytes)
+            logger.info(f"GitHub ETagキャッシュ: {path}")
+            return cache
+        except Exception as e:
+            logger.warning(f"GitHub ETagキャッシュを開けないため無効化します: {e}")
+            return None
+
+    def _rate_limit_wait(self, resp: requests.Response) -> Optional[float]:
+        """
+        GitHubのレート制限ヘッダーから待機秒数を求める
+
+        Args:
+            resp: GitHub APIのレスポンス
+
+        Returns:
+            レート制限にかかっている場合は待機秒数、そうでなければNone
+        """
+        remaining = resp.headers.get("X-RateLimit-Remaining")
+        reset = resp.headers.get("X-RateLimit-Reset")
+
+        # 残り回数が尽きた場合は、以降のリクエストをリセット時刻まで止める
+        if remaining == "0" and reset:
+            with self._rate_limit_lock:
+                self._rate_limited_until = max(self._rate_limited_until, float(reset))
+
+        if resp.status_code not in (403, 429):
+            return None
+
+        retry_after = resp.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                return None
+        if remaining == "0" and reset:
+            return max(0.0, float(reset) - time.time()) + 1
+        return None
+
+    def github_get(self, url: str, params: Optional[Dict] = None, cacheable: bool = False) -> requests.Response:
+        """
+        同時実行数を制限し、レート制限ヘッダーを考慮してGitHub APIにGETリクエストを送る
+
+        Args:
+            url: リクエストURL
+            params: クエリパラメータ
+            cacheable: Trueの場合、ETagキャッシュを使った条件付きリクエストにする（一覧取得API向け）
+
+        Returns:
+            レスポンス（再試行後もレート制限の場合は最後のレスポンス。304の場合はキャッシュから復元したレスポンス）
+        """
+        if not cacheable or self.http_cache is None:
+            return self.github_request("GET", url, params=params)
+
+        scope = hashlib.sha256(self.github_token.encode("utf-8")).hexdigest()[:16]
+        key = self.http_cache.make_key(url, params, scope)
+        resp = self.github_request("GET", url, params=params, headers=self.http_cache.conditional_headers(key))
+
+        if resp.status_code == 304:
+            cached = self.http_cache.load_response(key, resp.url)
+            if cached is not None:
+                return cached
+            # キャッシュが消えていた場合は条件なしで取り直す
+            return self.github_request("GET", url, params=params)
+
+        self.http_cache.store(key, resp)
+        return resp
+
+    def github_request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        同時実行数を制限し、レート制限ヘッダーを考慮してGitHub APIにリクエストを送る
+
+        Args:
+            method: HTTPメソッド
+            url: リクエストURL
+            **kwargs: requests.requestに渡す引数（params, json など）
+
+        Returns:
+            レスポンス（再試行後もレート制限の場合は最後のレスポンス）
+        """
+        for attempt in range(GITHUB_RATE_LIMIT_RETRIES + 1):
+            # 他のスレッドがレート制限を検知していればリセットまで待機
+            with self._rate_limit_lock:
+                pause = self._rate_limited_until - time.time()
+            if pause > 0:
+                logger.warning(f"GitHubレート制限のため {min(pause, GITHUB_RATE_LIMIT_MAX_WAIT):.0f} 秒待機します")
+                time.sleep(min(pause, GITHUB_RATE_LIMIT_MAX_WAIT))
+
+            with self._request_slots:
+                resp = self.github_session.request(method, url, **kwargs)
+
+            wait = self._rate_limit_wait(resp)
+            if wait is None or attempt == GITHUB_RATE_LIMIT_RETRIES or wait > GITHUB_RATE_LIMIT_MAX_WAIT:
+                return resp
+
+            logger.warning(f"GitHubレート制限 ({resp.status_code}): {wait:.0f} 秒後に再試行します ({attempt + 1}/{GITHUB_RATE_LIMIT_RETRIES})")
+            time.sleep(wait)
+
+        return resp
+
+    def map_parallel(self, func: Callable, items: List) -> List:
+        """
+        itemsの各要素にfuncを並列適用し、入力と同じ順序で結果を返す
+
+        Args:
+            func: 各要素に適用する関数
+            items: 入力リスト
+
+        Returns:
+            funcの戻り値のリスト（itemsと同じ順序）
+        """
+        if len(items) <= 1 or self.max_concurrency == 1:
+            return [func(item) for item in items]
+        # 呼び出し元のコンテキスト（リクエスト数集計のラベルなど）をワーカーに引き継ぐ
+        context = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(items))) as executor:
+            return list(executor.map(lambda item: context.copy().run(func, item), items))
+
     def parse_date_range(self, arg: str) -> List[datetime.date]:
         """
         日付引数をパースして日付リストを返す
@@ -143,16 +356,16 @@ class GitHubNotionSync:
             all_repos = []
             
             # 個人リポジトリを取得
-            resp = requests.get(
+            resp = self.github_get(
                 "https://api.github.com/user/repos",
-                headers=self.github_headers,
                 params={
                     "per_page": 100,  # まず多めに取得
                     "page": 1,
                     "affiliation": "owner",
                     "sort": "updated",
                     "direction": "desc"
-                }
+                },
+                cacheable=True
             )
             resp.raise_for_status()
             personal_repos = resp.json()
@@ -166,10 +379,7 @@ class GitHubNotionSync:
                 logger.info(f"指定されたorganization: {', '.join(orgs_to_fetch)}")
             else:
                 # ユーザーが所属する全organization
-                org_resp = requests.get(
-                    "https://api.github.com/user/orgs",
-                    headers=self.github_headers
-                )
+                org_resp = self.github_get("https://api.github.com/user/orgs", cacheable=True)
                 org_resp.raise_for_status()
                 orgs_data = org_resp.json()
                 orgs_to_fetch = [org['login'] for org in orgs_data]
@@ -180,15 +390,15 @@ class GitHubNotionSync:
                 try:
                     logger.info(f"Organization '{org_name}' のリポジトリを取得中...")
                     
-                    org_repos_resp = requests.get(
+                    org_repos_resp = self.github_get(
                         f"https://api.github.com/orgs/{org_name}/repos",
-                        headers=self.github_headers,
                         params={
                             "per_page": 100,
                             "page": 1,
                             "sort": "updated",
                             "direction": "desc"
-                        }
+                        },
+                        cacheable=True
                     )
                     org_repos_resp.raise_for_status()
                     org_repos = org_repos_resp.json()
@@ -221,14 +431,14 @@ class GitHubNotionSync:
 
     def fetch_issues_for_date(self, date: datetime.date, repos: List[Dict]) -> List[Dict]:
         """
-        指定日（JST）にクローズされたIssueを取得
+        指定日（JST）にクローズされたIssueを取得（リポジトリ単位で並列取得）
 
         Args:
             date: 対象日付
             repos: リポジトリ一覧
 
         Returns:
-            Issue情報のリスト
+            Issue情報のリスト（リポジトリ一覧の順序）
         """
         # JST時間範囲をUTCに変換
         start_jst = datetime.datetime.combine(date, datetime.time(0, 0), tzinfo=JST)
@@ -236,72 +446,88 @@ class GitHubNotionSync:
         start_utc = start_jst.astimezone(datetime.timezone.utc)
         end_utc = end_jst.astimezone(datetime.timezone.utc)
 
-        items = []
+        per_repo = self.map_parallel(lambda repo: self._fetch_repo_issues(repo, start_utc, end_utc), repos)
+        items = [item for repo_items in per_repo for item in repo_items]
 
-        for repo in repos:
-            owner = repo["owner"]["login"]
-            name = repo["name"]
-            page = 1
+        logger.info(f"{date} のIssue数: {len(items)}")
+        return items
 
-            while True:
-                try:
-                    resp = requests.get(
-                        f"https://api.github.com/repos/{owner}/{name}/issues",
-                        headers=self.github_headers,
-                        params={
-                            "state": "closed",
-                            "per_page": 100,
-                            "page": page,
-                            "since": start_utc.isoformat()
-                        }
-                    )
-                    resp.raise_for_status()
-                    batch = resp.json()
+    def _fetch_repo_issues(self, repo: Dict, start_utc: datetime.datetime, end_utc: datetime.datetime) -> List[Dict]:
+        """
+        1リポジトリについて、指定期間（UTC）にクローズされたIssueを取得
+
+        Args:
+            repo: リポジトリ情報
+            start_utc: 期間の開始（UTC）
+            end_utc: 期間の終了（UTC）
+
+        Returns:
+            Issue情報のリスト
+        """
+        owner = repo["owner"]["login"]
+        name = repo["name"]
+        page = 1
+        items = []
+
+        while True:
+            try:
+                resp = self.github_get(
+                    f"https://api.github.com/repos/{owner}/{name}/issues",
+                    params={
+                        "state": "closed",
+                        "per_page": 100,
+                        "page": page,
+                        "since": start_utc.isoformat()
+                    },
+                    cacheable=True
+                )
+                resp.raise_for_status()
+                batch = resp.json()
 
-                    if not batch:
-                        break
+                if not batch:
+                    break
 
-                    for issue in batch:
-                        # PRではないことを確認
-                        if "pull_request" in issue:
-                            continue
+                for issue in batch:
+                    # PRではないことを確認
+                    if "pull_request" in issue:
+                        continue
 
-                        closed_at = issue.get("closed_at")
-                        if not closed_at:
-                            continue
+                    closed_at = issue.get("closed_at")
+                    if not closed_at:
+                        continue
 
-                        # closed_atをパースして時間範囲を確認
-                        closed_dt = datetime.datetime.fromisoformat(closed_at.rstrip("Z")).replace(tzinfo=datetime.timezone.utc)
+                    # closed_atをパースして時間範囲を確認
+                    closed_dt = datetime.datetime.fromisoformat(closed_at.rstrip("Z")).replace(tzinfo=datetime.timezone.utc)
 
-                        if start_utc <= closed_dt <= end_utc:
-                            items.append({
-                                "type": "issue",
-                                "repo": f"{owner}/{name}",
-                                "number": issue["number"],
-                                "title": issue["title"],
-                                "url": issue["html_url"]
-                            })
+                    if start_utc <= closed_dt <= end_utc:
+                        items.append({
+                            "type": "issue",
+                            "repo": f"{owner}/{name}",
+                            "number": issue["number"],
+                            "title": issue["title"],
+                            "url": issue["html_url"],
+                            "date": closed_dt.astimezone(JST).date()
+                        })
 
-                    page += 1
+                page += 1
 
-                except Exception as e:
-                    logger.warning(f"Issue取得スキップ ({owner}/{name}): {e}")
-                    # エラー時はこのリポジトリをスキップして次へ
-                    break
+            except Exception as e:
+                logger.warning(f"Issue取得スキップ ({owner}/{name}): {e}")
+                # エラー時はこのリポジトリをスキップして次へ
+                break
 
-        logger.info(f"{date} のIssue数: {len(items)}")
         return items
 
     def fetch_prs_for_date(self, date: datetime.date, repos: List[Dict]) -> List[Dict]:
         """
-        指定日（JST）にマージされたPRを取得
+        指定日（JST）にマージされたPRを取得（リポジトリ単位で並列取得）
 
         Args:
             date: 対象日付
             repos: リポジトリ一覧
 
         Returns:
-            PR情報のリスト
+            PR情報のリスト（リポジトリ一覧の順序）
         """
         # JST時間範囲をUTCに変換
         start_jst = datetime.datetime.combine(date, datetime.time(0, 0), tzinfo=JST)
@@ -309,164 +535,329 @@ class GitHubNotionSync:
         start_utc = start_jst.astimezone(datetime.timezone.utc)
         end_utc = end_jst.astimezone(datetime.timezone.utc)
 
+        per_repo = self.map_parallel(lambda repo: self._fetch_repo_prs(repo, start_utc, end_utc), repos)
+        results = [pr for repo_prs in per_repo for pr in repo_prs]
+
+        logger.info(f"{date} のPR数: {len(results)}")
+        return results
+
+    def _fetch_repo_prs(self, repo: Dict, start_utc: datetime.datetime, end_utc: datetime.datetime) -> List[Dict]:
+        """
+        1リポジトリについて、指定期間（UTC）にマージされたPRを取得
+
+        Args:
+            repo: リポジトリ情報
+            start_utc: 期間の開始（UTC）
+            end_utc: 期間の終了（UTC）
+
+        Returns:
+            PR情報のリスト
+        """
+        owner = repo["owner"]["login"]
+        name = repo["name"]
+        page = 1
         results = []
 
-        for repo in repos:
-            owner = repo["owner"]["login"]
-            name = repo["name"]
-            page = 1
+        # リポジトリのPRを直接取得（Search APIの代替）
+        while True:
+            try:
+                resp = self.github_get(
+                    f"https://api.github.com/repos/{owner}/{name}/pulls",
+                    params={
+                        "state": "closed",
+                        "per_page": 50,
+                        "page": page,
+                        "sort": "updated",
+                        "direction": "desc"
+                    },
+                    cacheable=True
+                )
+                resp.raise_for_status()
+                prs = resp.json()
 
-            # リポジトリのPRを直接取得（Search APIの代替）
-            while True:
-                try:
-                    resp = requests.get(
-                        f"https://api.github.com/repos/{owner}/{name}/pulls",
-                        headers=self.github_headers,
-                        params={
-                            "state": "closed",
-                            "per_page": 50,
-                            "page": page,
-                            "sort": "updated",
-                            "direction": "desc"
-                        }
-                    )
-                    resp.raise_for_status()
-                    prs = resp.json()
-
-                    if not prs:
-                        break
-
-                    found_older = False
-                    for pr in prs:
-                        # updated_atが対象期間より古い場合、以降のページは不要
-                        updated_at = pr.get("updated_at", "")
-                        if updated_at:
-                            updated_dt = datetime.datetime.fromisoformat(updated_at.rstrip("Z")).replace(tzinfo=datetime.timezone.utc)
-                            if updated_dt < start_utc:
-                                found_older = True
-                                break
-
-                        # マージされたPRのみ処理
-                        if not pr.get("merged_at"):
-                            continue
-
-                        # merged_atをパースして時間範囲を確認
-                        merged_at = pr["merged_at"]
-                        merged_dt = datetime.datetime.fromisoformat(merged_at.rstrip("Z")).replace(tzinfo=datetime.timezone.utc)
-
-                        if start_utc <= merged_dt <= end_utc:
-                            results.append({
-                                "type": "pr",
-                                "repo": f"{owner}/{name}",
-                                "number": pr["number"],
-                                "title": pr["title"],
-                                "url": pr["html_url"]
-                            })
-                            logger.info(f"  マッチしたPR: {owner}/{name}#{pr['number']} - {pr['title']}")
-
-                    # 対象期間より古いPRに到達したらページネーション終了
-                    if found_older:
-                        break
-
-                    page += 1
+                if not prs:
+                    break
 
-                except Exception as e:
-                    logger.warning(f"PR取得スキップ ({owner}/{name}): {e}")
-                    # エラー時はこのリポジトリをスキップして次へ
+                found_older = False
+                for pr in prs:
+                    # updated_atが対象期間より古い場合、以降のページは不要
+                    updated_at = pr.get("updated_at", "")
+                    if updated_at:
+                        updated_dt = datetime.datetime.fromisoformat(updated_at.rstrip("Z")).replace(tzinfo=datetime.timezone.utc)
+                        if updated_dt < start_utc:
+                            found_older = True
+                            break
+
+                    # マージされたPRのみ処理
+                    if not pr.get("merged_at"):
+                        continue
+
+                    # merged_atをパースして時間範囲を確認
+                    merged_at = pr["merged_at"]
+                    merged_dt = datetime.datetime.fromisoformat(merged_at.rstrip("Z")).replace(tzinfo=datetime.timezone.utc)
+
+                    if start_utc <= merged_dt <= end_utc:
+                        results.append({
+                            "type": "pr",
+                            "repo": f"{owner}/{name}",
+                            "number": pr["number"],
+                            "title": pr["title"],
+                            "url": pr["html_url"],
+                            "date": merged_dt.astimezone(JST).date(),
+                            "merge_commit_sha": pr.get("merge_commit_sha")
+                        })
+                        logger.info(f"  マッチしたPR: {owner}/{name}#{pr['number']} - {pr['title']}")
+
+                # 対象期間より古いPRに到達したらページネーション終了
+                if found_older:
                     break
 
-        logger.info(f"{date} のPR数: {len(results)}")
+                page += 1
+
+            except Exception as e:
+                logger.warning(f"PR取得スキップ ({owner}/{name}): {e}")
+                # エラー時はこのリポジトリをスキップして次へ
+                break
+
         return results
 
-    def fetch_direct_commits_for_date(self, date: datetime.date, repos: List[Dict], pr_commits: set) -> List[Dict]:
+    def fetch_direct_commits_for_date(self, date: datetime.date, repos: List[Dict], prs: List[Dict]) -> List[Dict]:
         """
-        指定日（JST）のmainブランチへの直接コミットを取得（リポジトリごとに集計）
+        指定日（JST）のmainブランチへの直接コミットを取得（リポジトリごとに集計、リポジトリ単位で並列取得）
 
         Args:
             date: 対象日付
             repos: リポジトリ一覧
-            pr_commits: PRに含まれるコミットSHA集合（重複除外用）
+            prs: 同日にマージされたPR情報リスト（PR経由のコミットの除外用）
 
         Returns:
-            リポジトリごとの集計情報リスト
+            リポジトリごとの集計情報リスト（リポジトリ一覧の順序）
         """
         # JST時間範囲をISO形式に変換
         start_jst = datetime.datetime.combine(date, datetime.time(0, 0), tzinfo=JST)
         end_jst = datetime.datetime.combine(date, datetime.time(23, 59, 59, 999999), tzinfo=JST)
 
-        results = []
+        repo_commits = self.map_parallel(lambda repo: self._fetch_repo_commits_or_none(repo, start_jst, end_jst), repos)
 
-        for repo in repos:
-            owner = repo["owner"]["login"]
-            name = repo["name"]
-            repo_key = f"{owner}/{name}"
+        # REST APIで取得したリポジトリがある場合のみ、PRのコミット一覧からSHAを収集
+        pr_commits = self.get_pr_commit_shas(prs, repos) if self._needs_pr_commit_shas(repo_commits) else set()
+        # squashマージのコミットはPRのコミット一覧に含まれないため、マージ時のコミットのSHAも除外する
+        pr_commits.update(pr["merge_commit_sha"] for pr in prs if pr.get("merge_commit_sha"))
+        merged_prs = {(pr["repo"], pr["number"]) for pr in prs}
 
+        def summarize(repo_and_commits):
+            repo, commits = repo_and_commits
+            if commits is None:
+                return None
             try:
-                # mainブランチのコミットを取得
-                resp = requests.get(
-                    f"https://api.github.com/repos/{owner}/{name}/commits",
-                    headers=self.github_headers,
-                    params={
-                        "sha": repo.get("default_branch", "main"),
-                        "since": start_jst.isoformat(),
-                        "until": end_jst.isoformat(),
-                        "per_page": 100  # 各リポジトリ最大100コミット
-                    }
+                return self._summarize_direct_commits(repo, commits, pr_commits, merged_prs)
+            except Exception as e:
+                logger.warning(f"コミット取得スキップ ({repo['owner']['login']}/{repo['name']}): {e}")
+                return None
+
+        per_repo = self.map_parallel(summarize, list(zip(repos, repo_commits)))
+        results = [result for result in per_repo if result is not None]
+
+        logger.info(f"{date} の直接コミットがあるリポジトリ数: {len(results)}")
+        return results
+
+    def _fetch_repo_commits(self, repo: Dict, start_jst: datetime.datetime, end_jst: datetime.datetime) -> List[Dict]:
+        """
+        1リポジトリのデフォルトブランチについて、指定期間のコミット一覧を取得
+
+        GraphQLが使える場合は変更行数と関連PRを含めて一括取得し、
+        使えない場合やエラー（レート制限など）の場合はREST APIにフォールバックする
+
+        Args:
+            repo: リポジトリ情報
+            start_jst: 期間の開始（JST）
+            end_jst: 期間の終了（JST）
+
+        Returns:
+            コミット一覧（REST APIのレスポンス形式。GraphQL取得時は "stats" と "pull_requests" を含む）
+        """
+        if self.use_graphql:
+            try:
+                return self._fetch_repo_commits_graphql(repo, start_jst, end_jst)
+            except GraphQLUnavailableError as e:
+                if e.disable:
+                    logger.warning(f"GraphQL APIが利用できないためREST APIにフォールバックします: {e}")
+                    self.use_graphql = False
+                else:
+                    logger.warning(f"GraphQLでの取得に失敗したためREST APIで取得します ({repo['owner']['login']}/{repo['name']}): {e}")
+
+        return self._fetch_repo_commits_rest(repo, start_jst, end_jst)
+
+    def _fetch_repo_commits_graphql(self, repo: Dict, start_jst: datetime.datetime, end_jst: datetime.datetime) -> List[Dict]:
+        """
+        GraphQLでデフォルトブランチのコミット履歴を変更行数・親数・関連PRとともに取得（1ページ100件）
+
+        Args:
+            repo: リポジトリ情報
+            start_jst: 期間の開始（JST）
+            end_jst: 期間の終了（JST）
+
+        Returns:
+            コミット一覧（REST APIの形式に "stats" と "pull_requests" を加えたもの）
+        """
+        variables = {
+            "owner": repo["owner"]["login"],
+            "name": repo["name"],
+            "branch": repo.get("default_branch", "main"),
+            "since": start_jst.isoformat(),
+            "until": end_jst.isoformat(),
+            "cursor": None
+        }
+        commits = []
+
+        while True:
+            resp = self.github_request(
+                "POST",
+                "https://api.github.com/graphql",
+                json={"query": COMMIT_HISTORY_QUERY, "variables": variables}
+            )
+            if resp.status_code in (401, 403):
+                raise GraphQLUnavailableError(f"{resp.status_code} - {resp.text}")
+            if not resp.ok:
+                raise GraphQLUnavailableError(f"{resp.status_code} - {resp.text}", disable=False)
+            body = resp.json()
+
+            # エラーを含むレスポンスは一部のデータが欠けている場合があるため、エラーの種類によらずREST APIで取得し直す
+            errors = body.get("errors") or []
+            if errors:
+                raise GraphQLUnavailableError(
+                    f"GraphQLエラー: {errors[0].get('type')} - {errors[0].get('message', errors)}",
+                    disable=any(error.get("type") in GRAPHQL_DISABLING_ERRORS for error in errors)
                 )
-                resp.raise_for_status()
-                commits = resp.json()
 
-                # このリポジトリの直接コミットを集計
-                total_additions = 0
-                total_deletions = 0
-                direct_commit_count = 0
+            ref = ((body.get("data") or {}).get("repository") or {}).get("ref")
+            if not ref:
+                # デフォルトブランチが存在しない（空のリポジトリなど）
+                return commits
+            history = ref["target"]["history"]
+
+            for node in history["nodes"]:
+                commits.append({
+                    "sha": node["oid"],
+                    "parents": [{}] * node["parents"]["totalCount"],
+                    "commit": {"committer": {"date": node["committedDate"]}},
+                    "stats": {"additions": node["additions"], "deletions": node["deletions"]},
+                    "pull_requests": [pr["number"] for pr in node["associatedPullRequests"]["nodes"] if pr.get("merged")]
+                })
 
-                for commit in commits:
-                    sha = commit["sha"]
+            if not history["pageInfo"]["hasNextPage"]:
+                return commits
+            variables["cursor"] = history["pageInfo"]["endCursor"]
 
-                    # PRに含まれるコミットは除外
-                    if sha in pr_commits:
-                        continue
+    def _fetch_repo_commits_rest(self, repo: Dict, start_jst: datetime.datetime, end_jst: datetime.datetime) -> List[Dict]:
+        """
+        REST APIでデフォルトブランチのコミット一覧を取得（ページネーション対応）
 
-                    # マージコミットを除外（親が2つ以上）
-                    if len(commit.get("parents", [])) > 1:
-                        continue
+        Args:
+            repo: リポジトリ情報
+            start_jst: 期間の開始（JST）
+            end_jst: 期間の終了（JST）
 
-                    # コミット詳細を取得して変更行数を確認
-                    detail_resp = requests.get(
-                        f"https://api.github.com/repos/{owner}/{name}/commits/{sha}",
-                        headers=self.github_headers
-                    )
-                    detail_resp.raise_for_status()
-                    detail = detail_resp.json()
-
-                    stats = detail.get("stats", {})
-                    total_additions += stats.get("additions", 0)
-                    total_deletions += stats.get("deletions", 0)
-                    direct_commit_count += 1
-
-                # このリポジトリに直接コミットがあれば結果に追加
-                if direct_commit_count > 0:
-                    results.append({
-                        "type": "commit",
-                        "repo": repo_key,
-                        "commit_count": direct_commit_count,
-                        "additions": total_additions,
-                        "deletions": total_deletions,
-                        "url": f"https://github.com/{repo_key}/commits/{repo.get('default_branch', 'main')}"
-                    })
-                    logger.info(f"  {repo_key}: {direct_commit_count} commits, +{total_additions}-{total_deletions}")
+        Returns:
+            コミット一覧（GitHub APIのレスポンス形式）
+        """
+        owner = repo["owner"]["login"]
+        name = repo["name"]
+        commits = []
+        page = 1
+
+        while True:
+            # mainブランチのコミットを取得
+            resp = self.github_get(
+                f"https://api.github.com/repos/{owner}/{name}/commits",
+                params={
+                    "sha": repo.get("default_branch", "main"),
+                    "since": start_jst.isoformat(),
+                    "until": end_jst.isoformat(),
+                    "per_page": 100,
+                    "page": page
+                }
+            )
+            resp.raise_for_status()
+            batch = resp.json()
+            commits.extend(batch)
 
-            except Exception as e:
-                logger.warning(f"コミット取得スキップ ({owner}/{name}): {e}")
+            if len(batch) < 100:
+                break
+            page += 1
+
+        return commits
+
+    def _needs_pr_commit_shas(self, repo_commits: List[Optional[List[Dict]]]) -> bool:
+        """REST APIで取得した（関連PR情報を持たない）コミット一覧が含まれるかを返す"""
+        return any(commits and "pull_requests" not in commits[0] for commits in repo_commits)
+
+    def _summarize_direct_commits(self, repo: Dict, commits: List[Dict], pr_commits: set, merged_prs: set) -> Optional[Dict]:
+        """
+        コミット一覧からPR経由・マージコミットを除いた直接コミットを集計
+
+        Args:
+            repo: リポジトリ情報
+            commits: コミット一覧
+            pr_commits: PRに含まれるコミットとsquashマージのコミットのSHA集合（REST API取得時の重複除外用）
+            merged_prs: 対象日にマージされたPRの (リポジトリ名, PR番号) 集合（GraphQL取得時の重複除外用）
+
+        Returns:
+            集計情報（直接コミットが無い場合はNone）
+        """
+        owner = repo["owner"]["login"]
+        name = repo["name"]
+        repo_key = f"{owner}/{name}"
+
+        # このリポジトリの直接コミットを集計
+        total_additions = 0
+        total_deletions = 0
+        direct_commit_count = 0
+
+        for commit in commits:
+            sha = commit["sha"]
+
+            # PRに含まれるコミット・squashマージのコミットは除外
+            if sha in pr_commits:
+                continue
+            if any((repo_key, number) in merged_prs for number in commit.get("pull_requests", [])):
                 continue
 
-        logger.info(f"{date} の直接コミットがあるリポジトリ数: {len(results)}")
-        return results
+            # マージコミットを除外（親が2つ以上）
+            if len(commit.get("parents", [])) > 1:
+                continue
+
+            if "stats" in commit:
+                # GraphQLで取得済みの変更行数を使用
+                stats = commit["stats"]
+            else:
+                # コミット詳細を取得して変更行数を確認
+                detail_resp = self.github_get(f"https://api.github.com/repos/{owner}/{name}/commits/{sha}")
+                detail_resp.raise_for_status()
+                detail = detail_resp.json()
+                stats = detail.get("stats", {})
+
+            total_additions += stats.get("additions") or 0
+            total_deletions += stats.get("deletions") or 0
+            direct_commit_count += 1
+
+        # このリポジトリに直接コミットがなければ結果に含めない
+        if direct_commit_count == 0:
+            return None
+
+        logger.info(f"  {repo_key}: {direct_commit_count} commits, +{total_additions}-{total_deletions}")
+        return {
+            "type": "commit",
+            "repo": repo_key,
+            "commit_count": direct_commit_count,
+            "additions": total_additions,
+            "deletions": total_deletions,
+            "url": f"https://github.com/{repo_key}/commits/{repo.get('default_branch', 'main')}"
+        }
 
     def get_pr_commit_shas(self, prs: List[Dict], repos: List[Dict]) -> set:
         """
-        PRに含まれるコミットのSHAを収集
+        PRに含まれるコミットのSHAを収集（PR単位で並列取得）
 
         Args:
             prs: PR情報リスト
@@ -475,40 +866,43 @@ class GitHubNotionSync:
         Returns:
             コミットSHAのセット
         """
-        commit_shas = set()
-
         # リポジトリ情報を辞書に変換（検索効率化）
         repo_dict = {f"{r['owner']['login']}/{r['name']}": r for r in repos}
+        target_prs = [pr for pr in prs if pr["repo"] in repo_dict]
 
-        for pr in prs:
-            repo_key = pr["repo"]
-            pr_number = pr["number"]
+        commit_shas = set()
+        for shas in self.map_parallel(self._fetch_pr_commit_shas, target_prs):
+            commit_shas.update(shas)
 
-            if repo_key not in repo_dict:
-                continue
+        logger.info(f"PR関連コミット数: {len(commit_shas)}")
+        return commit_shas
 
-            owner, name = repo_key.split("/")
+    def _fetch_pr_commit_shas(self, pr: Dict) -> List[str]:
+        """
+        1つのPRに含まれるコミットのSHAを取得
 
-            try:
-                # PRのコミット一覧を取得
-                resp = requests.get(
-                    f"https://api.github.com/repos/{owner}/{name}/pulls/{pr_number}/commits",
-                    headers=self.github_headers,
-                    params={"per_page": 100}
-                )
-                resp.raise_for_status()
-                commits = resp.json()
+        Args:
+            pr: PR情報
 
-                # コミットSHAを収集
-                for commit in commits:
-                    commit_shas.add(commit["sha"])
+        Returns:
+            コミットSHAのリスト（エラー時は空リスト）
+        """
+        repo_key = pr["repo"]
+        pr_number = pr["number"]
+        owner, name = repo_key.split("/")
 
-            except Exception as e:
-                logger.warning(f"PRコミット取得スキップ ({repo_key}#{pr_number}): {e}")
-                continue
+        try:
+            # PRのコミット一覧を取得
+            resp = self.github_get(
+                f"https://api.github.com/repos/{owner}/{name}/pulls/{pr_number}/commits",
+                params={"per_page": 100}
+            )
+            resp.raise_for_status()
+            return [commit["sha"] for commit in resp.json()]
 
-        logger.info(f"PR関連コミット数: {len(commit_shas)}")
-        return commit_shas
+        except Exception as e:
+            logger.warning(f"PRコミット取得スキップ ({repo_key}#{pr_number}): {e}")
+            return []
 
     def build_markdown(self, items: List[Dict]) -> str:
         """
@@ -581,7 +975,9 @@ class GitHubNotionSync:
 
     def find_notion_page(self, date: datetime.date) -> Optional[Dict]:
         """
-        指定日付のNotionページを検索
+        指定日付のNotionページを検索（「振り返り」チェックが入っていないページを優先）
+
+        期間処理ではrun()で読み込み済みの索引から引くため、日付ごとのクエリは発生しない
 
         Args:
             date: 対象日付
@@ -591,60 +987,49 @@ class GitHubNotionSync:
         """
         formatted_date = date.strftime("%Y-%m-%d")
 
-        payload = {
-            "filter": {
-                "property": "日付",
-                "date": {"equals": formatted_date}
-            },
-            "page_size": 1
-        }
-
         try:
             logger.info(f"Notion検索: database_id={self.database_id}, date={formatted_date}")
-            resp = requests.post(
-                f"https://api.notion.com/v1/databases/{self.database_id}/query",
-                headers=self.notion_headers,
-                json=payload
-            )
-            if not resp.ok:
-                logger.error(f"Notion API検索エラー: {resp.status_code} - {resp.text}")
-            resp.raise_for_status()
-            results = resp.json().get("results", [])
+            page = self.page_index.get_page(date)
 
-            if not results:
+            if not page:
                 logger.warning(f"{formatted_date} に対応するNotionページが見つかりません")
                 return None
 
-            logger.info(f"Notionページ発見: page_id={results[0]['id']}")
-            return results[0]
+            logger.info(f"Notionページ発見: page_id={page['id']}")
+            return page
 
         except Exception as e:
             logger.error(f"Notionページ検索エラー: {e}")
             raise
 
-    def update_notion_page(self, page_id: str, rich_text: List[Dict]) -> Dict:
+    def update_notion_page(self, page_id: str, rich_text: List[Dict], current_page: Optional[Dict] = None) -> Dict:
         """
         NotionページのGithubプロパティを更新
 
         Args:
             page_id: ページID
             rich_text: Notionのrich_text配列
+            current_page: 現在のページ情報（渡された場合、内容が同じなら書き込みを省略）
 
         Returns:
-            更新結果
+            更新結果（書き込みを省略した場合はcurrent_page）
         """
-        payload = {
-            "properties": {
-                "Github": {
-                    "rich_text": rich_text
-                }
+        properties = {
+            "Github": {
+                "rich_text": rich_text
             }
         }
+        if current_page is not None and not diff_properties(current_page, properties):
+            logger.info(f"NotionページのGithubプロパティは最新のため、更新をスキップします (page_id={page_id})")
+            return current_page
+
+        payload = {
+            "properties": properties
+        }
 
         try:
-            resp = requests.patch(
+            resp = self.notion_session.patch(
                 f"https://api.notion.com/v1/pages/{page_id}",
-                headers=self.notion_headers,
                 json=payload
             )
             if not resp.ok:
@@ -671,37 +1056,189 @@ class GitHubNotionSync:
 
             # ステップ1: リポジトリ一覧を取得
             logger.info("[Step 1/6] リポジトリ一覧を取得中...")
-            repos = self.get_owned_repos()
+            with span("github.list_repos"):
+                repos = self.get_owned_repos()
             if not repos:
                 logger.error("リポジトリが1つも取得できませんでした。GITHUB_TOKENの権限を確認してください。")
                 return False
 
             # ステップ2: GitHub活動データを取得
             logger.info("[Step 2/6] Issue・PR・コミットデータを取得中...")
-            issues = self.fetch_issues_for_date(date, repos)
-            prs = self.fetch_prs_for_date(date, repos)
+            with span("github.fetch"):
+                issues = self.fetch_issues_for_date(date, repos)
+                prs = self.fetch_prs_for_date(date, repos)
+
+                # 直接コミットを取得（PR経由のコミットは除外）
+                direct_commits = self.fetch_direct_commits_for_date(date, repos, prs)
+
+            return self.write_date(date, issues, prs, direct_commits)
+
+        except Exception as e:
+            logger.error(f"❌ {date} の処理中にエラーが発生しました: {e}", exc_info=True)
+            return False
+
+    def sync_range(self, dates: List[datetime.date]) -> int:
+        """
+        期間内のGitHub活動をまとめて取得し、日付（JST）ごとにNotionへ同期
+
+        Args:
+            dates: 対象日付のリスト（昇順・連続）
+
+        Returns:
+            同期に成功した日数
+        """
+        activity_by_date = self.collect_range(dates)
+        if activity_by_date is None:
+            return 0
+
+        success_count = 0
+        for date in dates:
+            if self.write_date(date, *activity_by_date[date]):
+                success_count += 1
+
+        return success_count
+
+    def collect_range(self, dates: List[datetime.date]) -> Optional[Dict[datetime.date, Tuple[List[Dict], List[Dict], List[Dict]]]]:
+        """
+        期間内のGitHub活動をまとめて取得し、日付（JST）ごとに振り分ける
+
+        リポジトリ一覧の取得は1回だけ行い、Issue・PR・コミットも期間全体を
+        リポジトリごとに1回のページネーションで取得してから日付ごとに振り分ける
 
-            # PRに含まれるコミ��トSHAを収集（重複除外用）
-            pr_commits = self.get_pr_commit_shas(prs, repos)
+        Args:
+            dates: 対象日付のリスト（昇順・連続）
+
+        Returns:
+            {日付: (Issue情報のリスト, PR情報のリスト, 直接コミットの集計情報リスト)}、取得失敗時はNone
+        """
+        start_date, end_date = dates[0], dates[-1]
+        logger.info(f"期間一括処理開始: {start_date} - {end_date} ({len(dates)}日)")
+
+        try:
+            # ステップ1: リポジトリ一覧を取得（期間全体で1回）
+            logger.info("[Step 1/6] リポジトリ一覧を取得中...")
+            with span("github.list_repos"):
+                repos = self.get_owned_repos()
+            if not repos:
+                logger.error("リポジトリが1つも取得できませんでした。GITHUB_TOKENの権限を確認してください。")
+                return None
+
+            # JST時間範囲をUTCに変換
+            start_jst = datetime.datetime.combine(start_date, datetime.time(0, 0), tzinfo=JST)
+            end_jst = datetime.datetime.combine(end_date, datetime.time(23, 59, 59, 999999), tzinfo=JST)
+            start_utc = start_jst.astimezone(datetime.timezone.utc)
+            end_utc = end_jst.astimezone(datetime.timezone.utc)
+
+            # ステップ2: 期間全体のGitHub活動データをリポジトリごとに一括取得
+            logger.info("[Step 2/6] 期間内のIssue・PR・コミットデータを一括取得中...")
+            with span("github.fetch"):
+                issues = [item for items in self.map_parallel(lambda repo: self._fetch_repo_issues(repo, start_utc, end_utc), repos) for item in items]
+                prs = [item for items in self.map_parallel(lambda repo: self._fetch_repo_prs(repo, start_utc, end_utc), repos) for item in items]
+                repo_commits = self.map_parallel(lambda repo: self._fetch_repo_commits_or_none(repo, start_jst, end_jst), repos)
+
+                # REST APIで取得したリポジトリがある場合のみ、PRのコミット一覧からSHAを収集
+                if self._needs_pr_commit_shas(repo_commits):
+                    pr_commit_shas = self.map_parallel(self._fetch_pr_commit_shas, prs)
+                else:
+                    pr_commit_shas = [[] for _ in prs]
+            logger.info(f"期間内の取得結果: Issues={len(issues)}, PRs={len(prs)}")
+
+        except Exception as e:
+            logger.error(f"❌ {start_date} - {end_date} の一括取得中にエラーが発生しました: {e}", exc_info=True)
+            return None
+
+        # 日付（JST）ごとに振り分け
+        issues_by_date = {}
+        for issue in issues:
+            issues_by_date.setdefault(issue["date"], []).append(issue)
+        prs_by_date = {}
+        pr_commits_by_date = {}
+        merged_prs_by_date = {}
+        for pr, shas in zip(prs, pr_commit_shas):
+            prs_by_date.setdefault(pr["date"], []).append(pr)
+            pr_commits_by_date.setdefault(pr["date"], set()).update(shas)
+            if pr.get("merge_commit_sha"):
+                pr_commits_by_date[pr["date"]].add(pr["merge_commit_sha"])
+            merged_prs_by_date.setdefault(pr["date"], set()).add((pr["repo"], pr["number"]))
+
+        activity_by_date = {}
+        for date in dates:
+            logger.info(f"日付ごとの集計: {date}")
+            pr_commits = pr_commits_by_date.get(date, set())
+            merged_prs = merged_prs_by_date.get(date, set())
+
+            def summarize(repo_and_commits):
+                repo, commits = repo_and_commits
+                if commits is None:
+                    return None
+                day_commits = [commit for commit in commits if self._commit_date(commit) == date]
+                try:
+                    return self._summarize_direct_commits(repo, day_commits, pr_commits, merged_prs)
+                except Exception as e:
+                    logger.warning(f"コミット取得スキップ ({repo['owner']['login']}/{repo['name']}): {e}")
+                    return None
+
+            with span("github.summarize_commits"):
+                direct_commits = [result for result in self.map_parallel(summarize, list(zip(repos, repo_commits))) if result is not None]
+            logger.info(f"{date} の直接コミットがあるリポジトリ数: {len(direct_commits)}")
+
+            activity_by_date[date] = (issues_by_date.get(date, []), prs_by_date.get(date, []), direct_commits)
 
-            # ���接コミットを取得
-            direct_commits = self.fetch_direct_commits_for_date(date, repos, pr_commits)
+        return activity_by_date
 
+    def _fetch_repo_commits_or_none(self, repo: Dict, start_jst: datetime.datetime, end_jst: datetime.datetime) -> Optional[List[Dict]]:
+        """コミット一覧を取得（エラー時はログを出してNone）"""
+        try:
+            return self._fetch_repo_commits(repo, start_jst, end_jst)
+        except Exception as e:
+            logger.warning(f"コミット取得スキップ ({repo['owner']['login']}/{repo['name']}): {e}")
+            return None
+
+    def _commit_date(self, commit: Dict) -> Optional[datetime.date]:
+        """コミットのコミット日時（JST）の日付を返す"""
+        committed_at = commit.get("commit", {}).get("committer", {}).get("date")
+        if not committed_at:
+            return None
+        committed_dt = datetime.datetime.fromisoformat(committed_at.rstrip("Z")).replace(tzinfo=datetime.timezone.utc)
+        return committed_dt.astimezone(JST).date()
+
+    def write_date(self, date: datetime.date, issues: List[Dict], prs: List[Dict], direct_commits: List[Dict]) -> bool:
+        """
+        取得済みのGitHub活動データを整形して指定日付のNotionページに書き込む
+
+        Args:
+            date: 対象日付
+            issues: Issue情報のリスト
+            prs: PR情報のリスト
+            direct_commits: 直接コミットの集計情報リスト
+
+        Returns:
+            成功時True、失敗時False
+        """
+        try:
             # ステップ3: データ統合
             all_items = issues + prs + direct_commits
             logger.info(f"[Step 3/6] 取得結果: Issues={len(issues)}, PRs={len(prs)}, DirectCommits={len(direct_commits)}")
 
-            # ログ用のMarkdown形式に整形
-            markdown = self.build_markdown(all_items)
-            logger.info(f"生成されたMarkdown:\n{markdown}")
+            with span("github.transform"):
+                # ログ用のMarkdown形式に整形
+                markdown = self.build_markdown(all_items)
+                logger.info(f"生成されたMarkdown:\n{markdown}")
 
-            # ステップ4: Notion用データ変換
-            rich_text = self.build_notion_rich_text(all_items)
+                # ステップ4: Notion用データ変換
+                rich_text = self.build_notion_rich_text(all_items)
             logger.info(f"[Step 4/6] Notionリッチテキスト要素数: {len(rich_text)}")
 
+            # 前回書き込んだ内容と同じならNotionへの書き込みを省略
+            content_hash = properties_hash(rich_text)
+            if self.watermarks.is_unchanged(WATERMARK_SOURCE, date, content_hash):
+                logger.info(f"✅ {date} のGitHub活動は前回の同期から変化がないため、Notionの更新をスキップします")
+                return True
+
             # ステップ5: Notionページを検索
             logger.info("[Step 5/6] Notionページを検索中...")
-            page = self.find_notion_page(date)
+            with span("notion.search"):
+                page = self.find_notion_page(date)
             if not page:
                 logger.error(f"{date} のNotionページが見つかりません。ページが作成済みか、DATABASE_IDが正しいか確認してください。")
                 return False
@@ -709,49 +1246,75 @@ class GitHubNotionSync:
             # ステップ6: Notionページを更新
             page_id = page["id"]
             logger.info(f"[Step 6/6] Notionページを更新中... (page_id={page_id})")
-            self.update_notion_page(page_id, rich_text)
-            logger.info(f"✅ {date} の��期が完了しました（リンク付きフォーマットで更新）")
+            with span("notion.write"):
+                updated = self.update_notion_page(page_id, rich_text, page)
+            apply_properties(page, updated)
+            self.watermarks.record(WATERMARK_SOURCE, date, content_hash)
+            logger.info(f"✅ {date} の同期が完了しました（リンク付きフォーマットで更新）")
 
             return True
 
         except Exception as e:
-            logger.error(f"❌ {date} の処理中にエラーが��生しました: {e}", exc_info=True)
+            logger.error(f"❌ {date} の処理中にエラーが発生しました: {e}", exc_info=True)
             return False
 
-    def run(self, date_arg: str):
+    def pending_dates(self) -> List[datetime.date]:
+        """
+        定期実行用の対象日付を返す
+        JST基準の昨日に加え、前回の同期日（ウォーターマーク）から空いている日付も含める
+        """
+        yesterday = datetime.datetime.now(JST).date() - datetime.timedelta(days=1)
+        dates = self.watermarks.pending_dates(WATERMARK_SOURCE, yesterday)
+        if len(dates) > 1:
+            logger.info(f"未同期の日付をまとめて処理します: {dates[0]} - {dates[-1]} ({len(dates)}日)")
+        return dates
+
+    def run(self, date_arg: Optional[str] = None):
         """
         メイン実行処理
 
         Args:
-            date_arg: 日付引数（"YYYYMMDD" または "YYYYMMDD-YYYYMMDD"）
+            date_arg: 日付引数（"YYYYMMDD" または "YYYYMMDD-YYYYMMDD"）。
+                      省略時は昨日（JST）と、前回の同期日以降の未同期の日付
         """
+        start_run("github")
         try:
-            dates = self.parse_date_range(date_arg)
+            dates = self.parse_date_range(date_arg) if date_arg else self.pending_dates()
             success_count = 0
 
-            for date in dates:
-                if self.sync_date(date):
-                    success_count += 1
+            # 対象期間のNotionページを1回の走査で索引化
+            self.page_index.load(dates[0], dates[-1])
+
+            if len(dates) > 1:
+                # 期間指定時はGitHubへの問い合わせを期間全体で1回にまとめる
+                success_count = self.sync_range(dates)
+            else:
+                for date in dates:
+                    if self.sync_date(date):
+                        success_count += 1
 
             logger.info(f"処理完了: {success_count}/{len(dates)} 件成功")
+            finish_run(start_date=str(dates[0]), end_date=str(dates[-1]), days=len(dates), succeeded=success_count)
 
             if success_count < len(dates):
                 sys.exit(1)
 
         except Exception as e:
             logger.error(f"実行エラー: {e}")
+            finish_run(status="error")
             sys.exit(1)
 
 
 def main():
     """メイン関数"""
-    if len(sys.argv) != 2:
-        print("使い方: python github_notion.py YYYYMMDD または YYYYMMDD-YYYYMMDD")
+    if len(sys.argv) > 2:
+        print("使い方: python github_notion.py [YYYYMMDD または YYYYMMDD-YYYYMMDD]")
         print("例: python github_notion.py 20250731")
         print("例: python github_notion.py 20250701-20250731")
+        print("例: python github_notion.py  # 昨日（JST）と前回の同期日以降の未同期の日付")
         sys.exit(1)
 
-    date_arg = sys.argv[1]
+    date_arg = sys.argv[1] if len(sys.argv) == 2 else None
     sync = GitHubNotionSync()
     sync.run(date_arg)
 
@@ -0,0 +1,86 @@
+"""
+心拍数の集計（平均・最大・最小・安静時心拍数・ゾーンごとの時間）
+
+1日分の心拍数をデータ点から array('d') に1回だけ取り出し、平均・最大・最小と、
+下位10%の平均（安静時心拍数の推定）を計算する。下位10%は全体を並べ替えずに
+numpy の部分選択（np.partition）で取り出すため、秒単位の記録で1日に数万点あっても
+並べ替えと中間のリストの作成が不要になる。
+ゾーンの境界を指定した場合は、同じバッファからゾーンごとの時間（分）も計算する。
+"""
+
+from array import array
+from collections import namedtuple
+
+import numpy as np
+
+# 安静時心拍数の推定に使う割合（下位 1/RESTING_FRACTION の平均）
+RESTING_FRACTION = 10
+NANOS_PER_MINUTE = 60 * 10 ** 9
+
+# 1日分の心拍数の集計値（丸める前の値）
+#   zone_minutes: ゾーンの境界を指定した場合のゾーンごとの時間（分）のリスト（指定しない場合はNone）
+HeartRateStats = namedtuple("HeartRateStats", ["count", "avg", "max", "min", "resting", "zone_minutes"])
+
+
+def parse_zone_bounds(value):
+    """
+    "100,120,140,160" 形式のゾーンの境界（bpm）を昇順のタプルにする（空ならNone）
+
+    Raises:
+        ValueError: 数値でない、または昇順でない場合
+    """
+    if not value or not value.strip():
+        return None
+    try:
+        bounds = tuple(float(item) for item in value.split(","))
+    except ValueError:
+        raise ValueError(f"心拍数ゾーンの境界はカンマ区切りの数値で指定してください: {value}")
+    if any(low >= high for low, high in zip(bounds, bounds[1:])):
+        raise ValueError(f"心拍数ゾーンの境界は昇順で指定してください: {value}")
+    return bounds
+
+
+def heart_rate_stats(points, zone_bounds=None):
+    """
+    心拍数のデータ点から平均・最大・最小・安静時心拍数（下位10%の平均）を計算する
+
+    Args:
+        points: データ点のリスト（value[0].fpVal が心拍数、ゾーンの時間には
+                startTimeNanos / endTimeNanos を使う）
+        zone_bounds: ゾーンの境界（bpm、昇順）。len(zone_bounds)+1 個のゾーン
+                     （最初の境界未満〜最後の境界以上）ごとの時間を計算する
+
+    Returns:
+        HeartRateStats: データ点が無い場合はNone
+    """
+    durations = None
+    if zone_bounds:
+        # 心拍数と時間を同じ走査で取り出す
+        rates, durations = array("d"), array("d")
+        for point in points:
+            rates.append(point['value'][0]['fpVal'])
+            durations.append(
+                (int(point.get('endTimeNanos', 0)) - int(point.get('startTimeNanos', 0))) / NANOS_PER_MINUTE
+            )
+    else:
+        rates = array("d", (point['value'][0]['fpVal'] for point in points))
+    count = len(rates)
+    if count == 0:
+        return None
+
+    buffer = np.frombuffer(rates, dtype=np.float64)
+    resting_count = max(1, count // RESTING_FRACTION)  # 最低1つは使用
+    lowest = np.partition(buffer, resting_count - 1)[:resting_count]
+    # 下位の値を小さい順に先頭から合計する（全体を並べ替えていた従来の計算と丸めの結果をそろえる）
+    resting = sum(np.sort(lowest).tolist()) / resting_count
+
+    zone_minutes = None
+    if zone_bounds:
+        zones = np.searchsorted(np.asarray(zone_bounds, dtype=np.float64), buffer, side="right")
+        zone_minutes = np.bincount(
+            zones, weights=np.frombuffer(durations, dtype=np.float64), minlength=len(zone_bounds) + 1
+        ).tolist()
+
+    return HeartRateStats(
+        count, float(buffer.sum()) / count, float(buffer.max()), float(buffer.min()), resting, zone_minutes
+    )
@@ -0,0 +1,144 @@
+"""
+条件付きリクエスト（ETag / Last-Modified）用のディスクキャッシュ
+
+前回のレスポンスのETag・Last-Modifiedと本文をSQLiteに保存し、次回は If-None-Match /
+If-Modified-Since を付けてリクエストする。GitHubは 304 Not Modified をレート制限に数えないため、
+変化のない一覧取得はキャッシュから本文を返すだけで済む。
+SQLiteファイルはGitHub Actionsのcacheアクションで実行間に持ち越せる。
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_CACHE_MAX_BYTES = 50 * 1024 * 1024  # 50MB
+
+# 304のときにキャッシュから復元するレスポンスヘッダー（ページネーション用のLinkなど）
+_STORED_HEADERS = ("Content-Type", "Link", "ETag", "Last-Modified")
+
+
+class ConditionalRequestCache:
+    """URL+パラメータをキーに、ETag・Last-Modified・本文を保存するLRUキャッシュ（SQLiteバックエンド）"""
+
+    def __init__(self, path, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(url, params=None, scope=""):
+        """
+        キャッシュキーを作る
+
+        Args:
+            url: リクエストURL
+            params: クエリパラメータ
+            scope: 認証情報ごとにキャッシュを分けるための識別子（トークンのハッシュなど）
+        """
+        items = sorted((str(k), str(v)) for k, v in (params or {}).items())
+        raw = json.dumps([scope, url, items], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def conditional_headers(self, key):
+        """保存済みのETag・Last-Modifiedから条件付きリクエスト用ヘッダーを返す（未保存なら空）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return {}
+        etag, last_modified = row
+        if etag:
+            return {"If-None-Match": etag}
+        if last_modified:
+            return {"If-Modified-Since": last_modified}
+        return {}
+
+    def load_response(self, key, url):
+        """
+        保存済みの本文から requests.Response を復元する（304を受け取った場合に使う）
+
+        Returns:
+            requests.Response（ステータス200）、未保存ならNone
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT headers, body FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+
+        headers, body = row
+        response = requests.Response()
+        response.status_code = 200
+        response._content = bytes(body)
+        response.headers = CaseInsensitiveDict(json.loads(headers))
+        response.url = url
+        response.encoding = "utf-8"
+        return response
+
+    def store(self, key, response):
+        """ETagまたはLast-Modifiedを持つ成功レスポンスを保存し、上限を超えた分を古い順に削除する"""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not response.ok or not (etag or last_modified):
+            return
+
+        headers = {name: response.headers[name] for name in _STORED_HEADERS if name in response.headers}
+        body = response.content
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, url, etag, last_modified, headers, body, size, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, response.url, etag, last_modified, json.dumps(headers), body, len(body), time.time())
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """合計サイズがmax_bytesを超えていれば、最後に使われた時刻が古いものから削除する（ロック取得済みで呼ぶ）"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY last_used ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
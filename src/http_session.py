@@ -0,0 +1,250 @@
+"""
+ホスト単位で共有するHTTPセッション
+
+モジュールごとに requests.get/post/patch を直接呼ぶと毎回TCP+TLS接続を張り直すため、
+ホストごとに1つの requests.Session（コネクションプール付き）をプロセス内で使い回す。
+認証ヘッダーなどの共通ヘッダーはセッション作成時に1度だけ設定し、
+429/5xx は指数バックオフで再試行する（Retry-After ヘッダーがあればそれに従う）。
+再試行するのは同じリクエストを繰り返しても結果が変わらないもの（GET/HEAD/PATCH と読み取り専用のPOST）
+だけで、ページ作成などのPOSTは送信前に失敗した場合（接続エラー）と 429 のときだけ再試行する。
+Notionのセッションはトークンバケットを通して送信し、インテグレーションのレート制限内に抑える
+（再試行のたびにトークンを取得する）。
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from instrumentation import record_http
+from rate_limit import get_notion_rate_limiter
+
+NOTION_API_BASE = "https://api.notion.com"
+NOTION_VERSION = "2022-06-28"
+GITHUB_API_BASE = "https://api.github.com"
+
+# ホストごとのコネクションプールの大きさ（環境変数 HTTP_POOL_SIZE で変更可能）
+DEFAULT_POOL_SIZE = 10
+# 再試行の設定（backoff_factor=0.5 → 0.5秒, 1秒, 2秒...）
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+SERVER_ERROR_STATUSES = (500, 502, 503, 504)
+# 何度送っても結果が変わらないメソッド（5xx・タイムアウトでも再試行する）
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "PATCH"})
+# 読み取り専用のPOST（ホスト, パスの正規表現）
+READ_ONLY_POSTS = (
+    ("api.notion.com", re.compile(r"^/v1/databases/[^/]+/query$")),
+    ("api.notion.com", re.compile(r"^/v1/search$")),
+    ("api.github.com", re.compile(r"^/graphql$")),  # クエリのみ（mutation は除く）
+)
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _pool_size():
+    return int(os.getenv("HTTP_POOL_SIZE", DEFAULT_POOL_SIZE))
+
+
+def _backoff_seconds(attempt):
+    """attempt 回目（0始まり）の再試行までの待ち時間（0.5秒, 1秒, 2秒...）"""
+    return DEFAULT_BACKOFF_FACTOR * (2 ** attempt)
+
+
+def _retry_after_seconds(response):
+    """Retry-After ヘッダー（秒数またはHTTP日付）の待ち時間。無い・解釈できない場合はNone"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _is_graphql_mutation(body):
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", "replace")
+    try:
+        query = json.loads(body or "{}").get("query", "")
+    except (ValueError, AttributeError):
+        return True  # 解釈できない場合は読み取り専用とみなさない
+    return query.lstrip().startswith("mutation")
+
+
+def _is_replay_safe(request):
+    """5xx・タイムアウトの後に同じリクエストを再送しても重複した書き込みにならないか"""
+    method = (request.method or "").upper()
+    if method in IDEMPOTENT_METHODS:
+        return True
+    if method != "POST":
+        return False
+    url = urlsplit(request.url)
+    for host, pattern in READ_ONLY_POSTS:
+        if url.netloc == host and pattern.match(url.path):
+            return host != "api.github.com" or not _is_graphql_mutation(request.body)
+    return False
+
+
+def _is_connect_error(error):
+    """リクエストを送信する前（接続の確立中）に失敗したか。送信後の切断・読み取りのタイムアウトはFalse"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.exceptions.ConnectionError) or isinstance(error, requests.exceptions.ReadTimeout):
+        return False
+    reason = error.args[0] if error.args else None
+    if isinstance(reason, MaxRetryError):
+        reason = reason.reason
+    return isinstance(reason, NewConnectionError)
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """
+    送信のたびにレートリミッターのトークンを1つ取得するHTTPAdapter
+    ホストごとのリクエスト数・レスポンスのバイト数・再試行回数を instrumentation に記録する
+
+    urllib3 の Retry はアダプターの下で再試行するため、再試行がレートリミッターを通らず、
+    URLのパスで再試行の可否を分けることもできない。retries を指定した場合は urllib3 の再試行を使わず
+    （max_retries=0 で作る）、このアダプターで再試行して、再試行ごとにトークンを取得する。
+      - GET/HEAD/PATCH・読み取り専用のPOST: 429/5xx・接続エラー・タイムアウトを再試行する
+      - それ以外（ページ作成のPOSTなど）: 429 と送信前の接続エラーだけを再試行する
+        （5xx・読み取りのタイムアウトは相手が処理済みの可能性があり、再送すると重複して作成される）
+    """
+
+    def __init__(self, rate_limiter=None, retries=0, retry_statuses=RETRY_STATUSES, **kwargs):
+        self.rate_limiter = rate_limiter
+        self.retries = retries
+        self.retry_statuses = tuple(retry_statuses)
+        super().__init__(**kwargs)
+
+    def _send_once(self, request, **kwargs):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        return super().send(request, **kwargs)
+
+    def send(self, request, **kwargs):
+        host = urlsplit(request.url).netloc
+        attempt = 0
+        while True:
+            try:
+                response = self._send_once(request, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt < self.retries and (_is_replay_safe(request) or _is_connect_error(e)):
+                    time.sleep(_backoff_seconds(attempt))
+                    attempt += 1
+                    continue
+                record_http(host, error=True)
+                raise
+            except Exception:
+                record_http(host, error=True)
+                raise
+
+            if (response.status_code in self.retry_statuses and attempt < self.retries
+                    and (response.status_code == 429 or _is_replay_safe(request))):
+                delay = _retry_after_seconds(response)
+                response.close()
+                time.sleep(_backoff_seconds(attempt) if delay is None else delay)
+                attempt += 1
+                continue
+            break
+
+        if kwargs.get("stream"):
+            nbytes = int(response.headers.get("Content-Length") or 0)
+        else:
+            nbytes = len(response.content)  # Session.send でも読み込まれるため先に読んでも追加の通信はない
+        record_http(host, nbytes, attempt, error=response.status_code >= 400)
+        return response
+
+
+def get_session(base_url, headers=None, pool_size=None, retry_statuses=RETRY_STATUSES, retries=DEFAULT_RETRIES,
+                rate_limiter=None):
+    """
+    base_url（スキーム+ホスト）とヘッダーの組ごとに共有セッションを返す
+
+    Args:
+        base_url: 例 "https://api.notion.com"
+        headers: セッションの既定ヘッダー
+        pool_size: コネクションプールの最大接続数（省略時は HTTP_POOL_SIZE）
+        retry_statuses: 再試行するHTTPステータス
+        retries: 最大再試行回数（ページ作成などのPOSTは 429・送信前の接続エラーのときだけ再試行する）
+        rate_limiter: 送信前に acquire() するレートリミッター（省略時は制限なし。再試行ごとにも acquire() する）
+
+    Returns:
+        requests.Session
+    """
+    headers = headers or {}
+    key = (base_url, tuple(sorted(headers.items())), tuple(retry_statuses))
+
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is not None:
+            return session
+
+        # 再試行の可否をメソッドとパスで決めるため、再試行は urllib3 ではなくアダプターで行う
+        # （レートリミッターを指定した場合は再試行ごとにトークンを取得する）
+        adapter = RateLimitedAdapter(
+            rate_limiter, retries=retries, retry_statuses=retry_statuses,
+            pool_connections=1, pool_maxsize=pool_size or _pool_size(), max_retries=0
+        )
+
+        session = requests.Session()
+        session.headers.update(headers)
+        session.mount(base_url, adapter)
+        _sessions[key] = session
+        return session
+
+
+def get_notion_session(notion_secret=None):
+    """
+    Notion API用の共有セッションを返す（認証・Notion-Versionヘッダー設定済み）
+    すべてのリクエストはNotion用のトークンバケット（rate_limit.get_notion_rate_limiter）を通る
+
+    Args:
+        notion_secret: Notion Integration トークン（省略時は環境変数 NOTION_SECRET）
+    """
+    notion_secret = notion_secret or os.getenv("NOTION_SECRET")
+    if not notion_secret:
+        raise ValueError("NOTION_SECRET environment variable is not set")
+
+    return get_session(NOTION_API_BASE, {
+        "Authorization": f"Bearer {notion_secret}",
+        "Content-Type": "application/json",
+        "Notion-Version": NOTION_VERSION
+    }, rate_limiter=get_notion_rate_limiter())
+
+
+def get_github_session(github_token=None, pool_size=None):
+    """
+    GitHub API用の共有セッションを返す（認証ヘッダー設定済み）
+
+    レート制限（403/429）は呼び出し側でX-RateLimit系ヘッダーを見て待機するため、
+    ここでは5xxのみ再試行する
+
+    Args:
+        github_token: GitHub Personal Access Token（省略時は環境変数 GITHUB_TOKEN）
+        pool_size: コネクションプールの最大接続数（並列取得数以上にする）
+    """
+    github_token = github_token or os.getenv("GITHUB_TOKEN")
+    if not github_token:
+        raise ValueError("GITHUB_TOKEN environment variable is not set")
+
+    return get_session(GITHUB_API_BASE, {
+        "Authorization": f"token {github_token}",
+        "Accept": "application/vnd.github+json"
+    }, pool_size=pool_size, retry_statuses=SERVER_ERROR_STATUSES)
@@ -0,0 +1,197 @@
+"""
+同期処理の計測（処理段階ごとの所要時間と、ホストごとのHTTPリクエスト数・バイト数・再試行回数）
+
+    with span("notion.write"):
+        ...
+
+のように処理段階を囲むと、段階名ごとの回数・合計時間・最大時間を集計する。
+HTTPリクエストは http_session の共有セッションが自動で記録する（googleapiclient など
+requests 以外の呼び出しは record_http() で記録する）。
+
+1回の実行（Cloud Functionsの1リクエスト、スクリプトの1実行）の終わりに finish_run() を呼ぶと、
+集計結果を1行のJSONとして標準出力に出す（Cloud Loggingでは構造化ログとして扱われる）。
+
+環境変数:
+    METRICS_FILE: 指定するとサマリーのJSON行をこのファイルに追記する
+    METRICS_OTEL: true の場合、各spanをOpenTelemetryのspanとしても記録する
+                  （cloud_trace の場合はCloud Traceへ送信。opentelemetry-sdk と
+                  opentelemetry-exporter-gcp-trace が必要）
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# 呼び出し元（データソース名など）のラベル。ブロック内のリクエストをラベルごとにも集計する
+_label = contextvars.ContextVar("instrumentation_label", default=None)
+
+_lock = threading.Lock()
+_run = {"name": None, "started": time.monotonic(), "attributes": {}}
+_spans = {}      # {name: {"count", "total_s", "max_s", "errors"}}
+_http = {}       # {host: {"calls", "bytes", "retries", "errors"}}
+_labels = {}     # {(label, host): calls}
+
+_tracer = None
+_tracer_initialized = False
+
+
+def _get_tracer():
+    """METRICS_OTEL が有効ならOpenTelemetryのtracerを返す（未インストール・無効ならNone）"""
+    global _tracer, _tracer_initialized
+    if _tracer_initialized:
+        return _tracer
+    _tracer_initialized = True
+
+    mode = os.getenv("METRICS_OTEL", "").lower()
+    if mode in ("", "false", "0"):
+        return None
+    try:
+        from opentelemetry import trace
+        if mode == "cloud_trace":
+            from opentelemetry.exporter.cloud_trace import CloudTraceSpanExporter
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+            provider = TracerProvider()
+            provider.add_span_processor(BatchSpanProcessor(CloudTraceSpanExporter()))
+            trace.set_tracer_provider(provider)
+        _tracer = trace.get_tracer("google-fit-notion-integration")
+    except ImportError as e:
+        print(f"警告: OpenTelemetryを使用できません（計測はローカル集計のみ）: {str(e)}")
+        _tracer = None
+    return _tracer
+
+
+@contextmanager
+def label(name):
+    """ブロック内（および同じコンテキストを引き継いだ処理）のHTTPリクエストを name で集計する"""
+    token = _label.set(name)
+    try:
+        yield
+    finally:
+        _label.reset(token)
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    処理段階の所要時間を計測する
+
+    Args:
+        name: 段階名（例: "fit.fetch", "notion.search", "notion.write"）
+        attributes: OpenTelemetryのspanに付ける属性（日付など）
+    """
+    tracer = _get_tracer()
+    otel_span = tracer.start_as_current_span(name, attributes=attributes) if tracer else None
+    started = time.monotonic()
+    failed = False
+    try:
+        if otel_span is not None:
+            with otel_span:
+                yield
+        else:
+            yield
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        elapsed = time.monotonic() - started
+        with _lock:
+            stats = _spans.setdefault(name, {"count": 0, "total_s": 0.0, "max_s": 0.0, "errors": 0})
+            stats["count"] += 1
+            stats["total_s"] += elapsed
+            stats["max_s"] = max(stats["max_s"], elapsed)
+            if failed:
+                stats["errors"] += 1
+
+
+def record_http(host, nbytes=0, retries=0, error=False):
+    """
+    HTTPリクエスト1回を記録する
+
+    Args:
+        host: 接続先ホスト
+        nbytes: レスポンス本文のバイト数
+        retries: このリクエストで発生した再試行の回数
+        error: 4xx/5xx・接続エラーで終わった場合True
+    """
+    with _lock:
+        stats = _http.setdefault(host, {"calls": 0, "bytes": 0, "retries": 0, "errors": 0})
+        stats["calls"] += 1
+        stats["bytes"] += nbytes
+        stats["retries"] += retries
+        if error:
+            stats["errors"] += 1
+        key = (_label.get(), host)
+        _labels[key] = _labels.get(key, 0) + 1
+
+
+def get_call_counts():
+    """
+    ラベル・ホストごとのリクエスト数を返す
+
+    Returns:
+        dict: {(ラベル, ホスト): 回数}（ラベル未設定の呼び出しはラベルNone）
+    """
+    with _lock:
+        return dict(_labels)
+
+
+def start_run(name, **attributes):
+    """新しい実行の集計を始める（それまでの集計は破棄する）"""
+    with _lock:
+        _run.update(name=name, started=time.monotonic(), attributes=attributes)
+        _spans.clear()
+        _http.clear()
+        _labels.clear()
+
+
+def summary():
+    """現在の実行の集計結果をdictで返す"""
+    with _lock:
+        return {
+            "event": "sync_run_summary",
+            "run": _run["name"],
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "duration_s": round(time.monotonic() - _run["started"], 3),
+            "attributes": dict(_run["attributes"]),
+            "spans": {
+                name: {**stats, "total_s": round(stats["total_s"], 3), "max_s": round(stats["max_s"], 3)}
+                for name, stats in sorted(_spans.items())
+            },
+            "http": {host: dict(stats) for host, stats in sorted(_http.items())},
+            "calls_by_label": {
+                f"{label_name or 'other'}:{host}": count
+                for (label_name, host), count in sorted(_labels.items(), key=lambda item: (str(item[0][0]), item[0][1]))
+            },
+        }
+
+
+def finish_run(**attributes):
+    """
+    実行の集計結果を1行のJSONで出力する（METRICS_FILE があれば追記も行う）
+
+    Returns:
+        dict: 出力したサマリー
+    """
+    with _lock:
+        _run["attributes"].update(attributes)
+    result = summary()
+    line = json.dumps({"severity": "INFO", "message": "sync run summary", **result}, ensure_ascii=False)
+    print(line, flush=True)
+
+    path = os.getenv("METRICS_FILE")
+    if path:
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            print(f"警告: 計測結果をファイルに書き込めません: {str(e)}")
+    return result
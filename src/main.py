@@ -5,18 +5,52 @@ from datetime import datetime, timedelta
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 from google.cloud import firestore
-from util import get_google_fit_data, update_notion_page_with_date
-from constants import OAUTH_SCOPE
-from activity_types import get_japanese_name
+from util import get_google_fit_data, get_google_fit_data_range, update_notion_page_with_date, get_firestore_client
+from constants import ACTIVITY_TYPES, OAUTH_SCOPE
+from notion_index import NotionDateIndex
+from watermark import get_watermark_store, properties_hash
+from instrumentation import finish_run, start_run
+from activity_types import ACTIVITY_IDS_BY_EN, ACTIVITY_NAMES_JA
 
 # 環境変数の取得
 GCP_PROJECT = os.getenv("GCP_PROJECT")
 
+# ウォームインスタンス間で再利用する認証情報（期限切れ間近まで使い回す）
+_cached_credentials = None
+# 同期ウォーターマーク（Firestoreの sync_watermarks/fit）
+WATERMARK_SOURCE = "fit"
+_watermark_store = None
+
+def get_watermarks():
+    """同期ウォーターマークのストアを返す（プロセス内で1つを使い回す）"""
+    global _watermark_store
+    if _watermark_store is None:
+        _watermark_store = get_watermark_store("firestore", firestore_client_factory=get_firestore_client)
+    return _watermark_store
+
 def get_credentials():
-    """Firestoreから認証情報を取得し、必要に応じて更新する"""
+    """
+    Firestoreから認証情報を取得し、必要に応じて更新する
+    取得済みの認証情報がプロセス内にあり期限内であれば、Firestoreを読まずにそれを返す
+    """
+    global _cached_credentials
+    if _cached_credentials is not None:
+        # expiredはライブラリ側で期限の数分前からTrueになる
+        if not _cached_credentials.expired:
+            return _cached_credentials
+        if _cached_credentials.refresh_token:
+            try:
+                print("キャッシュ済みトークンの期限が近いため更新中...")
+                _cached_credentials.refresh(Request())
+                save_credentials_to_firestore(_cached_credentials)
+                return _cached_credentials
+            except Exception as e:
+                print(f"キャッシュ済みトークンの更新に失敗しました。Firestoreから再取得します: {str(e)}")
+        _cached_credentials = None
+
     try:
         print("Firestoreから認証情報を取得中...")
-        db = firestore.Client()
+        db = get_firestore_client()
         doc_ref = db.collection(u'credentials').document(u'google_fit')
         doc = doc_ref.get()
 
@@ -44,6 +78,7 @@ def get_credentials():
             save_credentials_to_firestore(credentials)
             print("トークンを更新しました")
 
+        _cached_credentials = credentials
         return credentials
 
     except Exception as e:
@@ -53,7 +88,7 @@ def get_credentials():
 def save_credentials_to_firestore(credentials):
     """認証情報をFirestoreに保存"""
     try:
-        db = firestore.Client()
+        db = get_firestore_client()
         doc_ref = db.collection(u'credentials').document(u'google_fit')
         cred_dict = {
             'token': credentials.token,
@@ -69,19 +104,44 @@ def save_credentials_to_firestore(credentials):
     except Exception as e:
         print(f"Firestore保存中にエラーが発生しました: {str(e)}")
 
-def process_data_for_date(target_date):
-    """指定された日付のGoogle Fitデータを取得してNotionに記録する"""
+def format_activity_text(fit_data):
+    """
+    アクティビティ種類別の時間を「ウォーキング30分、ランニング20分」の形式にする（睡眠・0分は除く）
+
+    日本語名は集計時に持ち回したアクティビティタイプIDから索引で引く（IDが無い場合は英語名のまま）。
+    """
+    activity_summary = fit_data.get('activity_summary', {})
+    if not activity_summary:
+        return ""
+    activity_type_ids = fit_data.get('activity_type_ids', {})
+    activities = []
+    for activity, minutes in activity_summary.items():
+        activity_id = activity_type_ids.get(activity, ACTIVITY_IDS_BY_EN.get(activity))
+        if activity_id == ACTIVITY_TYPES["sleep"] or minutes <= 0:  # 睡眠は別で記録、0分は除外
+            continue
+        # "Other (Type XX)" 形式の場合はそのまま表示
+        activity_jp = ACTIVITY_NAMES_JA.get(activity_id, activity)
+        activities.append(f"{activity_jp}{minutes}分")
+    return "、".join(activities) if activities else "なし"
+
+def process_data_for_date(target_date, fit_data=None, page_index=None):
+    """
+    指定された日付のGoogle Fitデータを取得してNotionに記録する
+    fit_dataが渡された場合はGoogle Fitへの問い合わせを省略する（期間一括取得用）
+    page_indexが渡された場合はNotionページの検索に読み込み済みの索引を使う
+    """
     try:
         print(f"Processing data for date: {target_date}")
 
-        # 認証情報を取得
-        credentials = get_credentials()
-        if not credentials:
-            raise ValueError("認証情報が取得できません。scripts/utils/auth.pyを実行してください。")
+        if fit_data is None:
+            # 認証情報を取得
+            credentials = get_credentials()
+            if not credentials:
+                raise ValueError("認証情報が取得できません。scripts/utils/auth.pyを実行してください。")
 
-        # Google Fitからデータを取得
-        print("Fetching Google Fit data...")
-        fit_data = get_google_fit_data(credentials, target_date)
+            # Google Fitからデータを取得
+            print("Fetching Google Fit data...")
+            fit_data = get_google_fit_data(credentials, target_date)
         print("Retrieved Google Fit data:", json.dumps(fit_data, indent=2))
 
         # Notionのプロパティを更新
@@ -90,29 +150,7 @@ def process_data_for_date(target_date):
         print("Formatted date:", formatted_date)
 
         # アクティビティ詳細をテキスト形式に変換
-        activity_summary = fit_data.get('activity_summary', {})
-        activity_text = ""
-        if activity_summary:
-            activities = []
-            for activity, minutes in activity_summary.items():
-                if activity != 'Sleeping' and minutes > 0:  # 睡眠は別で記録、0分は除外
-                    # 英語名から日本語名に変換
-                    # ACTIVITY_TYPESを逆引きして、英語名からIDを見つける
-                    activity_id = None
-                    from activity_types import ACTIVITY_TYPES as ACTIVITY_TYPE_NAMES
-                    for type_id, names in ACTIVITY_TYPE_NAMES.items():
-                        if names["en"] == activity:
-                            activity_id = type_id
-                            break
-                    
-                    if activity_id is not None:
-                        activity_jp = ACTIVITY_TYPE_NAMES[activity_id]["ja"]
-                    else:
-                        # "Other (Type XX)" 形式の場合はそのまま表示
-                        activity_jp = activity
-                    
-                    activities.append(f"{activity_jp}{minutes}分")
-            activity_text = "、".join(activities) if activities else "なし"
+        activity_text = format_activity_text(fit_data)
         
         properties = {
             "移動距離 (km)": {"number": fit_data["distance"]},
@@ -156,10 +194,35 @@ def process_data_for_date(target_date):
 
         print("Updating Notion properties:", json.dumps(properties, indent=2))
 
+        # 前回書き込んだ内容と同じならNotionへの書き込みを省略
+        content_hash = properties_hash(properties)
+        try:
+            unchanged = get_watermarks().is_unchanged(WATERMARK_SOURCE, target_date, content_hash)
+        except Exception as e:
+            print(f"警告: ウォーターマークを確認できません（書き込みを続行します）: {str(e)}")
+            unchanged = False
+
+        if unchanged:
+            print(f"{formatted_date} のデータは前回の書き込みから変化がないため、Notionの更新をスキップします")
+            return {
+                "status": "success",
+                "message": f"Google Fit data for {formatted_date} is unchanged",
+                "details": {
+                    "date": formatted_date,
+                    "fit_data": fit_data,
+                    "skipped": True
+                }
+            }
+
         # ページを更新
-        res = update_notion_page_with_date(database_id, properties, target_date)
+        res = update_notion_page_with_date(database_id, properties, target_date, page_index)
         print("Notion API response:", json.dumps(res, indent=2))
 
+        try:
+            get_watermarks().record(WATERMARK_SOURCE, target_date, content_hash)
+        except Exception as e:
+            print(f"警告: ウォーターマークを記録できません: {str(e)}")
+
         return {
             "status": "success",
             "message": f"Successfully updated Google Fit data for {formatted_date}",
@@ -176,10 +239,60 @@ def process_data_for_date(target_date):
             "message": f"Failed to process Google Fit data: {str(e)}"
         }
 
+def process_data_for_dates(target_dates):
+    """
+    複数日付のGoogle Fitデータを期間一括で取得してNotionに記録する
+    （日付ごとにAPIを呼び出さず、最古〜最新の期間を1日単位のバケットでまとめて取得）
+    """
+    target_dates = sorted(set(target_dates))
+    if not target_dates:
+        return []
+
+    try:
+        credentials = get_credentials()
+        if not credentials:
+            raise ValueError("認証情報が取得できません。scripts/utils/auth.pyを実行してください。")
+
+        print(f"Fetching Google Fit data for range: {target_dates[0]} - {target_dates[-1]}")
+        fit_data_by_date = get_google_fit_data_range(credentials, target_dates[0], target_dates[-1])
+
+        # Notionページは期間全体を1回で索引化
+        page_index = NotionDateIndex(os.getenv("DATABASE_ID")).load(target_dates[0], target_dates[-1])
+    except Exception as e:
+        print(f"Error fetching Google Fit data range: {str(e)}")
+        return [{
+            "status": "error",
+            "message": f"Failed to process Google Fit data: {str(e)}"
+        } for _ in target_dates]
+
+    return [process_data_for_date(target_date, fit_data_by_date[target_date], page_index) for target_date in target_dates]
+
 def process_yesterday_data():
-    """昨日のデータを処理する"""
+    """
+    昨日のデータを処理する
+    前回の同期日（ウォーターマーク）から日付が空いている場合は、その間の日付もまとめて処理する
+    """
     yesterday = datetime.now().date() - timedelta(days=1)
-    return process_data_for_date(yesterday)
+    try:
+        target_dates = get_watermarks().pending_dates(WATERMARK_SOURCE, yesterday)
+    except Exception as e:
+        print(f"警告: ウォーターマークを取得できません（昨日のみ処理します）: {str(e)}")
+        target_dates = [yesterday]
+
+    if len(target_dates) == 1:
+        return process_data_for_date(target_dates[0])
+
+    print(f"未同期の日付をまとめて処理します: {target_dates[0]} - {target_dates[-1]} ({len(target_dates)}日)")
+    results = process_data_for_dates(target_dates)
+    errors = [r for r in results if r.get("status") != "success"]
+    return {
+        "status": "error" if errors else "success",
+        "message": f"Processed {len(results) - len(errors)}/{len(results)} dates "
+                   f"({target_dates[0]} - {target_dates[-1]})",
+        "details": {
+            "results": results
+        }
+    }
 
 def trigger_today():
     """今日のデータを処理する"""
@@ -189,6 +302,7 @@ def trigger_today():
 @functions_framework.cloud_event
 def handler(cloud_event):
     """Cloud Functionsのエントリーポイント（Pub/Subトリガー）"""
+    start_run("fit", trigger="pubsub")
     try:
         # Pub/Subメッセージからデータを取得
         import base64
@@ -215,10 +329,12 @@ def handler(cloud_event):
             result = process_yesterday_data()
 
         print("Processing result:", json.dumps(result, indent=2))
+        finish_run(status=result.get("status"))
         return result
 
     except Exception as e:
         print(f"Error in handler: {str(e)}")
+        finish_run(status="error")
         return {
             "status": "error",
             "message": f"Handler error: {str(e)}"
@@ -235,6 +351,7 @@ def http_handler(request):
             }
 
         if request.method == 'POST':
+            start_run("fit", trigger="http")
             request_json = request.get_json()
             date_str = request_json.get('message', '') if request_json else ''
 
@@ -247,6 +364,7 @@ def http_handler(request):
             else:
                 result = process_yesterday_data()
 
+            finish_run(status=result.get("status"))
             return result
 
         return {
@@ -256,6 +374,7 @@ def http_handler(request):
 
     except Exception as e:
         print(f"Error in http_handler: {str(e)}")
+        finish_run(status="error")
         return {
             "status": "error",
             "message": f"HTTP handler error: {str(e)}"
@@ -0,0 +1,105 @@
+"""
+Notionページの現在のプロパティ値と、これから書き込むプロパティの差分計算
+
+データベースのクエリ結果（NotionDateIndexが保持するページ）には全プロパティの現在値が含まれるため、
+書き込み前に比較して変化したプロパティだけをPATCHする。変化が無ければ書き込み自体を省略できる。
+ページ側は {"id": ..., "type": "number", "number": 1.2} のような読み取り形式、
+書き込み側は {"number": 1.2} のような更新形式なので、どちらも同じ比較用の値に正規化する。
+"""
+
+import json
+
+# rich_textの書式のうち既定値（比較時は既定値と異なるものだけを見る）
+_DEFAULT_COLOR = "default"
+
+
+def _property_type(prop):
+    """プロパティの型名を返す（読み取り形式は "type"、更新形式は "id" 以外の唯一のキー）"""
+    if "type" in prop and prop["type"] in prop:
+        return prop["type"]
+    keys = [key for key in prop if key not in ("id", "type")]
+    return keys[0] if len(keys) == 1 else None
+
+
+def _normalize_date_string(value):
+    return value.replace("/", "-") if isinstance(value, str) else value
+
+
+def _normalize_rich_text(items):
+    """
+    rich_text配列を (文字列, リンクURL, 書式) の列に正規化する
+
+    Notionは空文字の要素を保存せず、同じ書式の隣接要素の分け方も保証されないため、
+    空要素を除き、リンクと書式が同じ隣接要素は連結して比較する
+    """
+    segments = []
+    for item in items or []:
+        text = item.get("text") or {}
+        content = text.get("content", item.get("plain_text", ""))
+        if not content:
+            continue
+        link = text.get("link") or {}
+        annotations = item.get("annotations") or {}
+        style = tuple(sorted(
+            (key, value) for key, value in annotations.items()
+            if value and not (key == "color" and value == _DEFAULT_COLOR)
+        ))
+        key = (link.get("url"), style)
+        if segments and segments[-1][1] == key:
+            segments[-1][0] += content
+        else:
+            segments.append([content, key])
+    return tuple((content, url, style) for content, (url, style) in segments)
+
+
+def normalize_property(prop):
+    """
+    プロパティ値（読み取り形式・更新形式のどちらでも可）を比較用の値に変換する
+
+    未対応の型は値そのものをJSON文字列にして比較する
+    """
+    ptype = _property_type(prop)
+    value = prop.get(ptype) if ptype else None
+
+    if ptype == "number":
+        return ("number", None if value is None else float(value))
+    if ptype in ("rich_text", "title"):
+        return (ptype, _normalize_rich_text(value))
+    if ptype == "date":
+        if not value:
+            return ("date", None)
+        return ("date", _normalize_date_string(value.get("start")), _normalize_date_string(value.get("end")))
+    if ptype == "checkbox":
+        return ("checkbox", bool(value))
+    if ptype in ("select", "status"):
+        return (ptype, value.get("name") if value else None)
+    if ptype == "multi_select":
+        return (ptype, tuple(sorted(option.get("name") for option in value or [])))
+    if ptype in ("url", "email", "phone_number"):
+        return (ptype, value or None)
+    return (ptype, json.dumps(value, sort_keys=True, ensure_ascii=False))
+
+
+def diff_properties(page, properties):
+    """
+    ページの現在値と比較し、変化したプロパティだけを返す
+
+    Args:
+        page: Notionのページオブジェクト（クエリ結果・GET /pages の形式）
+        properties: 書き込み予定のプロパティ（更新形式）
+
+    Returns:
+        dict: 変化したプロパティ（変化が無ければ空のdict）
+    """
+    current = (page or {}).get("properties", {})
+    changed = {}
+    for name, prop in properties.items():
+        if name not in current or normalize_property(current[name]) != normalize_property(prop):
+            changed[name] = prop
+    return changed
+
+
+def apply_properties(page, response):
+    """PATCHのレスポンス（更新後のページ）のプロパティをページオブジェクトに反映する（索引を最新に保つため）"""
+    if page is not None and response and "properties" in response:
+        page.setdefault("properties", {}).update(response["properties"])
@@ -0,0 +1,156 @@
+"""
+Notion日記データベースの日付→ページ索引
+
+日付ごとに databases/{id}/query を発行する代わりに、対象期間をカーソルで1回だけ走査し、
+日付ごとのページ一覧をメモリ上に保持する。クエリ結果には全プロパティが含まれるため、
+「振り返り」チェックの確認にページ詳細（GET /pages/{id}）を取得する必要はない。
+"""
+
+import threading
+from datetime import date as date_type, datetime, timedelta
+
+from http_session import get_notion_session
+from instrumentation import span
+
+NOTION_QUERY_PAGE_SIZE = 100  # Notion APIの1リクエストあたりの最大件数
+
+# データベースID → プロパティ名の集合（データベースの情報はプロセス内で1回だけ取得する）
+_property_names = {}
+_property_names_lock = threading.Lock()
+
+
+def is_reflection_checked(page):
+    """ページの「振り返り」チェックが入っているかを返す（プロパティが無い場合はFalse）"""
+    reflection = page.get("properties", {}).get("振り返り")
+    if reflection is None:
+        return False
+    return bool(reflection.get("checkbox", False))
+
+
+def select_preferred_page(pages):
+    """
+    同じ日付の複数ページから更新対象を選ぶ
+    「振り返り」チェックが入っていないページを優先し、すべてチェック済みなら先頭ページを返す
+    """
+    if not pages:
+        return None
+    for page in pages:
+        if not is_reflection_checked(page):
+            return page
+    return pages[0]
+
+
+def _to_date(value):
+    """date / datetime / "YYYY-MM-DD" / "YYYY/MM/DD" を datetime.date に変換する"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date_type):
+        return value
+    return datetime.strptime(value.replace("/", "-")[:10], "%Y-%m-%d").date()
+
+
+def _page_date(page):
+    """ページの「日付」プロパティの開始日を返す（未設定ならNone）"""
+    date_prop = page.get("properties", {}).get("日付", {}).get("date")
+    if not date_prop or not date_prop.get("start"):
+        return None
+    return _to_date(date_prop["start"])
+
+
+class NotionDateIndex:
+    """日付→ページ一覧の索引（期間単位でまとめて読み込み、未読込の日付は必要時に読み込む）"""
+
+    def __init__(self, database_id, notion_secret=None):
+        self.database_id = database_id
+        self.session = get_notion_session(notion_secret)
+        self._pages = {}          # {date: [page, ...]}（クエリ結果の順序を保持）
+        self._loaded_dates = set()
+        self.query_count = 0
+
+    def load(self, start_date, end_date):
+        """
+        start_date〜end_date（両端含む）のページを一括で読み込む
+
+        Returns:
+            NotionDateIndex: メソッドチェーン用に自身を返す
+        """
+        start_date = _to_date(start_date)
+        end_date = _to_date(end_date)
+        if end_date < start_date:
+            raise ValueError("開始日は終了日より前である必要があります")
+
+        payload = {
+            "filter": {
+                "and": [
+                    {"property": "日付", "date": {"on_or_after": start_date.isoformat()}},
+                    {"property": "日付", "date": {"on_or_before": end_date.isoformat()}}
+                ]
+            },
+            "page_size": NOTION_QUERY_PAGE_SIZE
+        }
+
+        url = f"https://api.notion.com/v1/databases/{self.database_id}/query"
+        pages = {}
+        with span("notion.index_load"):
+            while True:
+                response = self.session.post(url, json=payload)
+                self.query_count += 1
+                if not response.ok:
+                    print(f"Notion API error: {response.status_code} - {response.text}")
+                response.raise_for_status()
+                body = response.json()
+
+                for page in body.get("results", []):
+                    page_date = _page_date(page)
+                    if page_date is not None:
+                        pages.setdefault(page_date, []).append(page)
+
+                if not body.get("has_more") or not body.get("next_cursor"):
+                    break
+                payload["start_cursor"] = body["next_cursor"]
+
+        current = start_date
+        while current <= end_date:
+            self._pages[current] = pages.get(current, [])
+            self._loaded_dates.add(current)
+            current += timedelta(days=1)
+
+        print(f"Notion索引を作成しました: {start_date} - {end_date} "
+              f"({sum(len(v) for v in pages.values())}ページ, 累計クエリ{self.query_count}回)")
+        return self
+
+    def get_pages(self, target_date):
+        """指定日付のページ一覧を返す（未読込の日付はその日だけ読み込む）"""
+        target_date = _to_date(target_date)
+        if target_date not in self._loaded_dates:
+            self.load(target_date, target_date)
+        return self._pages.get(target_date, [])
+
+    def get_page(self, target_date):
+        """指定日付の更新対象ページ（「振り返り」未チェック優先）を返す。無ければNone"""
+        return select_preferred_page(self.get_pages(target_date))
+
+    def property_names(self):
+        """
+        データベースのプロパティ名の集合を返す
+
+        データベースの情報（GET /databases/{id}）はデータベースごとにプロセス内で1回だけ取得する
+        （日付ごとに索引を作り直す場合も取得し直さない）
+        """
+        with _property_names_lock:
+            names = _property_names.get(self.database_id)
+            if names is None:
+                with span("notion.retrieve_database"):
+                    response = self.session.get(f"https://api.notion.com/v1/databases/{self.database_id}")
+                if not response.ok:
+                    print(f"Notion API error: {response.status_code} - {response.text}")
+                response.raise_for_status()
+                names = frozenset(response.json().get("properties", {}))
+                _property_names[self.database_id] = names
+        return names
+
+    def add_page(self, page):
+        """新規作成したページを索引に追加する（同じ実行内の後続処理で再検索しないため）"""
+        page_date = _page_date(page)
+        if page_date is not None and page_date in self._loaded_dates:
+            self._pages.setdefault(page_date, []).append(page)
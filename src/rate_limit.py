@@ -0,0 +1,135 @@
+"""
+Notion APIのレート制限（インテグレーションあたり平均約3リクエスト/秒）に合わせたトークンバケット
+
+プロセス内ではスレッド間で1つのバケットを共有する。batch_process.sh -p N のように
+複数プロセスが同じインテグレーションを使う場合は、NOTION_RATE_LIMIT_PATH にSQLiteファイルを
+指定するとプロセス間でバケットを共有し、全体で上限を超えないように待機する。
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+# Notionの上限（平均3リクエスト/秒）を少し下回る既定値（上限ちょうどだと時計のずれや再試行で429になる）
+DEFAULT_NOTION_RATE = 2.5
+DEFAULT_NOTION_BURST = 2
+
+# SQLiteのロック待ちの上限（秒）
+_SQLITE_TIMEOUT = 30.0
+
+_notion_limiter = None
+_notion_limiter_lock = threading.Lock()
+
+
+class TokenBucket:
+    """スレッドセーフなトークンバケット（rate個/秒で補充、最大capacity個まで貯まる）"""
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited_seconds = 0.0
+
+    def _try_acquire(self):
+        """トークンを1つ取れればNone、取れなければ補充までの待ち秒数を返す"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return None
+            return (1.0 - self._tokens) / self.rate
+
+    def acquire(self):
+        """トークンが取れるまで待機する"""
+        while True:
+            wait = self._try_acquire()
+            if wait is None:
+                return
+            self.waited_seconds += wait
+            time.sleep(wait)
+
+
+class SQLiteTokenBucket(TokenBucket):
+    """
+    SQLiteファイルにバケットの状態を置き、複数プロセスで共有するトークンバケット
+
+    BEGIN IMMEDIATE で書き込みロックを取ってから残量を更新するため、同時に取得しても
+    トークンを重複して消費することはない。時刻はプロセス間で共通の time.time() を使う。
+    """
+
+    def __init__(self, path, rate, capacity=None, name="notion"):
+        super().__init__(rate, capacity)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.name = name
+        self._conn = sqlite3.connect(path, timeout=_SQLITE_TIMEOUT, isolation_level=None, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _try_acquire(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._conn.execute(
+                    "SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)
+                ).fetchone()
+                tokens, updated = row if row else (self.capacity, now)
+                tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+                wait = None
+                if tokens >= 1.0:
+                    tokens -= 1.0
+                else:
+                    wait = (1.0 - tokens) / self.rate
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                    (self.name, tokens, now)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return wait
+
+
+def get_notion_rate_limiter():
+    """
+    Notion API用のトークンバケットを返す（プロセス内で1つを共有）
+
+    環境変数:
+        NOTION_RATE_LIMIT: 1秒あたりのリクエスト数（デフォルト: 2.5、0 で無効）
+        NOTION_RATE_LIMIT_BURST: 連続して送れる最大リクエスト数（デフォルト: 2）
+        NOTION_RATE_LIMIT_PATH: 指定するとSQLiteファイルでプロセス間共有する
+
+    Returns:
+        TokenBucket、無効の場合はNone
+    """
+    global _notion_limiter
+    with _notion_limiter_lock:
+        if _notion_limiter is not None:
+            return _notion_limiter or None
+
+        rate = float(os.getenv("NOTION_RATE_LIMIT", DEFAULT_NOTION_RATE))
+        burst = float(os.getenv("NOTION_RATE_LIMIT_BURST", DEFAULT_NOTION_BURST))
+        path = os.getenv("NOTION_RATE_LIMIT_PATH")
+        if rate <= 0:
+            _notion_limiter = False
+        elif path:
+            try:
+                _notion_limiter = SQLiteTokenBucket(path, rate, burst)
+            except sqlite3.Error as e:
+                print(f"警告: プロセス間共有のレート制限を使用できません（プロセス内のみで制限します）: {str(e)}")
+                _notion_limiter = TokenBucket(rate, burst)
+        else:
+            _notion_limiter = TokenBucket(rate, burst)
+        return _notion_limiter or None
@@ -10,15 +10,22 @@
 
 import sys
 import os
-import requests
 import json
 from datetime import datetime
+from urllib.parse import urlsplit
 import argparse
 import traceback
 
+from http_session import get_session
+
 # Cloud Function（またはローカルのprocess_data_for_date）を呼び出すか選択
 USE_CLOUD_FUNCTION = True  # Trueの場合はCloud Functionを呼び出し、Falseの場合はローカル関数を呼び出す
 
+def _origin(url):
+    """URLからスキーム+ホスト部分を取り出す（共有セッションのキー用）"""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
 def call_cloud_function(date_str):
     """
     Cloud Functionを呼び出して特定の日付のデータを処理する
@@ -47,7 +54,7 @@ def call_cloud_function(date_str):
     try:
         # Cloud Functionを呼び出し
         print(f"日付 {date_str} のデータを処理中...")
-        response = requests.post(function_url, headers=headers, json=body)
+        response = get_session(_origin(function_url)).post(function_url, headers=headers, json=body)
 
         if response.status_code == 200:
             result = response.json()
@@ -101,6 +108,37 @@ def process_date_locally(date_str):
         traceback.print_exc()
         return False
 
+def process_dates_locally(date_strs):
+    """
+    複数の日付をローカルでまとめて処理する（Google Fitは期間一括取得）
+
+    Args:
+        date_strs: YYYY-MM-DD形式の日付文字列のリスト
+
+    Returns:
+        tuple: (成功件数, エラー件数)
+    """
+    try:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        if script_dir not in sys.path:
+            sys.path.append(script_dir)
+
+        from main import process_data_for_dates
+
+        date_objs = [datetime.strptime(date_str, "%Y-%m-%d").date() for date_str in date_strs]
+
+        print(f"{len(date_objs)}日分のデータをローカルで一括処理中...")
+        results = process_data_for_dates(date_objs)
+
+        success_count = sum(1 for result in results if result.get("status") == "success")
+        return success_count, len(results) - success_count
+
+    except Exception as e:
+        print(f"エラー: ローカル一括処理中に例外が発生しました: {str(e)}")
+        print("詳細なエラー情報:")
+        traceback.print_exc()
+        return 0, len(date_strs)
+
 def validate_date(date_str):
     """
     日付形式を検証する
@@ -132,13 +170,23 @@ def main():
     success_count = 0
     error_count = 0
 
-    # 各日付を処理
+    valid_dates = []
     for date_str in args.dates:
         if not validate_date(date_str):
             print(f"エラー: '{date_str}' は有効な日付形式（YYYY-MM-DD）ではありません")
             error_count += 1
             continue
+        valid_dates.append(date_str)
+
+    # ローカル処理で複数日付の場合はGoogle Fitを期間一括取得
+    if not USE_CLOUD_FUNCTION and len(valid_dates) > 1:
+        batch_success, batch_error = process_dates_locally(valid_dates)
+        success_count += batch_success
+        error_count += batch_error
+        valid_dates = []
 
+    # 各日付を処理
+    for date_str in valid_dates:
         if USE_CLOUD_FUNCTION:
             success = call_cloud_function(date_str)
         else:
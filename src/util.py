@@ -1,15 +1,50 @@
 import os
-import requests
 from datetime import datetime, time as dt_time, timedelta
 from googleapiclient.discovery import build
 import time
-from constants import DATA_TYPES, ACTIVITY_TYPES
-from activity_types import get_english_name
+import calendar
+from bisect import bisect_left
+from constants import DATA_TYPES, ACTIVITY_TYPES, SESSION_APP_PRIORITY, SESSION_PRIORITY_ALWAYS_KEEP
+from activity_types import canonical_activity_id, get_english_name
+from heart_rate import heart_rate_stats, parse_zone_bounds
+from http_session import get_notion_session
+from instrumentation import record_http, span
+from notion_diff import diff_properties, apply_properties
+from notion_index import NotionDateIndex, select_preferred_page, is_reflection_checked
 import json
 from google.cloud import firestore
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 
+# プロセス存続中（Cloud Functionsのウォームインスタンス間）で再利用するクライアントのキャッシュ
+_firestore_client = None
+_fitness_service_cache = {"credentials": None, "service": None}
+
+def get_firestore_client():
+    """
+    Firestoreクライアントを取得する（プロセス内で1度だけ生成して再利用）
+    """
+    global _firestore_client
+    if _firestore_client is None:
+        _firestore_client = firestore.Client()
+    return _firestore_client
+
+def get_fitness_service(credentials):
+    """
+    Google Fitのサービスクライアントを取得する
+    同じ認証情報オブジェクトに対しては生成済みのクライアントを再利用し、
+    ディスカバリドキュメントはライブラリ同梱の静的ドキュメントを使う（ネットワーク取得なし）
+    """
+    if _fitness_service_cache["credentials"] is not credentials or _fitness_service_cache["service"] is None:
+        _fitness_service_cache["service"] = build(
+            "fitness", "v1",
+            credentials=credentials,
+            static_discovery=True,
+            cache_discovery=False
+        )
+        _fitness_service_cache["credentials"] = credentials
+    return _fitness_service_cache["service"]
+
 def convert_date_format(date_str, to_iso=True):
     """
     日付フォーマットを変換する
@@ -23,88 +58,35 @@ def convert_date_format(date_str, to_iso=True):
         # YYYY-MM-DD → YYYY/MM/DD
         return date_str.replace('-', '/')
 
-def search_notion_page(database_id, date):
+def search_notion_page(database_id, date, page_index=None):
     """
     指定された日付のページをNotionデータベースから検索する
     複数のエントリーがある場合、「振り返り」チェックが入っていないエントリーを優先的に返す
+    page_indexが渡された場合は読み込み済みの索引から検索する（期間処理用）
     """
-    notion_secret = os.getenv("NOTION_SECRET")
-    if not notion_secret:
-        raise ValueError("NOTION_SECRET environment variable is not set")
-
-    headers = {
-        "Authorization": f"Bearer {notion_secret}",
-        "Content-Type": "application/json",
-        "Notion-Version": "2022-06-28"
-    }
-
-    url = f"https://api.notion.com/v1/databases/{database_id}/query"
+    if page_index is None:
+        page_index = NotionDateIndex(database_id)
 
     # 日付をISO形式に変換
     iso_date = convert_date_format(date, to_iso=True)
 
-    data = {
-        "filter": {
-            "property": "日付",
-            "date": {
-                "equals": iso_date
-            }
-        }
-    }
-
-    print(f"Search request data: {data}")  # デバッグ用
-    response = requests.post(url, headers=headers, json=data)
-    if not response.ok:
-        print(f"Notion API error: {response.status_code} - {response.text}")
-    response.raise_for_status()
-    results = response.json().get("results", [])
-    
-    if not results:
+    pages = page_index.get_pages(iso_date)
+    if not pages:
         return None
-    
-    # 複数のエントリーがある場合、「振り返り」チェックが入っていないエントリーを優先選択
-    for page in results:
-        page_id = page["id"]
-        
-        # ページの詳細情報を取得して「振り返り」プロパティを確認
-        try:
-            page_details_response = requests.get(
-                f"https://api.notion.com/v1/pages/{page_id}",
-                headers=headers
-            )
-            if page_details_response.ok:
-                page_details = page_details_response.json()
-                
-                # 「振り返り」プロパティが存在し、チェックされているか確認
-                if "振り返り" in page_details["properties"]:
-                    is_reflection_checked = page_details["properties"]["振り返り"].get("checkbox", False)
-                    if not is_reflection_checked:  # チェックが入っていない場合
-                        return page
-                else:
-                    # 「振り返り」プロパティが存在しない場合も優先対象とする
-                    return page
-        except Exception as e:
-            print(f"Warning: Failed to check reflection property for page {page_id}: {str(e)}")
-            # エラーが発生した場合はそのページを返す
-            return page
-    
-    # すべてのエントリーで「振り返り」チェックが入っている場合、最初のエントリーを返す
-    print(f"Warning: All entries for date {iso_date} have reflection checkbox checked.")
-    return results[0]
 
-def update_notion_page(page_id, properties):
+    page = select_preferred_page(pages)
+    if is_reflection_checked(page):
+        # すべてのエントリーで「振り返り」チェックが入っている場合、最初のエントリーを返す
+        print(f"Warning: All entries for date {iso_date} have reflection checkbox checked.")
+    return page
+
+def update_notion_page(page_id, properties, current_page=None):
     """
     既存のNotionページを更新する
+    current_pageが渡された場合は現在のプロパティ値と比較し、変化したプロパティだけを送信する
+    （変化が無ければ書き込まずにcurrent_pageを返す）
     """
-    notion_secret = os.getenv("NOTION_SECRET")
-    if not notion_secret:
-        raise ValueError("NOTION_SECRET environment variable is not set")
-
-    headers = {
-        "Authorization": f"Bearer {notion_secret}",
-        "Content-Type": "application/json",
-        "Notion-Version": "2022-06-28"
-    }
+    session = get_notion_session()
 
     url = f"https://api.notion.com/v1/pages/{page_id}"
 
@@ -113,12 +95,20 @@ def update_notion_page(page_id, properties):
         date_str = properties["日付"]["date"]["start"]
         properties["日付"]["date"]["start"] = convert_date_format(date_str, to_iso=True)
 
+    if current_page is not None:
+        changed = diff_properties(current_page, properties)
+        if not changed:
+            print(f"No property changes for page {page_id}, skipping update")
+            return current_page
+        print(f"Changed properties: {', '.join(changed)} ({len(changed)}/{len(properties)})")
+        properties = changed
+
     data = {
         "properties": properties
     }
 
     print(f"Update request data: {data}")  # デバッグ用
-    response = requests.patch(url, headers=headers, json=data)
+    response = session.patch(url, json=data)
     if not response.ok:
         print(f"Notion API error: {response.status_code} - {response.text}")
     response.raise_for_status()
@@ -128,15 +118,7 @@ def create_notion_page(database_id, title, properties):
     """
     Notionのデータベースに新しいページを作成する
     """
-    notion_secret = os.getenv("NOTION_SECRET")
-    if not notion_secret:
-        raise ValueError("NOTION_SECRET environment variable is not set")
-
-    headers = {
-        "Authorization": f"Bearer {notion_secret}",
-        "Content-Type": "application/json",
-        "Notion-Version": "2022-06-28"
-    }
+    session = get_notion_session()
 
     url = "https://api.notion.com/v1/pages"
 
@@ -162,53 +144,47 @@ def create_notion_page(database_id, title, properties):
     }
 
     print(f"Create request data: {data}")  # デバッグ用
-    response = requests.post(url, headers=headers, json=data)
+    response = session.post(url, json=data)
     if not response.ok:
         print(f"Notion API error: {response.status_code} - {response.text}")
     response.raise_for_status()
     return response.json()
 
-def get_google_fit_data(credentials, date):
+# 範囲取得時に1回のAPI呼び出しで扱う最大日数（aggregateの期間上限対策）
+FIT_RANGE_CHUNK_DAYS = 30
+DAY_MILLIS = 24 * 60 * 60 * 1000
+# Google Fit APIのホスト（googleapiclient経由の呼び出しもリクエスト数に含めるため）
+FIT_API_HOST = "fitness.googleapis.com"
+
+def _local_millis(dt):
+    """ローカル時刻のdatetimeをUNIXミリ秒に変換する"""
+    return int(time.mktime(dt.timetuple()) * 1000)
+
+def _utc_millis(dt):
+    """naiveなdatetimeをUTCとみなしてUNIXミリ秒に変換する（sessions APIの"Z"指定に合わせる）"""
+    return int(calendar.timegm(dt.timetuple()) * 1000)
+
+def _heart_rate_zone_bounds():
+    """心拍数ゾーンの境界（環境変数 HEART_RATE_ZONES、例: 100,120,140,160。未設定ならNone）"""
+    return parse_zone_bounds(os.getenv("HEART_RATE_ZONES", ""))
+
+def _summarize_bucket(bucket):
     """
-    Google Fitからデータを取得する
+    aggregate APIの1日分のバケットから日次の集計値を計算する
     """
-    fitness_service = build("fitness", "v1", credentials=credentials)
-    start_time = datetime.combine(date, dt_time.min)
-    end_time = datetime.combine(date, dt_time.max)
-    start_unix_time_millis = int(time.mktime(start_time.timetuple()) * 1000)
-    end_unix_time_millis = int(time.mktime(end_time.timetuple()) * 1000)
-    
-    # 変数初期化
-    resting_heart_rate = 0
-    latest_body_fat = 0
-
-    activity_request_body = {
-        "aggregateBy": [
-            {"dataTypeName": DATA_TYPES["distance"]},
-            {"dataTypeName": DATA_TYPES["steps"]},
-            {"dataTypeName": DATA_TYPES["calories"]},
-            {"dataTypeName": DATA_TYPES["active_minutes"]},  # Heart Points
-            {"dataTypeName": DATA_TYPES["heart_rate"]},
-            {"dataTypeName": DATA_TYPES["oxygen"]},
-            {"dataTypeName": DATA_TYPES["weight"]},
-            {"dataTypeName": DATA_TYPES["body_fat"]},  # 体脂肪率
-        ],
-        "bucketByTime": {
-            "durationMillis": end_unix_time_millis - start_unix_time_millis
-        },
-        "startTimeMillis": start_unix_time_millis,
-        "endTimeMillis": end_unix_time_millis,
-    }
+    datasets = bucket.get("dataset", []) if bucket else []
 
-    dataset = fitness_service.users().dataset().aggregate(userId="me", body=activity_request_body).execute()
-    bucket = dataset.get("bucket")[0]
+    def points(index):
+        if index < len(datasets):
+            return datasets[index].get('point', [])
+        return []
 
-    distance = round(sum([point['value'][0]['fpVal'] for point in bucket.get("dataset")[0]['point']]) / 1000, 1)
-    steps = sum([point['value'][0]['intVal'] for point in bucket.get("dataset")[1]['point']])
-    calories = round(sum([point['value'][0]['fpVal'] for point in bucket.get("dataset")[2]['point']]), 1)
+    distance = round(sum([point['value'][0]['fpVal'] for point in points(0)]) / 1000, 1)
+    steps = sum([point['value'][0]['intVal'] for point in points(1)])
+    calories = round(sum([point['value'][0]['fpVal'] for point in points(2)]), 1)
     # Heart Points を計算（活動強度の指標）
     try:
-        heart_points_data = bucket.get("dataset")[3].get('point', [])
+        heart_points_data = points(3)
         if heart_points_data:
             active_minutes = int(sum([point['value'][0]['fpVal'] for point in heart_points_data]))
             # デバッグログ（高強度活動の記録）
@@ -219,111 +195,34 @@ def get_google_fit_data(credentials, date):
     except (KeyError, IndexError, TypeError) as e:
         print(f"Warning: Failed to get Heart Points data: {e}")
         active_minutes = 0
-    
+
     # Move Minutes は利用できない場合があるため、代替値を使用
     move_minutes = 0  # Move Minutesが利用できない環境のため0に設定
-    
-    heart_rate_data = bucket.get("dataset")[4].get('point', [])
-    if heart_rate_data:
-        heart_rates = [point['value'][0]['fpVal'] for point in heart_rate_data]
-        avg_heart_rate = round(sum(heart_rates) / len(heart_rates), 1)
-        max_heart_rate = round(max(heart_rates), 1)
-        min_heart_rate = round(min(heart_rates), 1)
-        
+
+    heart_rate = heart_rate_stats(points(4), _heart_rate_zone_bounds())
+    if heart_rate:
+        avg_heart_rate = round(heart_rate.avg, 1)
+        max_heart_rate = round(heart_rate.max, 1)
+        min_heart_rate = round(heart_rate.min, 1)
         # 安静時心拍数を推定（下位10%の心拍数の平均）
-        sorted_rates = sorted(heart_rates)
-        resting_count = max(1, len(sorted_rates) // 10)  # 最低1つは使用
-        resting_heart_rate = round(sum(sorted_rates[:resting_count]) / resting_count, 1)
+        resting_heart_rate = round(heart_rate.resting, 1)
     else:
         avg_heart_rate = max_heart_rate = min_heart_rate = resting_heart_rate = 0
 
-    oxygen_data = bucket.get("dataset")[5].get('point', [])
+    oxygen_data = points(5)
     avg_oxygen = round(sum([point['value'][0]['fpVal'] for point in oxygen_data]) / len(oxygen_data), 1) if oxygen_data else 0
 
-    weight_data = bucket.get("dataset")[6].get('point', [])
+    weight_data = points(6)
     latest_weight = round(weight_data[-1]['value'][0]['fpVal'], 1) if weight_data else 0
-    
+
     # 体脂肪率データ
     try:
-        body_fat_data = bucket.get("dataset")[7].get('point', [])
+        body_fat_data = points(7)
         latest_body_fat = round(body_fat_data[-1]['value'][0]['fpVal'], 1) if body_fat_data else 0
     except (KeyError, IndexError, TypeError):
         latest_body_fat = 0  # 体脂肪率データが無い場合
 
-    sleep_request = fitness_service.users().sessions().list(
-        userId="me",
-        startTime=start_time.isoformat() + "Z",
-        endTime=end_time.isoformat() + "Z",
-        activityType=ACTIVITY_TYPES["sleep"]
-    ).execute()
-
-    total_sleep_minutes = 0
-    if 'session' in sleep_request:
-        for session in sleep_request['session']:
-            start = int(session['startTimeMillis'])
-            end = int(session['endTimeMillis'])
-            total_sleep_minutes += (end - start) // (1000 * 60)
-    
-    # マインドフルネス（瞑想）セッションを取得
-    meditation_request = fitness_service.users().sessions().list(
-        userId="me",
-        startTime=start_time.isoformat() + "Z",
-        endTime=end_time.isoformat() + "Z",
-        activityType=ACTIVITY_TYPES["meditation"]
-    ).execute()
-    
-    meditation_sessions = 0
-    total_meditation_minutes = 0
-    if 'session' in meditation_request:
-        meditation_sessions = len(meditation_request['session'])
-        for session in meditation_request['session']:
-            start = int(session['startTimeMillis'])
-            end = int(session['endTimeMillis'])
-            total_meditation_minutes += (end - start) // (1000 * 60)
-    
-    # 全アクティビティセッションを取得（重複除去付き）
-    all_sessions = fitness_service.users().sessions().list(
-        userId="me",
-        startTime=start_time.isoformat() + "Z",
-        endTime=end_time.isoformat() + "Z"
-    ).execute()
-    
-    activity_summary = {}
-    processed_times = []  # 重複チェック用
-    
-    if 'session' in all_sessions:
-        for session in all_sessions['session']:
-            activity_type = session.get('activityType', 0)
-            app_name = session.get('application', {}).get('name', 'Unknown')
-            start_ms = int(session['startTimeMillis'])
-            end_ms = int(session['endTimeMillis'])
-            duration_min = (end_ms - start_ms) // (1000 * 60)
-            
-            # 重複チェック（同じ時間帯のアクティビティはスキップ）
-            is_duplicate = False
-            for processed_start, processed_end in processed_times:
-                # 時間の重なりをチェック
-                if not (end_ms <= processed_start or start_ms >= processed_end):
-                    # 優先度: AutoSleep > AppleWatch > その他
-                    # 優先度: Strava > Nike Run Club > その他
-                    if ('AutoSleep' in app_name or 'Strava' in app_name):
-                        # 高優先度アプリのデータを保持
-                        continue
-                    else:
-                        is_duplicate = True
-                        break
-            
-            if not is_duplicate and duration_min > 0:
-                processed_times.append((start_ms, end_ms))
-                
-                # アクティビティタイプ名を取得（英語名で統一）
-                activity_name = get_english_name(activity_type)
-                
-                if activity_name not in activity_summary:
-                    activity_summary[activity_name] = 0
-                activity_summary[activity_name] += duration_min
-
-    return {
+    summary = {
         "distance": distance,
         "steps": steps,
         "calories": calories,
@@ -336,32 +235,253 @@ def get_google_fit_data(credentials, date):
         "avg_oxygen": avg_oxygen,
         "latest_weight": latest_weight,
         "latest_body_fat": latest_body_fat,  # 体脂肪率
+    }
+    if heart_rate and heart_rate.zone_minutes is not None:
+        # 心拍数ゾーンごとの時間（分、HEART_RATE_ZONES を設定した場合のみ）
+        summary["heart_rate_zone_minutes"] = [round(minutes, 1) for minutes in heart_rate.zone_minutes]
+    return summary
+
+def _session_priority(session):
+    """セッションを記録したアプリの優先度（SESSION_APP_PRIORITY に無いアプリは0）"""
+    app_name = session.get('application', {}).get('name', 'Unknown')
+    return max((priority for name, priority in SESSION_APP_PRIORITY if name in app_name), default=0)
+
+def _merge_intervals(intervals):
+    """開始時刻順の (開始, 終了) を重なり・接する区間ごとにまとめる"""
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+def _deduplicate_sessions(sessions):
+    """
+    時間帯の重なるセッションを除き、集計に使うセッションを開始時刻順に返す（1分未満のセッションは除く）
+
+    優先度（SESSION_APP_PRIORITY）の高いアプリから順に、同じ優先度の中では開始時刻順に見て、
+    採用済みのセッションと重なるものを除く（SESSION_PRIORITY_ALWAYS_KEEP 以上のアプリは常に採用）。
+    APIが返す順序に依存せず、優先度ごとに並べ替えと二分探索で判定するため O(n log n)。
+    """
+    candidates = []
+    for position, session in enumerate(sessions):
+        start_ms = int(session['startTimeMillis'])
+        end_ms = int(session['endTimeMillis'])
+        if (end_ms - start_ms) // (1000 * 60) > 0:
+            candidates.append((
+                -_session_priority(session), start_ms, -end_ms,
+                session.get('application', {}).get('name', 'Unknown'), str(session.get('id', '')),
+                session.get('activityType', 0), position
+            ))
+    candidates.sort()
+
+    kept = []
+    # 優先度の高いアプリで採用済みの区間（重なる区間はまとめ、開始時刻順）
+    higher_starts, higher_ends = [], []
+    index = 0
+    while index < len(candidates):
+        priority = -candidates[index][0]
+        tier_end = index
+        while tier_end < len(candidates) and -candidates[tier_end][0] == priority:
+            tier_end += 1
+
+        tier_kept = []
+        latest_end = None
+        for candidate in candidates[index:tier_end]:
+            start_ms, end_ms = candidate[1], -candidate[2]
+            if priority < SESSION_PRIORITY_ALWAYS_KEEP:
+                # 同じ優先度の採用済みのセッションは開始時刻が早いため、終了時刻の最大値だけと比べればよい
+                if latest_end is not None and start_ms < latest_end:
+                    continue
+                # 優先度の高い区間のうち、この終了時刻より前に始まる最後の区間と比べる
+                position = bisect_left(higher_starts, end_ms) - 1
+                if position >= 0 and higher_ends[position] > start_ms:
+                    continue
+            tier_kept.append((start_ms, end_ms))
+            kept.append(candidate)
+            latest_end = end_ms if latest_end is None else max(latest_end, end_ms)
+
+        merged = _merge_intervals(sorted(list(zip(higher_starts, higher_ends)) + tier_kept))
+        higher_starts = [start for start, _ in merged]
+        higher_ends = [end for _, end in merged]
+        index = tier_end
+
+    kept.sort(key=lambda candidate: (candidate[1], -candidate[2], candidate[0], candidate[3], candidate[4]))
+    return [sessions[candidate[-1]] for candidate in kept]
+
+def _summarize_sessions(sessions):
+    """
+    1日分のセッション一覧から睡眠・瞑想・アクティビティ種類別の時間を集計する
+    """
+    total_sleep_minutes = 0
+    meditation_sessions = 0
+    total_meditation_minutes = 0
+    for session in sessions:
+        activity_type = session.get('activityType', 0)
+        start = int(session['startTimeMillis'])
+        end = int(session['endTimeMillis'])
+        if activity_type == ACTIVITY_TYPES["sleep"]:
+            total_sleep_minutes += (end - start) // (1000 * 60)
+        elif activity_type == ACTIVITY_TYPES["meditation"]:
+            # マインドフルネス（瞑想）セッション
+            meditation_sessions += 1
+            total_meditation_minutes += (end - start) // (1000 * 60)
+
+    # 全アクティビティセッションを集計（重複除去付き、集計順は開始時刻順）
+    activity_summary = {}
+    activity_type_ids = {}
+    for session in _deduplicate_sessions(sessions):
+        # アクティビティタイプ名を取得（英語名で統一）。IDも持ち回して表示時の逆引きを不要にする
+        activity_id = canonical_activity_id(session.get('activityType', 0))
+        activity_name = get_english_name(activity_id)
+        duration_min = (int(session['endTimeMillis']) - int(session['startTimeMillis'])) // (1000 * 60)
+        activity_summary[activity_name] = activity_summary.get(activity_name, 0) + duration_min
+        activity_type_ids[activity_name] = activity_id
+
+    return {
         "total_sleep_minutes": total_sleep_minutes,
         "meditation_sessions": meditation_sessions,
         "total_meditation_minutes": total_meditation_minutes,
-        "activity_summary": activity_summary  # アクティビティ種類別時間
+        "activity_summary": activity_summary,  # アクティビティ種類別時間
+        "activity_type_ids": activity_type_ids  # アクティビティの英語名→アクティビティタイプID
+    }
+
+def _fetch_fit_chunk(fitness_service, start_date, end_date):
+    """
+    start_date〜end_date（両端含む）のaggregateを1回、sessionsをページ単位の呼び出しで取得し、日付ごとに分割する
+
+    Returns:
+        dict: {date: (bucket, [session, ...])}
+    """
+    start_time = datetime.combine(start_date, dt_time.min)
+    end_time = datetime.combine(end_date, dt_time.max)
+
+    activity_request_body = {
+        "aggregateBy": [
+            {"dataTypeName": DATA_TYPES["distance"]},
+            {"dataTypeName": DATA_TYPES["steps"]},
+            {"dataTypeName": DATA_TYPES["calories"]},
+            {"dataTypeName": DATA_TYPES["active_minutes"]},  # Heart Points
+            {"dataTypeName": DATA_TYPES["heart_rate"]},
+            {"dataTypeName": DATA_TYPES["oxygen"]},
+            {"dataTypeName": DATA_TYPES["weight"]},
+            {"dataTypeName": DATA_TYPES["body_fat"]},  # 体脂肪率
+        ],
+        # 1日単位のバケットで期間全体を1回で集計
+        "bucketByTime": {
+            "durationMillis": DAY_MILLIS
+        },
+        "startTimeMillis": _local_millis(start_time),
+        "endTimeMillis": _local_millis(end_time),
     }
 
-def update_notion_page_with_date(database_id, properties, target_date):
+    dataset = fitness_service.users().dataset().aggregate(userId="me", body=activity_request_body).execute()
+    record_http(FIT_API_HOST, len(json.dumps(dataset)))
+
+    days = {}
+    current = start_date
+    while current <= end_date:
+        days[current] = (None, [])
+        current += timedelta(days=1)
+
+    for bucket in dataset.get("bucket", []):
+        bucket_date = datetime.fromtimestamp(int(bucket['startTimeMillis']) / 1000).date()
+        if bucket_date in days:
+            days[bucket_date] = (bucket, days[bucket_date][1])
+
+    # 期間内の全セッションを取得（nextPageToken が無くなるまでページを辿り、終了時刻が属する日に振り分ける）
+    all_sessions = []
+    page_token = None
+    while True:
+        page = fitness_service.users().sessions().list(
+            userId="me",
+            startTime=start_time.isoformat() + "Z",
+            endTime=end_time.isoformat() + "Z",
+            pageToken=page_token
+        ).execute()
+        record_http(FIT_API_HOST, len(json.dumps(page)))
+        all_sessions.extend(page.get('session', []))
+        page_token = page.get('nextPageToken')
+        if not page_token:
+            break
+
+    for session in all_sessions:
+        end_ms = int(session['endTimeMillis'])
+        session_date = start_date + timedelta(days=(end_ms - _utc_millis(start_time)) // DAY_MILLIS)
+        if session_date in days:
+            days[session_date][1].append(session)
+
+    return days
+
+def get_google_fit_data_range(credentials, start_date, end_date):
+    """
+    Google Fitから期間内の日次データをまとめて取得する
+    （1日単位のバケットで集計し、get_google_fit_dataと同じ形式の辞書に日付ごとに分割）
+
+    Args:
+        credentials: Google認証情報
+        start_date: 開始日（datetime.date）
+        end_date: 終了日（datetime.date、開始日を含む）
+
+    Returns:
+        dict: {date: Google Fitデータの辞書}
+    """
+    if end_date < start_date:
+        raise ValueError("開始日は終了日より前である必要があります")
+
+    fitness_service = get_fitness_service(credentials)
+
+    results = {}
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(end_date, chunk_start + timedelta(days=FIT_RANGE_CHUNK_DAYS - 1))
+        with span("fit.fetch"):
+            days = _fetch_fit_chunk(fitness_service, chunk_start, chunk_end)
+        with span("fit.transform"):
+            for day, (bucket, sessions) in days.items():
+                fit_data = _summarize_bucket(bucket)
+                fit_data.update(_summarize_sessions(sessions))
+                results[day] = fit_data
+        chunk_start = chunk_end + timedelta(days=1)
+
+    return results
+
+def get_google_fit_data(credentials, date):
+    """
+    Google Fitからデータを取得する
+    """
+    return get_google_fit_data_range(credentials, date, date)[date]
+
+def update_notion_page_with_date(database_id, properties, target_date, page_index=None):
     """
     指定された日付のNotionページを検索し、「振り返り」チェックが入っていないエントリーを優先的に更新する
+    page_indexが渡された場合は期間単位で読み込み済みの索引からページを探す
     """
     # 日付をISO形式に変換
     formatted_date = target_date.strftime("%Y-%m-%d")
     
     # 既存のページを検索
-    page = search_notion_page(database_id, formatted_date)
+    with span("notion.search"):
+        page = search_notion_page(database_id, formatted_date, page_index)
     
     if page:
         # 既存のページを更新
         page_id = page["id"]
         print(f"既存のページを更新します: {formatted_date}")
-        return update_notion_page(page_id, properties)
+        with span("notion.write"):
+            updated = update_notion_page(page_id, properties, page)
+        apply_properties(page, updated)
+        return updated
     else:
         # 新しいページを作成
         title = f"Health Data - {formatted_date}"
         print(f"新しいページを作成します: {formatted_date}")
-        return create_notion_page(database_id, title, properties)
+        with span("notion.write"):
+            created = create_notion_page(database_id, title, properties)
+        if page_index is not None:
+            page_index.add_page(created)
+        return created
 
 
 def get_credentials_from_firestore(collection_name='credentials', document_name='google_fit'):
@@ -377,7 +497,7 @@ def get_credentials_from_firestore(collection_name='credentials', document_name=
     """
     try:
         print(f"Firestoreから認証情報を取得中... (collection: {collection_name}, doc: {document_name})")
-        db = firestore.Client()
+        db = get_firestore_client()
         doc_ref = db.collection(collection_name).document(document_name)
         doc = doc_ref.get()
 
@@ -426,7 +546,7 @@ def save_credentials_to_firestore(credentials, collection_name='credentials', do
         bool: 保存の成否
     """
     try:
-        db = firestore.Client()
+        db = get_firestore_client()
         doc_ref = db.collection(collection_name).document(document_name)
         cred_dict = {
             'token': credentials.token,
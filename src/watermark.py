@@ -0,0 +1,282 @@
+"""
+同期ウォーターマーク（データソースごとの最終同期日と書き込み内容のハッシュ）
+
+定期実行では対象日を決め打ちで再計算・上書きしていたが、ソース（fit / weather / github）ごとに
+最後に同期できた日付と、各日付にNotionへ書き込んだプロパティのハッシュを記録しておくことで
+  - 実行が失敗・欠落した日を次回の実行で自動的に取り戻す
+  - 計算結果が前回書き込んだ内容と同じならNotionへのPATCHを省略する
+ことができる。保存先はFirestore（Cloud Functions）か、ローカルのJSONファイル（GitHub Actionsでは
+cacheアクションで実行間に持ち越す）。
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import date as date_type, datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows ではプロセス間のロックを省略する
+    fcntl = None
+
+FIRESTORE_COLLECTION = "sync_watermarks"
+DEFAULT_LOCAL_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ".cache", "sync_watermarks.json"
+)
+# 1ソースあたりに保持する日付ごとのハッシュ数（古いものから削除）
+MAX_HASHES_PER_SOURCE = 400
+# 取り戻す最大日数（環境変数 SYNC_MAX_CATCH_UP_DAYS で変更可能）
+DEFAULT_MAX_CATCH_UP_DAYS = 7
+
+# ローカルのファイルごとのロック（同じファイルを指す複数のストアで共有する）
+_path_locks = {}
+_path_locks_guard = threading.Lock()
+
+
+def properties_hash(properties):
+    """Notionに書き込むプロパティの内容ハッシュ（キー順に依存しない）"""
+    raw = json.dumps(properties, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _iso(value):
+    return value.isoformat() if isinstance(value, date_type) else str(value)
+
+
+def _lock_for_path(path):
+    with _path_locks_guard:
+        return _path_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+def _prune(hashes):
+    if len(hashes) <= MAX_HASHES_PER_SOURCE:
+        return hashes
+    keep = sorted(hashes)[-MAX_HASHES_PER_SOURCE:]
+    return {key: hashes[key] for key in keep}
+
+
+def _max_catch_up_days():
+    return int(os.getenv("SYNC_MAX_CATCH_UP_DAYS", DEFAULT_MAX_CATCH_UP_DAYS))
+
+
+def _advance_last_synced(last, hashes, target_date, max_days):
+    """
+    成功した日付が途切れずに続く範囲の最後の日付を返す
+
+    失敗した日付を飛び越えて進めると pending_dates() がその日付を返さなくなるため、
+    前回の同期日の翌日から記録済み（hashes にある）の日付が続く限りだけ進める。
+    取り戻す範囲（max_days）より前の日付は pending_dates() が返さないため、待たずに飛ばす。
+    """
+    target = datetime.strptime(_iso(target_date), "%Y-%m-%d").date()
+    if last is None:
+        return target.isoformat()
+    current = datetime.strptime(last, "%Y-%m-%d").date()
+    if target > current:
+        current = max(current, target - timedelta(days=max_days))
+    while (current + timedelta(days=1)).isoformat() in hashes:
+        current += timedelta(days=1)
+    return current.isoformat()
+
+
+class WatermarkStore(ABC):
+    """ウォーターマークの保存先の共通処理（サブクラスで _load / _save を実装する）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _load(self, source):
+        """ソースの状態（{"last_synced_date", "hashes"}）を返す"""
+
+    @abstractmethod
+    def _save(self, source, state):
+        """ソースの状態を保存する"""
+
+    @contextmanager
+    def _exclusive(self):
+        """読み込み〜保存の間、他の書き込みを止める"""
+        with self._lock:
+            yield
+
+    def _read_modify_write(self, source, update):
+        """ソースの状態を読み込み、update(state) が返す状態を他の書き込みと重ならないように保存する"""
+        with self._exclusive():
+            self._save(source, update(self._load(source)))
+
+    def get_last_synced(self, source):
+        """最後に同期できた日付（datetime.date）を返す。記録が無ければNone"""
+        state = self._load(source)
+        last = state.get("last_synced_date")
+        return datetime.strptime(last, "%Y-%m-%d").date() if last else None
+
+    def is_unchanged(self, source, target_date, content_hash):
+        """指定日付に前回書き込んだ内容とハッシュが一致するかを返す"""
+        return self._load(source).get("hashes", {}).get(_iso(target_date)) == content_hash
+
+    def record(self, source, target_date, content_hash):
+        """
+        指定日付の同期成功と書き込み内容のハッシュを記録する
+
+        最終同期日は前回の同期日から成功した日付が途切れずに続く範囲だけ進める
+        （途中で失敗した日付は次回の pending_dates() で取り戻す）。
+        """
+        def update(state):
+            hashes = dict(state.get("hashes", {}))
+            hashes[_iso(target_date)] = content_hash
+            last = _advance_last_synced(state.get("last_synced_date"), hashes, target_date, _max_catch_up_days())
+            return {
+                "last_synced_date": last,
+                "hashes": _prune(hashes)
+            }
+
+        self._read_modify_write(source, update)
+
+    def pending_dates(self, source, latest_date, max_days=None):
+        """
+        前回の同期日の翌日からlatest_dateまでの日付を返す（取りこぼした日の取り戻し用）
+
+        latest_dateは常に含める。記録が無い場合はlatest_dateのみ。
+        遡る日数は max_days（省略時は SYNC_MAX_CATCH_UP_DAYS）までに制限する。
+        """
+        if max_days is None:
+            max_days = _max_catch_up_days()
+        last = self.get_last_synced(source)
+        if last is None or last >= latest_date:
+            return [latest_date]
+
+        start = max(last + timedelta(days=1), latest_date - timedelta(days=max_days - 1))
+        dates = []
+        current = start
+        while current <= latest_date:
+            dates.append(current)
+            current += timedelta(days=1)
+        return dates
+
+
+class LocalWatermarkStore(WatermarkStore):
+    """
+    ローカルのJSONファイルに保存するウォーターマーク
+
+    同じファイルを指すストア同士（天気・GitHubなど）はスレッド間のロックを共有し、
+    別プロセス（batch_process.sh -p N など）とは <path>.lock のファイルロックで書き込みを順番にする。
+    """
+
+    def __init__(self, path=DEFAULT_LOCAL_PATH):
+        super().__init__()
+        self.path = path
+        self._lock = _lock_for_path(path)
+
+    @contextmanager
+    def _exclusive(self):
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(f"{self.path}.lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_all(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"警告: ウォーターマークファイルを読み込めません（初期状態として扱います）: {str(e)}")
+            return {}
+
+    def _load(self, source):
+        return self._read_all().get(source, {})
+
+    def _save(self, source, state):
+        # _read_modify_write() の _exclusive() の中から呼ばれる
+        data = self._read_all()
+        data[source] = state
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        # 書き込み途中のファイルを読まれないよう、同じディレクトリの一意な一時ファイルから置き換える
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f"{os.path.basename(self.path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+class FirestoreWatermarkStore(WatermarkStore):
+    """
+    Firestoreの sync_watermarks/{source} ドキュメントに保存するウォーターマーク
+
+    Cloud Functionsでは日付ごとのメッセージが別インスタンスで同時に処理されるため、プロセス内のロックでは
+    書き込みが重なる。記録の読み込み〜保存はトランザクションで行い、読み込んだ後に他のインスタンスが
+    書き込んだ場合は最新の状態から計算し直す（日付ごとのハッシュを失わず、最終同期日も戻らない）。
+    """
+
+    def __init__(self, client=None, collection_name=FIRESTORE_COLLECTION):
+        super().__init__()
+        if client is None:
+            from google.cloud import firestore
+            client = firestore.Client()
+        self.client = client
+        self.collection_name = collection_name
+
+    def _load(self, source):
+        doc = self.client.collection(self.collection_name).document(source).get()
+        return (doc.to_dict() or {}) if doc.exists else {}
+
+    def _save(self, source, state):
+        self.client.collection(self.collection_name).document(source).set(state)
+
+    def _read_modify_write(self, source, update):
+        from google.cloud import firestore
+
+        document = self.client.collection(self.collection_name).document(source)
+
+        @firestore.transactional
+        def apply(transaction):
+            snapshot = document.get(transaction=transaction)
+            state = (snapshot.to_dict() or {}) if snapshot.exists else {}
+            transaction.set(document, update(state))
+
+        apply(self.client.transaction())
+
+
+class NullWatermarkStore(WatermarkStore):
+    """記録しないウォーターマーク（SYNC_WATERMARK_BACKEND=none のとき）"""
+
+    def _load(self, source):
+        return {}
+
+    def _save(self, source, state):
+        pass
+
+
+def get_watermark_store(default_backend="local", firestore_client_factory=None):
+    """
+    環境変数 SYNC_WATERMARK_BACKEND（firestore / local / none）に応じたストアを返す
+
+    Args:
+        default_backend: 環境変数が未設定のときのバックエンド
+        firestore_client_factory: 既存のFirestoreクライアントを返す関数（firestoreバックエンドの場合のみ呼ぶ）
+    """
+    backend = os.getenv("SYNC_WATERMARK_BACKEND", default_backend).lower()
+    if backend == "none":
+        return NullWatermarkStore()
+    if backend == "firestore":
+        return FirestoreWatermarkStore(client=firestore_client_factory() if firestore_client_factory else None)
+    return LocalWatermarkStore(os.getenv("SYNC_WATERMARK_PATH", DEFAULT_LOCAL_PATH))
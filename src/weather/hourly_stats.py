@@ -0,0 +1,165 @@
+"""
+時間別の観測値の集計（日数×24時間の行列でまとめて計算する）
+
+観測値を要素ごとに 日数×24 の行列（欠測はNaN）に並べ、朝・昼・夜の平均・合計、
+1日の最高・最低、6時間ごとの気圧の平均と変化のマークを行列演算で一度に計算する。
+1日分なら1行、1年分なら365行の行列を1回の呼び出しで集計できる。
+
+時間帯（従来の集計と同じ）:
+    朝: 5〜11時、昼: 12〜18時、夜: 19〜24時と1〜4時
+    気圧: 1-6時、7-12時、13-18時、19-24時
+"""
+
+import statistics
+
+import numpy as np
+
+HOURS = 24
+# 行列にする要素（HourlyObservation の属性名）
+METRICS = ("sea_level_pressure", "precipitation", "temperature", "humidity", "sunshine")
+
+# 時間帯ごとの列のマスク（列 i が i+1 時）
+_HOUR_OF_COLUMN = np.arange(1, HOURS + 1)
+PERIODS = {
+    "morning": (_HOUR_OF_COLUMN >= 5) & (_HOUR_OF_COLUMN <= 11),
+    "daytime": (_HOUR_OF_COLUMN >= 12) & (_HOUR_OF_COLUMN <= 18),
+    "evening": (_HOUR_OF_COLUMN >= 19) | (_HOUR_OF_COLUMN <= 4),
+}
+# 気圧のスパン（大気潮に合わせて6時間ごと）
+PRESSURE_SPAN_HOURS = 6
+PRESSURE_SPAN_COUNT = HOURS // PRESSURE_SPAN_HOURS
+# 次のスパンとの気圧差がこの値（hPa）以上なら変化のマークを付ける
+PRESSURE_CHANGE_HPA = 5
+
+# 気圧の変化（スパンごと。次のスパンが無い場合は変化なし）
+PRESSURE_STEADY = 0
+PRESSURE_DROP = -1
+PRESSURE_RISE = 1
+
+
+def hourly_matrix(observations_by_day):
+    """
+    日ごとの観測値のリストから要素ごとの 日数×24 の行列を作る
+
+    Args:
+        observations_by_day: 日ごとの HourlyObservation のリストのリスト
+
+    Returns:
+        dict: {要素名: 日数×24 のfloat配列（欠測はNaN）}
+    """
+    matrix = {metric: np.full((len(observations_by_day), HOURS), np.nan) for metric in METRICS}
+    for row, observations in enumerate(observations_by_day):
+        for obs in observations:
+            if not 1 <= obs.hour <= HOURS:
+                continue
+            for metric in METRICS:
+                value = getattr(obs, metric)
+                if value is not None:
+                    matrix[metric][row, obs.hour - 1] = value
+    return matrix
+
+
+def _sums(values):
+    present = ~np.isnan(values)
+    return np.where(present, values, 0.0).sum(axis=1), present.sum(axis=1)
+
+
+def _means(values, empty=0.0):
+    """
+    行ごとの平均（値が無い行は empty）
+
+    小数第1位で丸める境界（x.x5付近）の行だけは、表示が従来の statistics.mean（厳密な平均）と
+    一致するように計算し直す（浮動小数点の合計の誤差で丸めの向きが変わるのを防ぐ）。
+    """
+    total, count = _sums(values)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(count > 0, total / np.maximum(count, 1), empty)
+    scaled = means * 10
+    near_tie = (count > 0) & (np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    for row in np.flatnonzero(near_tie):
+        means[row] = statistics.mean(values[row][~np.isnan(values[row])].tolist())
+    return means
+
+
+def _extreme(values, reducer, empty=0.0):
+    present = ~np.isnan(values)
+    filled = np.where(present, values, np.inf if reducer is np.min else -np.inf)
+    return np.where(present.any(axis=1), reducer(filled, axis=1), empty)
+
+
+def _period_stats(values):
+    """朝・昼・夜の平均と、1日の最高・最低（値が無い場合は0）"""
+    stats = {f"{period}_mean": _means(values[:, mask]) for period, mask in PERIODS.items()}
+    stats["max"] = _extreme(values, np.max)
+    stats["min"] = _extreme(values, np.min)
+    return stats
+
+
+def pressure_spans(pressures):
+    """
+    6時間ごとの気圧の平均・最低・最高と、次の（値のある）スパンへの変化
+
+    下降: 現在のスパンの最高値から次のスパンのいずれかの値までの下げ幅が PRESSURE_CHANGE_HPA 以上
+    上昇: 現在のスパンの最低値から次のスパンのいずれかの値までの上げ幅が PRESSURE_CHANGE_HPA 以上
+    値の無いスパンは飛ばして次のスパンと比べる。
+
+    Args:
+        pressures: 日数×24 の海面気圧
+
+    Returns:
+        dict: {"mean", "min", "max": 日数×4（値の無いスパンはNaN）, "change": 日数×4 の
+              PRESSURE_DROP / PRESSURE_RISE / PRESSURE_STEADY}
+    """
+    days = pressures.shape[0]
+    blocks = pressures.reshape(days, PRESSURE_SPAN_COUNT, PRESSURE_SPAN_HOURS)
+    present = ~np.isnan(blocks)
+    has_value = present.any(axis=2)
+
+    mean = np.full((days, PRESSURE_SPAN_COUNT), np.nan)
+    for span_index in range(PRESSURE_SPAN_COUNT):
+        column = _means(blocks[:, span_index, :], empty=np.nan)
+        mean[:, span_index] = np.where(has_value[:, span_index], column, np.nan)
+    low = np.where(has_value, np.where(present, blocks, np.inf).min(axis=2), np.nan)
+    high = np.where(has_value, np.where(present, blocks, -np.inf).max(axis=2), np.nan)
+
+    # 各スパンから見た「次の値のあるスパン」の最低・最高（後ろから順に引き継ぐ）
+    next_low = np.full((days, PRESSURE_SPAN_COUNT), np.nan)
+    next_high = np.full((days, PRESSURE_SPAN_COUNT), np.nan)
+    carry_low = np.full(days, np.nan)
+    carry_high = np.full(days, np.nan)
+    for span_index in range(PRESSURE_SPAN_COUNT - 1, -1, -1):
+        next_low[:, span_index] = carry_low
+        next_high[:, span_index] = carry_high
+        carry_low = np.where(has_value[:, span_index], low[:, span_index], carry_low)
+        carry_high = np.where(has_value[:, span_index], high[:, span_index], carry_high)
+
+    with np.errstate(invalid="ignore"):
+        drop = has_value & (high - next_low >= PRESSURE_CHANGE_HPA)
+        rise = has_value & ~drop & (next_high - low >= PRESSURE_CHANGE_HPA)
+    change = np.where(drop, PRESSURE_DROP, np.where(rise, PRESSURE_RISE, PRESSURE_STEADY))
+    return {"mean": mean, "min": low, "max": high, "change": change}
+
+
+def summarize(matrix):
+    """
+    日数×24 の行列から日ごとの集計値をまとめて計算する
+
+    Returns:
+        dict: {
+            "temperature": {"morning_mean", "daytime_mean", "evening_mean", "max", "min": 日数の配列},
+            "humidity": 同上,
+            "precipitation": {"morning", "daytime", "evening": 日数の配列（合計）},
+            "sunshine": 日数の配列（合計）,
+            "pressure": pressure_spans() の結果,
+        }
+    """
+    precipitation = matrix["precipitation"]
+    return {
+        "temperature": _period_stats(matrix["temperature"]),
+        "humidity": _period_stats(matrix["humidity"]),
+        "precipitation": {
+            period: _sums(precipitation[:, mask])[0] for period, mask in PERIODS.items()
+        },
+        "sunshine": _sums(matrix["sunshine"])[0],
+        "pressure": pressure_spans(matrix["sea_level_pressure"]),
+    }
@@ -0,0 +1,168 @@
+"""
+気象庁ページ（hourly_s1.php / daily_s1.php）の生HTMLのアーカイブ
+
+確定済みの過去の観測値は変わらないため、一度取得したページを圧縮してSQLiteに保存し、
+以降の実行ではネットワークに接続せず（スクレイピングの待機もせず）ディスクから返す。
+本文はSHA-256で識別して1回だけ保存し（内容アドレス方式）、(ページの種類, 都府県振興局番号,
+地点番号, 日付) から本文のハッシュを引く索引を別に持つ。
+
+保存するのは確定したページのみ:
+  - 時間別値: 天気が記録されていて（_is_complete）、対象日が2日以上前
+  - 日別値: 月内のすべての日の天気概況があり、月末が2日以上前
+
+整形処理を変更した後は update_weather.py --replay-only でアーカイブだけから作り直せる。
+
+環境変数:
+    JMA_ARCHIVE_PATH: SQLiteファイルのパス（デフォルト: .cache/jma_archive.sqlite3、none で無効）
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import date as date_type, timedelta
+
+DEFAULT_JMA_ARCHIVE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    ".cache", "jma_archive.sqlite3"
+)
+# 観測値が確定したとみなすまでの日数
+FINAL_AFTER_DAYS = 2
+
+KIND_HOURLY = "hourly"
+KIND_DAILY = "daily"
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+class ArchiveMissError(Exception):
+    """リプレイ専用モードでアーカイブにページが無い場合の例外"""
+
+
+def is_final(kind, target_date, today=None):
+    """
+    対象のページの観測値が確定しているか（日別値は月全体で判定する）
+
+    Args:
+        kind: KIND_HOURLY / KIND_DAILY
+        target_date: 対象日（日別値は月内の任意の日）
+        today: 基準日（省略時は今日）
+    """
+    today = today or date_type.today()
+    if kind == KIND_DAILY:
+        next_month = (target_date.replace(day=1) + timedelta(days=32)).replace(day=1)
+        target_date = next_month - timedelta(days=1)
+    return target_date <= today - timedelta(days=FINAL_AFTER_DAYS)
+
+
+class JMAPageArchive:
+    """気象庁ページの生HTMLを圧縮して保存するアーカイブ（SQLiteバックエンド）"""
+
+    def __init__(self, path, replay_only=False):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        # Trueの場合、アーカイブに無いページもネットワークから取得しない
+        self.replay_only = replay_only
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS blobs (
+                sha256 TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                kind TEXT NOT NULL,
+                prec_no INTEGER NOT NULL,
+                block_no INTEGER NOT NULL,
+                date TEXT NOT NULL,
+                sha256 TEXT NOT NULL REFERENCES blobs (sha256),
+                stored_at REAL NOT NULL,
+                PRIMARY KEY (kind, prec_no, block_no, date)
+            );
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _date_key(kind, target_date):
+        # 日別値は月単位のページのため月初の日付をキーにする
+        return (target_date.replace(day=1) if kind == KIND_DAILY else target_date).isoformat()
+
+    def contains(self, kind, prec_no, block_no, target_date):
+        """ページが保存済みかを返す"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM pages WHERE kind = ? AND prec_no = ? AND block_no = ? AND date = ?",
+                (kind, prec_no, block_no, self._date_key(kind, target_date))
+            ).fetchone()
+        return row is not None
+
+    def load(self, kind, prec_no, block_no, target_date):
+        """
+        保存済みのページのHTMLを返す
+
+        Returns:
+            str、未保存ならNone
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT blobs.body FROM pages JOIN blobs ON pages.sha256 = blobs.sha256 "
+                "WHERE kind = ? AND prec_no = ? AND block_no = ? AND date = ?",
+                (kind, prec_no, block_no, self._date_key(kind, target_date))
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def store(self, kind, prec_no, block_no, target_date, html):
+        """ページのHTMLを保存する（同じ内容の本文は1回だけ保存する）"""
+        raw = html.encode("utf-8")
+        sha256 = hashlib.sha256(raw).hexdigest()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO blobs (sha256, body, size) VALUES (?, ?, ?)",
+                (sha256, zlib.compress(raw, 9), len(raw))
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (kind, prec_no, block_no, date, sha256, stored_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, prec_no, block_no, self._date_key(kind, target_date), sha256, time.time())
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def get_jma_archive():
+    """
+    プロセス内で共有するアーカイブを返す（JMA_ARCHIVE_PATH=none の場合や開けない場合はNone）
+    """
+    global _archive
+    with _archive_lock:
+        if _archive is not None:
+            return _archive or None
+
+        path = os.getenv("JMA_ARCHIVE_PATH", DEFAULT_JMA_ARCHIVE_PATH)
+        if not path or path.lower() == "none":
+            _archive = False
+        else:
+            try:
+                _archive = JMAPageArchive(path)
+            except sqlite3.Error as e:
+                print(f"警告: 気象庁ページのアーカイブを開けないため無効化します: {str(e)}")
+                _archive = False
+        return _archive or None
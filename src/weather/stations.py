@@ -0,0 +1,117 @@
+"""
+天気を記録する観測地点（気象官署）の登録
+
+自宅・職場・旅行先など複数の地点の天気を記録できるように、地点名と気象庁の
+都府県振興局番号（prec_no）・地点番号（block_no）の対応をJSONファイルで設定する。
+
+    {
+      "stations": [
+        {"name": "東京", "prec_no": 44, "block_no": 47662},
+        {"name": "大阪", "prec_no": 62, "block_no": 47772, "property_suffix": "（大阪）"}
+      ]
+    }
+
+先頭の地点（主地点）は従来どおり「天気」「気温」などのプロパティに、それ以外の地点は
+プロパティ名に property_suffix（省略時は「（地点名）」）を付けたプロパティに書き込む。
+時間別値ページ（hourly_s1.php）・日別値ページ（daily_s1.php）がある気象官署
+（地点番号が5桁）のみ対応する（アメダスの地点は表の列が異なるため未対応）。
+
+環境変数:
+    WEATHER_STATIONS_PATH: 設定ファイルのパス（デフォルト: weather_stations.json、
+                           ファイルが無い場合や none の場合は東京のみ）
+"""
+
+import json
+import os
+import threading
+from collections import namedtuple
+
+DEFAULT_STATIONS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "weather_stations.json"
+)
+
+# 観測地点（property_suffix は主地点なら空文字）
+Station = namedtuple("Station", ["name", "prec_no", "block_no", "property_suffix"])
+
+# 設定ファイルが無い場合の地点（東京: 都府県振興局番号44、地点番号47662）
+DEFAULT_STATION = Station("東京", 44, 47662, "")
+
+_stations = None
+_stations_lock = threading.Lock()
+
+
+def _parse_station(entry, primary):
+    name = str(entry.get("name", "")).strip()
+    if not name:
+        raise ValueError(f"地点名（name）がありません: {entry}")
+    try:
+        prec_no = int(entry["prec_no"])
+        block_no = int(entry["block_no"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"{name}: prec_no と block_no は整数で指定してください")
+    if not 10000 <= block_no <= 99999:
+        raise ValueError(f"{name}: 地点番号 {block_no} は気象官署（5桁）ではありません（アメダスの地点は未対応）")
+    suffix = entry.get("property_suffix")
+    if suffix is None:
+        suffix = "" if primary else f"（{name}）"
+    return Station(name, prec_no, block_no, suffix)
+
+
+def parse_stations(config):
+    """
+    設定（JSONを読み込んだ辞書）から地点のリストを作る
+
+    Raises:
+        ValueError: 地点が無い、地点名・プロパティ名が重複している、番号が不正な場合
+    """
+    entries = config.get("stations") if isinstance(config, dict) else None
+    if not entries:
+        raise ValueError("stations に地点が1つもありません")
+
+    stations = [_parse_station(entry, index == 0) for index, entry in enumerate(entries)]
+    names = [station.name for station in stations]
+    suffixes = [station.property_suffix for station in stations]
+    if len(set(names)) != len(names):
+        raise ValueError(f"地点名が重複しています: {names}")
+    if len(set(suffixes)) != len(suffixes):
+        raise ValueError(f"property_suffix が重複しています（Notionのプロパティ名が衝突します）: {suffixes}")
+    return stations
+
+
+def load_stations(path=None):
+    """
+    設定ファイルから地点のリストを読み込む（プロセス内で1回だけ読み込む）
+
+    Args:
+        path: 設定ファイルのパス（省略時は環境変数 WEATHER_STATIONS_PATH かデフォルトのパス）
+    """
+    global _stations
+    with _stations_lock:
+        if path is None and _stations is not None:
+            return _stations
+
+        config_path = path or os.getenv("WEATHER_STATIONS_PATH", DEFAULT_STATIONS_PATH)
+        if not config_path or config_path.lower() == "none" or not os.path.exists(config_path):
+            stations = [DEFAULT_STATION]
+        else:
+            with open(config_path, "r", encoding="utf-8") as f:
+                stations = parse_stations(json.load(f))
+
+        if path is None:
+            _stations = stations
+        return stations
+
+
+def select_stations(stations, names):
+    """
+    地点名のリストで地点を絞り込む（書き込むプロパティ名は登録時のまま）
+
+    Raises:
+        ValueError: 登録されていない地点名がある場合
+    """
+    by_name = {station.name: station for station in stations}
+    unknown = [name for name in names if name not in by_name]
+    if unknown:
+        raise ValueError(f"登録されていない地点です: {', '.join(unknown)}（登録済み: {', '.join(by_name)}）")
+    return [by_name[name] for name in names]
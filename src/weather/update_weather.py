@@ -4,10 +4,15 @@
 """
 天気データを取得してNotionに保存するスクリプト
 使い方:
-    python update_weather.py                      # 前々日（2日前）の天気データを取得しNotionに保存
+    python update_weather.py                      # 前々日（2日前）と、前回の同期日以降の未同期の日付を取得しNotionに保存
     python update_weather.py 2023-11-01           # 指定日の天気データを取得しNotionに保存
     python update_weather.py 2023-11-01 2023-11-05 # 指定期間の天気データを取得しNotionに保存
     python update_weather.py --no-notion          # Notionに保存せず、表示のみ
+    python update_weather.py 2023-11-04 2023-11-05 --catch-up # 前回の同期日以降の未同期の日付も含めて処理
+    python update_weather.py 2024-01-01 2024-12-31 --monthly  # 日別値ページ（1か月1リクエスト）から取得（気圧は時間別値ページ）
+    python update_weather.py 2024-01-01 2024-12-31 --monthly --no-pressure-spans # 気圧を更新せず日別値ページだけを取得
+    python update_weather.py 2024-01-01 2024-12-31 --replay-only # 気象庁に接続せず、アーカイブ済みのページだけから作り直す
+    python update_weather.py 2025-08-10 2025-08-12 --stations 東京,大阪 # 登録済みの地点のうち指定した地点だけを取得
 """
 
 import os
@@ -15,15 +20,31 @@ import sys
 import argparse
 import time
 from datetime import datetime, timedelta
-from weather_notion import get_weather_data, update_notion_database
+from weather_notion import (
+    fetch_for_stations, get_monthly_weather_data, get_pressure_spans, get_weather_data, has_hourly_weather,
+    merge_station_weather, requires_request, update_notion_database
+)
+from jma_archive import KIND_DAILY, KIND_HOURLY, ArchiveMissError, get_jma_archive
+from stations import load_stations, select_stations
+from instrumentation import finish_run, start_run
+from notion_index import NotionDateIndex, select_preferred_page
+from watermark import get_watermark_store, properties_hash
 
-def save_weather_data(date_obj, update_notion=True):
+# 同期ウォーターマークのソース名
+WATERMARK_SOURCE = "weather"
+
+def save_weather_data(date_obj, update_notion=True, page_index=None, watermarks=None, weather_data=None,
+                      stations=None):
     """
     指定された日付の天気データを取得し、Notionに保存する
 
     Args:
         date_obj: datetime.dateオブジェクト
         update_notion: Falseの場合、Notionに保存しない（デフォルトはTrue）
+        page_index: 読み込み済みのNotion日付索引（期間処理用、省略時は都度検索）
+        watermarks: 同期ウォーターマーク（前回と同じ内容ならNotionへの保存を省略する）
+        weather_data: 取得済みの天気データ（月単位の取得用、省略時は時間別値ページから取得）
+        stations: 取得する地点のリスト（省略時は登録済みのすべての地点。複数の地点は並行して取得する）
 
     Returns:
         bool: 成功した場合はTrue、失敗した場合はFalse
@@ -34,8 +55,11 @@ def save_weather_data(date_obj, update_notion=True):
         month = date_obj.month
         day = date_obj.day
 
-        print(f"日付 {year}年{month}月{day}日 の天気データを取得中...")
-        weather_data = get_weather_data(year, month, day)
+        stations = stations or load_stations()
+        if weather_data is None:
+            print(f"日付 {year}年{month}月{day}日 の天気データを取得中...")
+            results = fetch_for_stations(get_weather_data, stations, year, month, day)
+            weather_data = merge_station_weather(results, stations, f"{year}年{month}月{day}日")
 
         # データを表示
         print("\n取得した天気データ:")
@@ -51,19 +75,31 @@ def save_weather_data(date_obj, update_notion=True):
 
         # Notionに保存
         if update_notion:
+            content_hash = properties_hash({k: v for k, v in weather_data.items() if not k.startswith("_")})
+            if watermarks is not None and watermarks.is_unchanged(WATERMARK_SOURCE, date_obj, content_hash):
+                print("\n前回の保存から天気データに変化がないため、Notionへの保存をスキップします。")
+                return True
+
             print("\nNotionにデータを保存中...")
-            update_notion_database(weather_data, weather_data["日付"])
+            if not update_notion_database(weather_data, weather_data["日付"], page_index, stations):
+                return False
+            if watermarks is not None:
+                watermarks.record(WATERMARK_SOURCE, date_obj, content_hash)
             print("Notionへの保存が完了しました。")
 
         return True
 
+    except ArchiveMissError as e:
+        print(f"警告: {str(e)}（リプレイ専用モードのためスキップします）")
+        return False
     except Exception as e:
         print(f"エラー: 天気データの処理中に例外が発生しました: {str(e)}")
         import traceback
         traceback.print_exc()
         return False
 
-def process_date_range(start_date, end_date, update_notion=True, sleep_seconds=2):
+def process_date_range(start_date, end_date, update_notion=True, sleep_seconds=2, watermarks=None,
+                       monthly=False, pressure_spans=True, stations=None):
     """
     指定された日付範囲の天気データを取得し、Notionに保存する
 
@@ -72,28 +108,138 @@ def process_date_range(start_date, end_date, update_notion=True, sleep_seconds=2
         end_date: 終了日（datetime.dateオブジェクト）
         update_notion: Falseの場合、Notionに保存しない（デフォルトはTrue）
         sleep_seconds: リクエスト間の待機秒数（スクレイピングのマナー）
+        watermarks: 同期ウォーターマーク（省略時は環境変数 SYNC_WATERMARK_BACKEND に従う）
+        monthly: Trueの場合、日別値ページ（daily_s1.php）を1か月1リクエストで取得する
+        pressure_spans: monthlyの場合に、6時間ごとの気圧を時間別値ページから日ごとに取得する（Falseなら気圧は更新しない）
+        stations: 取得する地点のリスト（省略時は登録済みのすべての地点）
 
     Returns:
         bool: すべて成功した場合はTrue、一部でも失敗した場合はFalse
     """
     all_success = True
     current_date = start_date
-    
+    stations = stations or load_stations()
+
+    if update_notion and watermarks is None:
+        watermarks = get_watermark_store("local")
+
+    # 対象期間のNotionページを1回の走査で索引化
+    page_index = None
+    if update_notion and os.environ.get("NOTION_SECRET") and os.environ.get("DATABASE_ID"):
+        try:
+            page_index = NotionDateIndex(os.environ["DATABASE_ID"]).load(start_date, end_date)
+        except Exception as e:
+            print(f"警告: Notionページの一括検索に失敗しました。日付ごとに検索します: {str(e)}")
+
+    if monthly:
+        return process_months(start_date, end_date, update_notion, sleep_seconds, watermarks, page_index, pressure_spans,
+                              stations)
+
+    requested = False
     while current_date <= end_date:
-        success = save_weather_data(current_date, update_notion)
+        # 気象庁へのリクエストの前に待機（スクレイピングのマナー、アーカイブ済みの日付は待機しない）
+        needs_request = requires_request(KIND_HOURLY, current_date.year, current_date.month, current_date.day, stations)
+        if requested and needs_request:
+            print(f"次のリクエストまで {sleep_seconds} 秒待機しています...")
+            time.sleep(sleep_seconds)
+        requested = requested or needs_request
+
+        success = save_weather_data(current_date, update_notion, page_index, watermarks, stations=stations)
         if not success:
             all_success = False
             print(f"警告: {current_date} のデータ処理に失敗しました")
         
-        # 次の日付に進む前に待機（スクレイピングのマナー）
-        if current_date < end_date:
-            print(f"次のリクエストまで {sleep_seconds} 秒待機しています...")
-            time.sleep(sleep_seconds)
-        
         current_date += timedelta(days=1)
     
     return all_success
 
+def process_months(start_date, end_date, update_notion, sleep_seconds, watermarks, page_index, pressure_spans=True,
+                   stations=None):
+    """
+    日別値ページ（daily_s1.php）を月ごとに1回だけ取得し、期間内の各日の天気データを保存する
+
+    日別値ページには時間別の内訳が無いため、天気は天気概況（昼・夜）、気温・湿度・降水量は
+    日の平均・最高・最低・合計になる。気圧（6時間ごと）は時間別値ページから日ごとに取得する
+    （pressure_spans=False の場合はNotionの既存の値を変更しない）。
+    時間別値ページの形式で書き込み済みの日（地点）は、内訳の少ない形式で上書きしないようにスキップする。
+    複数の地点はそれぞれのページを並行して取得する。
+
+    Returns:
+        bool: すべて成功した場合はTrue、一部でも失敗した場合はFalse
+    """
+    all_success = True
+    requested = False
+    stations = stations or load_stations()
+
+    # 書き込み済みの形式を確認するための索引（一括検索に失敗した場合は日ごとに検索する）
+    if update_notion and page_index is None and os.environ.get("NOTION_SECRET") and os.environ.get("DATABASE_ID"):
+        page_index = NotionDateIndex(os.environ["DATABASE_ID"])
+
+    def wait(kind, target_date):
+        # 2回目以降のリクエストの前に待機（スクレイピングのマナー、アーカイブ済みのページは待機しない）
+        nonlocal requested
+        needs_request = requires_request(kind, target_date.year, target_date.month, target_date.day, stations)
+        if requested and needs_request:
+            print(f"次のリクエストまで {sleep_seconds} 秒待機しています...")
+            time.sleep(sleep_seconds)
+        requested = requested or needs_request
+
+    def stations_to_write(target_date):
+        # 時間別値ページの形式で書き込み済みの地点を除く
+        if not update_notion or page_index is None:
+            return stations
+        pages = page_index.get_pages(target_date)
+        page = select_preferred_page(pages) if pages else None
+        return [station for station in stations if not has_hourly_weather(page, station.property_suffix)]
+
+    month_start = start_date.replace(day=1)
+    while month_start <= end_date:
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
+
+        wait(KIND_DAILY, month_start)
+        print(f"{month_start.year}年{month_start.month}月 の日別値を取得中...")
+        month_data = fetch_for_stations(get_monthly_weather_data, stations, month_start.year, month_start.month)
+        for name, result in month_data.items():
+            if isinstance(result, Exception):
+                print(f"エラー: {name} の {month_start.year}年{month_start.month}月 の日別値の取得に失敗しました: {str(result)}")
+                month_data[name] = {}
+
+        current_date = max(start_date, month_start)
+        while current_date < next_month and current_date <= end_date:
+            date_label = f"{current_date.year}年{current_date.month}月{current_date.day}日"
+            day_stations = stations_to_write(current_date)
+            if not day_stations:
+                print(f"{current_date} は時間別値ページの形式で書き込み済みのため、スキップします")
+                current_date += timedelta(days=1)
+                continue
+
+            day_data = {
+                station.name: month_data[station.name].get(current_date.day)
+                or {"日付": date_label, "_is_complete": False}
+                for station in day_stations
+            }
+            complete = [station for station in day_stations if day_data[station.name].get("_is_complete")]
+            if pressure_spans and complete:
+                wait(KIND_HOURLY, current_date)
+                pressures = fetch_for_stations(
+                    get_pressure_spans, complete, current_date.year, current_date.month, current_date.day
+                )
+                for name, pressure in pressures.items():
+                    if isinstance(pressure, Exception):
+                        print(f"警告: {name} の {current_date} の時間別の気圧を取得できません（気圧は更新しません）: {str(pressure)}")
+                    elif pressure is not None:
+                        day_data[name]["気圧"] = pressure
+
+            weather_data = merge_station_weather(day_data, day_stations, date_label)
+            if not save_weather_data(current_date, update_notion, page_index, watermarks, weather_data, day_stations):
+                all_success = False
+                print(f"警告: {current_date} のデータ処理に失敗しました")
+            current_date += timedelta(days=1)
+
+        month_start = next_month
+
+    return all_success
+
 def main():
     # コマンドライン引数を解析
     parser = argparse.ArgumentParser(description='天気データを取得してNotionに保存します')
@@ -102,8 +248,38 @@ def main():
     parser.add_argument('--no-notion', action='store_true', help='Notionに保存しない（表示のみ）')
     parser.add_argument('--sleep', type=float, default=2.0, help='リクエスト間の待機秒数（デフォルト: 2.0秒）')
     parser.add_argument('-y', '--yes', action='store_true', help='すべての確認プロンプトを自動承認')
+    parser.add_argument('--catch-up', action='store_true',
+                        help='前回の同期日（ウォーターマーク）以降の未同期の日付も含めて処理（開始日省略時は常に有効）')
+    parser.add_argument('--monthly', action='store_true',
+                        help='日別値ページから1か月1リクエストで取得（天気概況・日の平均/最高/最低。気圧は時間別値ページから取得し、'
+                             '時間別値ページの形式で書き込み済みの日は上書きしない）')
+    parser.add_argument('--no-pressure-spans', dest='pressure_spans', action='store_false',
+                        help='--monthly の場合に、6時間ごとの気圧（時間別値ページ）を取得せず、気圧を更新しない')
+    parser.add_argument('--stations',
+                        help='取得する地点名（カンマ区切り、weather_stations.json に登録済みの地点。省略時はすべて）')
+    parser.add_argument('--replay-only', action='store_true',
+                        help='気象庁に接続せず、アーカイブ済みのページだけから天気データを作り直す（整形処理の変更後など）')
     args = parser.parse_args()
 
+    if not args.pressure_spans and not args.monthly:
+        print("エラー: --no-pressure-spans は --monthly と一緒に指定してください")
+        return 1
+
+    try:
+        stations = load_stations()
+        if args.stations:
+            stations = select_stations(stations, [name.strip() for name in args.stations.split(",") if name.strip()])
+    except (OSError, ValueError) as e:
+        print(f"エラー: 観測地点の設定を読み込めません: {str(e)}")
+        return 1
+
+    if args.replay_only:
+        archive = get_jma_archive()
+        if archive is None:
+            print("エラー: --replay-only には気象庁ページのアーカイブが必要です（JMA_ARCHIVE_PATH を確認してください）")
+            return 1
+        archive.replay_only = True
+
     # 日付を処理
     today = datetime.now().date()
     yesterday = today - timedelta(days=1)
@@ -135,6 +311,7 @@ def main():
     else:
         # 日付が省略された場合は2日前（前々日）の日付を使用
         start_date = day_before_yesterday
+        args.catch_up = True
         print(f"開始日が指定されていないため、2日前（{start_date}）のデータを取得します")
 
     # 終了日の処理
@@ -151,6 +328,16 @@ def main():
         # 終了日が省略された場合は開始日と同じにする
         end_date = start_date
 
+    # 前回の同期日から日付が空いている場合は、その日付から処理する
+    watermarks = None
+    if not args.no_notion:
+        watermarks = get_watermark_store("local")
+        if args.catch_up:
+            pending_start = watermarks.pending_dates(WATERMARK_SOURCE, start_date)[0]
+            if pending_start < start_date:
+                print(f"前回の同期日以降の未同期の日付（{pending_start}〜）も処理します")
+                start_date = pending_start
+
     # 日付範囲を表示
     if start_date == end_date:
         print(f"日付 {start_date} のデータを処理します")
@@ -168,7 +355,11 @@ def main():
                 print("--yes フラグが指定されているため、自動的に続行します。")
 
     # 天気データを保存
-    success = process_date_range(start_date, end_date, not args.no_notion, args.sleep)
+    start_run("weather", start_date=str(start_date), end_date=str(end_date), monthly=args.monthly,
+              replay_only=args.replay_only, stations=",".join(station.name for station in stations))
+    success = process_date_range(start_date, end_date, not args.no_notion, args.sleep, watermarks,
+                                 monthly=args.monthly, pressure_spans=args.pressure_spans, stations=stations)
+    finish_run(success=success)
 
     return 0 if success else 1
 
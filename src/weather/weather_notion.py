@@ -1,12 +1,41 @@
-import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import re
-from datetime import datetime
+from calendar import monthrange
+from datetime import date, datetime
 import argparse
-import statistics
 import json
 import os
-from notion_client import Client
+import sys
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+try:
+    from lxml import etree as lxml_etree, html as lxml_html
+except ImportError:  # lxml が無い環境では BeautifulSoup（html.parser）で解析する
+    lxml_etree = lxml_html = None
+
+# 親ディレクトリ（src）のモジュールをインポート可能にする
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hourly_stats import (
+    PRESSURE_DROP, PRESSURE_RISE, PRESSURE_SPAN_COUNT, PRESSURE_SPAN_HOURS, PRESSURE_STEADY,
+    hourly_matrix, pressure_spans, summarize
+)
+from http_session import get_notion_session, get_session
+from instrumentation import span
+from jma_archive import KIND_DAILY, KIND_HOURLY, ArchiveMissError, get_jma_archive, is_final
+from notion_diff import diff_properties, apply_properties
+from notion_index import NotionDateIndex, select_preferred_page, is_reflection_checked
+from stations import DEFAULT_STATION
+
+JMA_BASE_URL = "https://www.data.jma.go.jp"
+# 気象庁への同時リクエスト数の上限（環境変数 JMA_MAX_CONCURRENCY で変更可能）
+DEFAULT_JMA_MAX_CONCURRENCY = 2
+# Notionに書き込む天気のプロパティ（天気データの辞書に含まれるものだけを書き込む）
+WEATHER_PROPERTIES = ("天気", "気温", "湿度", "降水量", "気圧", "日照時間")
 
 def load_env_file():
     """
@@ -24,6 +53,9 @@ def load_env_file():
 # .envファイルを読み込み
 load_env_file()
 
+_jma_semaphore = None
+_jma_semaphore_lock = threading.Lock()
+
 def get_weather_emoji(condition):
     """天気状態に応じた絵文字を返す"""
     condition = condition.lower()
@@ -41,161 +73,495 @@ def get_weather_emoji(condition):
         return "❄️"
     return ""
 
-def get_weather_data(year=2025, month=5, day=15):
-    """気象庁のウェブサイトから指定された日付の天気データを取得する"""
-    url = f'https://www.data.jma.go.jp/stats/etrn/view/hourly_s1.php?prec_no=44&block_no=47662&year={year}&month={month:02d}&day={day:02d}&view=p1'
-    r = requests.get(url)
-    soup = BeautifulSoup(r.text, 'html.parser')
-    table = soup.find('table', class_='data2_s')
+def _station_query(station, year, month, day=None):
+    day_param = f"{day:02d}" if day is not None else ""
+    return (f"prec_no={station.prec_no}&block_no={station.block_no}"
+            f"&year={year}&month={month:02d}&day={day_param}&view=p1")
+
+def _jma_slots():
+    """気象庁への同時リクエスト数を制限するセマフォ（複数地点を並行して取得する場合のマナー）"""
+    global _jma_semaphore
+    with _jma_semaphore_lock:
+        if _jma_semaphore is None:
+            _jma_semaphore = threading.BoundedSemaphore(
+                max(1, int(os.getenv("JMA_MAX_CONCURRENCY", DEFAULT_JMA_MAX_CONCURRENCY)))
+            )
+        return _jma_semaphore
+
+def _fetch_jma_page(kind, year, month, day=None, station=DEFAULT_STATION):
+    """
+    気象庁のページのHTMLを取得する（確定済みでアーカイブにあればディスクから返す）
+
+    Returns:
+        (html, アーカイブから読んだか)
+
+    Raises:
+        ArchiveMissError: リプレイ専用モードでアーカイブにページが無い場合
+    """
+    archive = get_jma_archive()
+    target_date = date(year, month, day or 1)
+    if archive is not None:
+        with span("weather.archive_load"):
+            html = archive.load(kind, station.prec_no, station.block_no, target_date)
+        if html is not None:
+            return html, True
+        if archive.replay_only:
+            raise ArchiveMissError(
+                f"アーカイブに{station.name}の{kind}のページがありません: {target_date.isoformat()}"
+            )
+
+    page = "hourly_s1.php" if kind == KIND_HOURLY else "daily_s1.php"
+    url = f'{JMA_BASE_URL}/stats/etrn/view/{page}?{_station_query(station, year, month, day)}'
+    with _jma_slots(), span("weather.fetch"):
+        r = get_session(JMA_BASE_URL).get(url)
+    return r.text, False
+
+def _archive_jma_page(kind, year, month, day, html, station=DEFAULT_STATION):
+    """観測値が確定したページをアーカイブに保存する（呼び出し側で天気の記録の有無を確認済みであること）"""
+    archive = get_jma_archive()
+    target_date = date(year, month, day or 1)
+    if archive is None or not is_final(kind, target_date):
+        return
+    with span("weather.archive_store"):
+        archive.store(kind, station.prec_no, station.block_no, target_date, html)
+
+def requires_request(kind, year, month, day=None, stations=None):
+    """
+    気象庁のページの取得にネットワークへのリクエストが必要か（いずれかの地点で必要か）を返す
+
+    アーカイブ済みのページと、リプレイ専用モードではリクエストしない（待機も不要）。
+    """
+    archive = get_jma_archive()
+    if archive is None:
+        return True
+    if archive.replay_only:
+        return False
+    target_date = date(year, month, day or 1)
+    return any(
+        not archive.contains(kind, station.prec_no, station.block_no, target_date)
+        for station in (stations or [DEFAULT_STATION])
+    )
+
+def get_weather_data(year=2025, month=5, day=15, station=DEFAULT_STATION):
+    """気象庁のウェブサイトから指定された日付・地点の天気データを取得する"""
+    html, archived = _fetch_jma_page(KIND_HOURLY, year, month, day, station)
+    with span("weather.parse"):
+        weather_data = parse_weather_html(html, year, month, day)
+    if not archived and weather_data.get("_is_complete"):
+        _archive_jma_page(KIND_HOURLY, year, month, day, html, station)
+    return weather_data
+
+def get_monthly_weather_data(year, month, station=DEFAULT_STATION):
+    """
+    気象庁の日別値ページ（daily_s1.php）から1か月分の天気データを1回のリクエストで取得する
+
+    時間別の値が必要な項目（朝・昼・夜の内訳、6時間ごとの気圧）は含まない（気圧は get_pressure_spans で
+    時間別値ページから取得する）。各日の値は format_daily_weather_data の形式（日別の平均・最高・最低・合計と
+    天気概況）で、時間別値ページの形式（format_weather_data）とは異なる。
+
+    Returns:
+        dict: {日: 天気データの辞書}（データテーブルが無い場合は空）
+    """
+    html, archived = _fetch_jma_page(KIND_DAILY, year, month, None, station)
+    with span("weather.parse"):
+        monthly_data = parse_monthly_weather_html(html, year, month)
+    # 月内のすべての日の天気概況がそろっている場合のみ保存
+    days_in_month = monthrange(year, month)[1]
+    if (not archived and len(monthly_data) == days_in_month
+            and all(data.get("_is_complete") for data in monthly_data.values())):
+        _archive_jma_page(KIND_DAILY, year, month, None, html, station)
+    return monthly_data
+
+def get_pressure_spans(year, month, day, station=DEFAULT_STATION):
+    """時間別値ページから6時間ごとの気圧（変化のマーク付き）の文字列だけを取得する"""
+    html, archived = _fetch_jma_page(KIND_HOURLY, year, month, day, station)
+    with span("weather.parse"):
+        observations = extract_hourly_observations(html)
+    if observations is None:
+        return None
+    if not archived and any(obs.weather is not None for obs in observations):
+        _archive_jma_page(KIND_HOURLY, year, month, day, html, station)
+    return format_pressure_spans(observations)
+
+def fetch_for_stations(fetch, stations, *args):
+    """
+    地点ごとの取得関数を全地点について並行して呼ぶ（同時リクエスト数は JMA_MAX_CONCURRENCY まで）
+
+    Args:
+        fetch: station キーワード引数を受け取る取得関数（get_weather_data など）
+        stations: 地点のリスト
+        *args: 取得関数に渡す引数（年・月・日）
+
+    Returns:
+        dict: {地点名: 取得結果}（例外が発生した地点は例外オブジェクト）
+    """
+    def call(station):
+        try:
+            return fetch(*args, station=station)
+        except Exception as e:
+            return e
+
+    if len(stations) == 1:
+        return {stations[0].name: call(stations[0])}
+    with ThreadPoolExecutor(max_workers=len(stations)) as executor:
+        results = executor.map(call, stations)
+        return {station.name: result for station, result in zip(stations, results)}
+
+def merge_station_weather(results, stations, date_label):
+    """
+    地点ごとの天気データを、地点ごとのプロパティ名（主地点はそのまま）の1つの天気データにまとめる
+
+    天気が未公開・取得に失敗した地点の項目は含めない（既存の値を不完全なデータで上書きしない）。
+    いずれかの地点のデータがそろっていれば _is_complete をTrueにする。
+    主地点だけの場合はその地点の天気データをそのまま返す（取得時の例外もそのまま送出する）。
+    """
+    if len(stations) == 1 and not stations[0].property_suffix:
+        weather_data = results[stations[0].name]
+        if isinstance(weather_data, Exception):
+            raise weather_data
+        return weather_data
+
+    merged = {"日付": date_label, "_is_complete": False}
+    for station in stations:
+        weather_data = results.get(station.name)
+        if isinstance(weather_data, Exception):
+            print(f"警告: {station.name} の天気データを取得できません: {str(weather_data)}")
+            continue
+        if not weather_data or not weather_data.get("_is_complete"):
+            print(f"警告: {station.name} の {date_label} の天気データが未公開のため、この地点は更新しません")
+            continue
+        for name in WEATHER_PROPERTIES:
+            if name in weather_data:
+                merged[name + station.property_suffix] = weather_data[name]
+        merged["_is_complete"] = True
+    return merged
+
+def station_property_names(stations=None):
+    """地点ごとの天気のプロパティ名のリスト（主地点は「天気」など、他の地点は接尾辞付き）"""
+    return [
+        name + station.property_suffix
+        for station in (stations or [DEFAULT_STATION])
+        for name in WEATHER_PROPERTIES
+    ]
+
+# 時間別値ページの1時間分の観測値（値が無い・"--" の項目はNone）
+HourlyObservation = namedtuple(
+    "HourlyObservation",
+    ["hour", "sea_level_pressure", "precipitation", "temperature", "humidity", "sunshine", "weather"]
+)
+
+# 日別値ページの1日分の観測値（欠測の項目はNone）
+DailyObservation = namedtuple(
+    "DailyObservation",
+    ["day", "sea_level_pressure", "precipitation", "max_hourly_precipitation",
+     "temperature_mean", "temperature_max", "temperature_min", "humidity_mean", "humidity_min",
+     "sunshine", "summary_day", "summary_night"]
+)
+
+def _observation_from_cells(texts, weather):
+    """
+    1行分のセルの文字列から観測値を作る
+
+    Args:
+        texts: 各セルの文字列（前後の空白は除去済み）
+        weather: 天気（インデックス14の画像のalt属性、無ければNone）
+    """
+    def value(index):
+        text = texts[index]
+        return None if text == "--" or text == "" else text
+
+    # 降水量の "×"（欠測）などは0mmとして扱う
+    precipitation = value(3)
+    if precipitation is not None:
+        try:
+            precipitation = float(precipitation)
+        except ValueError:
+            precipitation = 0.0
+
+    # 日照時間は数値に変換できない場合はスキップ
+    sunshine = value(10)
+    if sunshine is not None:
+        try:
+            sunshine = float(sunshine)
+        except ValueError:
+            sunshine = None
+
+    sea_level_pressure = value(2)
+    temperature = value(4)
+    humidity = value(7)
+    return HourlyObservation(
+        hour=int(texts[0]),
+        sea_level_pressure=float(sea_level_pressure) if sea_level_pressure is not None else None,  # インデックス2
+        precipitation=precipitation,  # インデックス3
+        temperature=float(temperature) if temperature is not None else None,  # インデックス4
+        humidity=int(humidity) if humidity is not None else None,  # インデックス7
+        sunshine=sunshine,  # インデックス10
+        weather=weather,  # インデックス14
+    )
+
+def _daily_value(text, none_as_zero=False):
+    """
+    日別値のセルを数値にする
+
+    値に付く品質情報の記号（")" 準正常値、"]" 資料不足値、"#" 疑問値）は取り除く。
+    "--"（現象なし）は none_as_zero=True の場合0、"×"（欠測）・"///" などはNone。
+    """
+    text = text.rstrip(")]# ").strip()
+    if text == "--":
+        return 0.0 if none_as_zero else None
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+# 日別値ページ（daily_s1.php）の列のインデックス（天気概況の昼・夜は末尾の2列）
+DAILY_COLUMNS = {
+    "day": 0,
+    "sea_level_pressure": 2,  # 気圧 海面 平均
+    "precipitation": 3,  # 降水量 合計
+    "max_hourly_precipitation": 4,  # 降水量 最大 1時間
+    "temperature_mean": 6,  # 気温 平均
+    "temperature_max": 7,  # 気温 最高
+    "temperature_min": 8,  # 気温 最低
+    "humidity_mean": 9,  # 湿度 平均
+    "humidity_min": 10,  # 湿度 最小
+    "sunshine": 17,  # 日照時間
+    "summary_day": -2,  # 天気概況 昼
+    "summary_night": -1,  # 天気概況 夜
+}
+
+def _daily_observation_from_cells(texts):
+    """日別値ページ（daily_s1.php）の1行分のセルの文字列から観測値を作る（列は DAILY_COLUMNS）"""
+    def cell(name):
+        return texts[DAILY_COLUMNS[name]]
+
+    return DailyObservation(
+        day=int(cell("day")),
+        sea_level_pressure=_daily_value(cell("sea_level_pressure")),
+        precipitation=_daily_value(cell("precipitation"), none_as_zero=True),
+        max_hourly_precipitation=_daily_value(cell("max_hourly_precipitation"), none_as_zero=True),
+        temperature_mean=_daily_value(cell("temperature_mean")),
+        temperature_max=_daily_value(cell("temperature_max")),
+        temperature_min=_daily_value(cell("temperature_min")),
+        humidity_mean=_daily_value(cell("humidity_mean")),
+        humidity_min=_daily_value(cell("humidity_min")),
+        sunshine=_daily_value(cell("sunshine"), none_as_zero=True),
+        summary_day=cell("summary_day").rstrip(")]# ").strip(),
+        summary_night=cell("summary_night").rstrip(")]# ").strip(),
+    )
+
+def _table_rows_lxml(html):
+    """lxml（C実装のパーサー）で table.data2_s の行を取り出す"""
+    parser = lxml_html.HTMLParser(encoding="utf-8")
+    try:
+        root = lxml_html.document_fromstring(html.encode("utf-8"), parser=parser)
+    except lxml_etree.ParserError:
+        return None
+    tables = root.xpath('//table[contains(concat(" ", normalize-space(@class), " "), " data2_s ")]')
+    if not tables:
+        return None
+
+    rows = []
+    for i, row in enumerate(tables[0].iter("tr")):
+        if i > 2:  # ヘッダー行をスキップ
+            cells = list(row.iter("td"))
+            if len(cells) >= 15:
+                weather_img = next(cells[14].iter("img"), None)
+                weather = weather_img.get("alt") if weather_img is not None else None
+                rows.append(([cell.text_content().strip() for cell in cells], weather))
+    return rows
+
+def _is_data_table_class(value):
+    # 解析中のSoupStrainerにはclass属性が分割前の文字列で渡される（"data2_s" 以外のクラスも含みうる）
+    if value is None:
+        return False
+    return "data2_s" in (value.split() if isinstance(value, str) else value)
+
+def _table_rows_soup(html, parse_only=True):
+    """
+    BeautifulSoup（html.parser）で table.data2_s の行を取り出す
+
+    parse_only=True の場合は SoupStrainer で表の部分だけを木にする（ページ全体の木を作らない）
+    """
+    strainer = SoupStrainer("table", class_=_is_data_table_class) if parse_only else None
+    soup = BeautifulSoup(html, "html.parser", parse_only=strainer)
+    table = soup.find("table", class_="data2_s")
     if table is None:
+        return None
+
+    rows = []
+    for i, row in enumerate(table.find_all("tr")):
+        if i > 2:  # ヘッダー行をスキップ
+            cells = row.find_all("td")
+            if len(cells) >= 15:
+                weather_img = cells[14].find("img")
+                weather = weather_img.get("alt") if weather_img and weather_img.has_attr("alt") else None
+                rows.append(([cell.text.strip() for cell in cells], weather))
+    return rows
+
+# データテーブル（table.data2_s）の取り出し方（lxmlが無い環境では html.parser + SoupStrainer を使う）
+# 各行は（セルの文字列のリスト, インデックス14の画像のalt属性）
+TABLE_PARSERS = {
+    "lxml": _table_rows_lxml,
+    "soupstrainer": _table_rows_soup,
+    "beautifulsoup": lambda html: _table_rows_soup(html, parse_only=False),
+}
+DEFAULT_TABLE_PARSER = "lxml" if lxml_html is not None else "soupstrainer"
+
+def _table_rows(html, parser=None):
+    parser = parser or DEFAULT_TABLE_PARSER
+    if parser == "lxml" and lxml_html is None:
+        raise ValueError("lxml がインストールされていません")
+    return TABLE_PARSERS[parser](html)
+
+def extract_hourly_observations(html, parser=None):
+    """
+    気象庁の時間別値ページ（hourly_s1.php）のHTMLから1時間ごとの観測値を取り出す
+
+    Args:
+        html: ページのHTML
+        parser: TABLE_PARSERS のキー（省略時は DEFAULT_TABLE_PARSER）
+
+    Returns:
+        list[HourlyObservation]、データテーブルが無い場合はNone
+    """
+    rows = _table_rows(html, parser)
+    if rows is None:
+        return None
+    return [_observation_from_cells(texts, weather) for texts, weather in rows]
+
+def extract_daily_observations(html, parser=None):
+    """
+    気象庁の日別値ページ（daily_s1.php）のHTMLから1日ごとの観測値を取り出す
+
+    Returns:
+        list[DailyObservation]、データテーブルが無い場合はNone（まだ観測の無い日の行は含まない）
+    """
+    rows = _table_rows(html, parser)
+    if rows is None:
+        return None
+    return [
+        _daily_observation_from_cells(texts) for texts, _ in rows
+        if len(texts) >= 20 and texts[0].isdigit() and any(texts[1:])
+    ]
+
+def parse_weather_html(html, year, month, day, parser=None):
+    """気象庁の時間別値ページ（hourly_s1.php）のHTMLから天気データを集計する"""
+    observations = extract_hourly_observations(html, parser)
+    if observations is None:
         print(f"警告: {year}年{month}月{day}日 のデータテーブルが見つかりません（データ未公開の可能性）")
         return {
             "日付": f"{year}年{month}月{day}日",
             "天気": "", "気温": "", "湿度": "", "降水量": "", "気圧": "", "日照時間": "",
             "_is_complete": False,
         }
-    rows = table.find_all('tr')
+    return format_weather_data(observations, year, month, day)
 
-    # 結果格納用の変数を初期化
-    weather_info = []
-    total_sunshine = 0
-    humidity_data = []
-    sea_level_pressures = []
-    temperature_data = []
-    precipitation_data = []
+def parse_monthly_weather_html(html, year, month, parser=None):
+    """気象庁の日別値ページ（daily_s1.php）のHTMLから日ごとの天気データを作る"""
+    observations = extract_daily_observations(html, parser)
+    if observations is None:
+        print(f"警告: {year}年{month}月 の日別値のデータテーブルが見つかりません（データ未公開の可能性）")
+        return {}
+    return {obs.day: format_daily_weather_data(obs, year, month) for obs in observations}
 
-    for i, row in enumerate(rows):
-        if i > 2:  # ヘッダー行をスキップ
-            cells = row.find_all('td')
-            if len(cells) >= 15:
-                hour = int(cells[0].text.strip())
-
-                # 海面気圧（インデックス2）
-                sea_pressure = cells[2].text.strip()
-                if sea_pressure != "--" and sea_pressure != "":
-                    sea_level_pressures.append((hour, float(sea_pressure)))
-
-                # 降水量（インデックス3）
-                precipitation = cells[3].text.strip()
-                if precipitation != "--" and precipitation != "":
-                    try:
-                        precipitation_data.append((hour, float(precipitation)))
-                    except ValueError:
-                        precipitation_data.append((hour, 0.0))
-
-                # 気温（インデックス4）
-                temperature = cells[4].text.strip()
-                if temperature != "--" and temperature != "":
-                    temperature_data.append((hour, float(temperature)))
-
-                # 湿度（インデックス7）
-                humidity = cells[7].text.strip()
-                if humidity != "--" and humidity != "":
-                    humidity_data.append((hour, int(humidity)))
-
-                # 日照時間（インデックス10）
-                sunshine = cells[10].text.strip()
-                if sunshine != "--" and sunshine != "":
-                    try:
-                        total_sunshine += float(sunshine)
-                    except ValueError:
-                        # 数値に変換できない場合はスキップ
-                        pass
-
-                # 天気（インデックス14の画像のalt属性）
-                weather_img = cells[14].find('img')
-                if weather_img and weather_img.has_attr('alt'):
-                    weather_condition = weather_img.get('alt')
-                    emoji = get_weather_emoji(weather_condition)
-                    weather_info.append(f"{hour}時: {weather_condition}{emoji}")
-
-    # 気圧データを6時間スパンで処理（大気潮に合わせる）
-    pressure_spans = []
-
-    # 6時間ごとのスパンの気圧データを収集
-    for i in range(1, 25, 6):
-        span_pressures = [p[1] for p in sea_level_pressures if i <= p[0] < i+6]
-        if span_pressures:
-            avg_pressure = statistics.mean(span_pressures)
-            min_pressure = min(span_pressures)
-            max_pressure = max(span_pressures)
-            pressure_spans.append((i, i+5, avg_pressure, min_pressure, max_pressure, span_pressures))
-
-    # 気圧変化のマークを追加
-    for i in range(len(pressure_spans)-1):
-        current_span = pressure_spans[i]
-        next_span = pressure_spans[i+1]
-
-        change_mark = ""
-
-        # 下降判定: 現在のスパンの最大値と次のスパンのすべての値を比較
-        if any(current_span[4] - next_value >= 5 for next_value in next_span[5]):
-            change_mark = "⤵️💣️"
-        # 上昇判定: 現在のスパンの最小値と次のスパンのすべての値を比較
-        elif any(next_value - current_span[3] >= 5 for next_value in next_span[5]):
-            change_mark = "⤴️⚠️"
-
-        # マークを追加（元のタプルの要素を保持し、マークを最後に追加）
-        pressure_spans[i] = (*current_span[:5], change_mark)
-
-    # 最後のスパンの変化マークは空
-    if pressure_spans:
-        pressure_spans[-1] = (*pressure_spans[-1][:5], "")
-
-    # 気温データを処理
-    morning_temps = [t[1] for t in temperature_data if 5 <= t[0] <= 11]
-    daytime_temps = [t[1] for t in temperature_data if 12 <= t[0] <= 18]
-    evening_temps = [t[1] for t in temperature_data if t[0] >= 19 or t[0] <= 4]
-
-    all_temps = [t[1] for t in temperature_data]
-    max_temp = max(all_temps) if all_temps else 0
-    min_temp = min(all_temps) if all_temps else 0
-
-    morning_avg = statistics.mean(morning_temps) if morning_temps else 0
-    daytime_avg = statistics.mean(daytime_temps) if daytime_temps else 0
-    evening_avg = statistics.mean(evening_temps) if evening_temps else 0
-
-    # 湿度データを処理
-    morning_humidity = [h[1] for h in humidity_data if 5 <= h[0] <= 11]
-    daytime_humidity = [h[1] for h in humidity_data if 12 <= h[0] <= 18]
-    evening_humidity = [h[1] for h in humidity_data if h[0] >= 19 or h[0] <= 4]
-
-    all_humidity = [h[1] for h in humidity_data]
-    max_humidity = max(all_humidity) if all_humidity else 0
-    min_humidity = min(all_humidity) if all_humidity else 0
-
-    morning_hum_avg = statistics.mean(morning_humidity) if morning_humidity else 0
-    daytime_hum_avg = statistics.mean(daytime_humidity) if daytime_humidity else 0
-    evening_hum_avg = statistics.mean(evening_humidity) if evening_humidity else 0
-
-    # 降水量データを処理
-    morning_precip = sum([p[1] for p in precipitation_data if 5 <= p[0] <= 11])
-    daytime_precip = sum([p[1] for p in precipitation_data if 12 <= p[0] <= 18])
-    evening_precip = sum([p[1] for p in precipitation_data if p[0] >= 19 or p[0] <= 4])
-
-    # 気圧情報を文字列化（6時間スパン版）
-    pressure_str = ", ".join([f"{s[0]}-{s[1]}時:平均{s[2]:.1f}hPa{s[5]}" for s in pressure_spans])
-
-    # 気温情報を文字列化
-    temp_str = f"朝:平均{morning_avg:.1f}℃, 昼:平均{daytime_avg:.1f}℃, 夜:平均{evening_avg:.1f}℃（最高:{max_temp:.1f}℃, 最低:{min_temp:.1f}℃）"
-
-    # 湿度情報を文字列化
-    humidity_str = f"朝:平均{morning_hum_avg:.1f}%, 昼:平均{daytime_hum_avg:.1f}%, 夜:平均{evening_hum_avg:.1f}%（最高:{max_humidity}%, 最低:{min_humidity}%）"
+def _format_number(value, spec, unit):
+    return f"{value:{spec}}{unit}" if value is not None else "--"
 
-    # 降水量情報を文字列化
-    precip_str = f"朝:{morning_precip:.1f}mm, 昼:{daytime_precip:.1f}mm, 夜:{evening_precip:.1f}mm"
+# 時間別値ページから作った天気データの目印（気温が朝・昼・夜の内訳で始まる。日別値ページの形式は "平均:"）
+HOURLY_TEMPERATURE_PREFIX = "朝:平均"
+
+def has_hourly_weather(page, property_suffix=""):
+    """
+    Notionページの天気が時間別値ページの形式で書き込み済みかを返す
+
+    月単位の取得（日別値ページ）の形式は内訳が少ないため、時間別値ページの形式で書き込み済みの日は上書きしない。
+    """
+    prop = ((page or {}).get("properties") or {}).get("気温" + property_suffix) or {}
+    text = "".join(
+        item.get("plain_text") or (item.get("text") or {}).get("content", "")
+        for item in prop.get("rich_text") or []
+    )
+    return text.startswith(HOURLY_TEMPERATURE_PREFIX)
+
+def format_daily_weather_data(obs, year, month):
+    """1日分の日別値からNotionに書き込む天気データの文字列を作る（気圧は含まない）"""
+    summaries = []
+    for label, summary in (("昼", obs.summary_day), ("夜", obs.summary_night)):
+        if summary:
+            summaries.append(f"{label}: {summary}{get_weather_emoji(summary)}")
+
+    temp_str = (f"平均:{_format_number(obs.temperature_mean, '.1f', '℃')}"
+                f"（最高:{_format_number(obs.temperature_max, '.1f', '℃')}, "
+                f"最低:{_format_number(obs.temperature_min, '.1f', '℃')}）")
+    humidity_str = (f"平均:{_format_number(obs.humidity_mean, '.0f', '%')}"
+                    f"（最低:{_format_number(obs.humidity_min, '.0f', '%')}）")
+    precip_str = (f"合計:{_format_number(obs.precipitation, '.1f', 'mm')}"
+                  f"（最大1時間:{_format_number(obs.max_hourly_precipitation, '.1f', 'mm')}）")
+
+    return {
+        "日付": f"{year}年{month}月{obs.day}日",
+        "天気": ", ".join(summaries),
+        "気温": temp_str,
+        "湿度": humidity_str,
+        "降水量": precip_str,
+        "日照時間": f"{_format_number(obs.sunshine, '.1f', '時間')}",
+        # 天気概況が空の場合はデータ未公開と判断
+        "_is_complete": bool(summaries),
+    }
 
-    # 天気情報を文字列化
-    weather_str = ", ".join(weather_info)
+# 気圧の変化のマーク（hourly_stats.PRESSURE_DROP / PRESSURE_RISE）
+PRESSURE_CHANGE_MARKS = {PRESSURE_DROP: "⤵️💣️", PRESSURE_RISE: "⤴️⚠️", PRESSURE_STEADY: ""}
+
+def _format_pressure_row(pressure, row):
+    """pressure_spans() の結果の1日分を6時間ごとの気圧の文字列にする（値の無いスパンは省く）"""
+    spans = []
+    for span_index in range(PRESSURE_SPAN_COUNT):
+        mean = pressure["mean"][row, span_index]
+        if np.isnan(mean):
+            continue
+        start = span_index * PRESSURE_SPAN_HOURS + 1
+        mark = PRESSURE_CHANGE_MARKS[pressure["change"][row, span_index]]
+        spans.append(f"{start}-{start + PRESSURE_SPAN_HOURS - 1}時:平均{mean:.1f}hPa{mark}")
+    return ", ".join(spans)
+
+def format_pressure_spans(observations):
+    """1時間ごとの観測値から6時間ごとの気圧の文字列（変化のマーク付き）を作る"""
+    pressures = hourly_matrix([observations])["sea_level_pressure"]
+    return _format_pressure_row(pressure_spans(pressures), 0)
+
+def _format_weather_row(summary, row, observations, year, month, day):
+    """summarize() の結果の1日分と、その日の観測値（天気の記録）からNotionに書き込む天気データを作る"""
+    # 天気は記録のある時刻だけを並べる
+    weather_info = [
+        f"{obs.hour}時: {obs.weather}{get_weather_emoji(obs.weather)}"
+        for obs in observations if obs.weather is not None
+    ]
+
+    temperature = {key: values[row] for key, values in summary["temperature"].items()}
+    humidity = {key: values[row] for key, values in summary["humidity"].items()}
+    precipitation = {key: values[row] for key, values in summary["precipitation"].items()}
+
+    # 気温情報を文字列化（先頭の HOURLY_TEMPERATURE_PREFIX が時間別値ページから作った形式の目印）
+    temp_str = (f"{HOURLY_TEMPERATURE_PREFIX}{temperature['morning_mean']:.1f}℃, 昼:平均{temperature['daytime_mean']:.1f}℃, "
+                f"夜:平均{temperature['evening_mean']:.1f}℃（最高:{temperature['max']:.1f}℃, 最低:{temperature['min']:.1f}℃）")
+
+    # 湿度情報を文字列化（最高・最低は整数の%）
+    humidity_str = (f"朝:平均{humidity['morning_mean']:.1f}%, 昼:平均{humidity['daytime_mean']:.1f}%, "
+                    f"夜:平均{humidity['evening_mean']:.1f}%（最高:{int(humidity['max'])}%, 最低:{int(humidity['min'])}%）")
+
+    # 降水量情報を文字列化
+    precip_str = (f"朝:{precipitation['morning']:.1f}mm, 昼:{precipitation['daytime']:.1f}mm, "
+                  f"夜:{precipitation['evening']:.1f}mm")
 
     result = {
         "日付": f"{year}年{month}月{day}日",
-        "天気": weather_str,
+        "天気": ", ".join(weather_info),
         "気温": temp_str,
         "湿度": humidity_str,
         "降水量": precip_str,
-        "気圧": pressure_str,
-        "日照時間": f"{total_sunshine:.1f}時間"
+        "気圧": _format_pressure_row(summary["pressure"], row),
+        "日照時間": f"{summary['sunshine'][row]:.1f}時間"
     }
 
     # データの完全性を示すフラグを追加
@@ -204,8 +570,56 @@ def get_weather_data(year=2025, month=5, day=15):
 
     return result
 
-def update_notion_database(weather_data, date_str):
-    """Notionデータベースに天気データを追加/更新する"""
+def format_weather_data(observations, year, month, day):
+    """1時間ごとの観測値からNotionに書き込む天気データの文字列を作る"""
+    summary = summarize(hourly_matrix([observations]))
+    return _format_weather_row(summary, 0, observations, year, month, day)
+
+def format_weather_days(observations_by_day, dates):
+    """
+    複数日の1時間ごとの観測値から日ごとの天気データをまとめて作る（日数×24の行列で1回だけ集計する）
+
+    Args:
+        observations_by_day: 日ごとの HourlyObservation のリスト
+        dates: 各日の日付（datetime.date）
+
+    Returns:
+        list: 日ごとの天気データの辞書（format_weather_data と同じ形式）
+    """
+    summary = summarize(hourly_matrix(observations_by_day))
+    return [
+        _format_weather_row(summary, row, observations, target_date.year, target_date.month, target_date.day)
+        for row, (observations, target_date) in enumerate(zip(observations_by_day, dates))
+    ]
+
+# 警告済みの（データベースに無い）プロパティ名（同じ警告を日付ごとに繰り返さない）
+_warned_unknown_properties = set()
+
+def _drop_unknown_properties(properties, page_index):
+    """
+    データベースに無いプロパティを除いたプロパティを返す（除いたプロパティ名は1回だけ警告する）
+
+    データベースの情報を取得できない場合はそのまま返す
+    """
+    try:
+        names = page_index.property_names()
+    except Exception as e:
+        print(f"警告: Notionデータベースのプロパティを確認できないため、すべての地点のプロパティを書き込みます: {str(e)}")
+        return properties
+    unknown = [name for name in properties if name not in names]
+    new_unknown = [name for name in unknown if name not in _warned_unknown_properties]
+    if new_unknown:
+        _warned_unknown_properties.update(new_unknown)
+        print(f"警告: Notionデータベースに無いプロパティは書き込みません（データベースに追加してください）: {', '.join(new_unknown)}")
+    return {name: prop for name, prop in properties.items() if name not in unknown}
+
+def update_notion_database(weather_data, date_str, page_index=None, stations=None):
+    """
+    Notionデータベースに天気データを追加/更新する
+    page_indexが渡された場合は読み込み済みの日付索引から更新対象ページを探す
+    stationsが渡された場合は地点ごとのプロパティ（merge_station_weather の形式）を書き込む
+    （データベースに無い地点のプロパティは除いて書き込む）
+    """
     try:
         # Notion APIトークンを取得
         notion_token = os.environ.get("NOTION_SECRET")
@@ -215,123 +629,79 @@ def update_notion_database(weather_data, date_str):
             print("エラー: 環境変数 NOTION_SECRET または DATABASE_ID が設定されていません。")
             return False
 
-        # Notion クライアントを初期化
-        notion = Client(auth=notion_token)
+        # Notion APIの共有セッションを取得（接続を使い回す）
+        session = get_notion_session(notion_token)
 
         # 日付をISO形式に変換
         date_obj = datetime.strptime(date_str, "%Y年%m月%d日")
         iso_date = date_obj.strftime("%Y-%m-%d")
 
-        # データベースを検索して同じ日付のページがあるか確認
-        query_result = notion.databases.query(
-            database_id=database_id,
-            filter={
-                "property": "日付",
-                "date": {
-                    "equals": iso_date
-                }
-            }
-        )
+        # 同じ日付のページがあるか確認（期間処理では読み込み済みの索引を使う）
+        if page_index is None:
+            page_index = NotionDateIndex(database_id, notion_token)
+        with span("notion.search"):
+            pages = page_index.get_pages(date_obj.date())
 
         # 複数のエントリーがある場合、「振り返り」チェックが入っていないエントリーを優先選択
         target_page = None
-        if query_result["results"]:
-            # 「振り返り」チェックが入っていないエントリーを探す
-            for page in query_result["results"]:
-                page_id = page["id"]
-                
-                # ページの詳細情報を取得（すべてのプロパティを含む）
-                page_details = notion.pages.retrieve(page_id=page_id)
-                
-                # 「振り返り」プロパティが存在し、チェックされているか確認
-                if "振り返り" in page_details["properties"]:
-                    is_reflection_checked = page_details["properties"]["振り返り"].get("checkbox", False)
-                    if not is_reflection_checked:  # チェックが入っていない場合
-                        target_page = page
-                        break
-                else:
-                    # 「振り返り」プロパティが存在しない場合も更新対象とする
-                    target_page = page
-                    break
-            
+        if pages:
+            target_page = select_preferred_page(pages)
+
             # 「振り返り」チェックが入っていないエントリーが見つからない場合
-            if target_page is None:
+            if is_reflection_checked(target_page):
                 print(f"注意: {date_str} のすべてのエントリーで「振り返り」チェックが入っているため更新をスキップします。")
                 return True
         
-        # ページのプロパティを作成
+        # ページのプロパティを作成（月単位の取得では気圧を含まないため、辞書にある項目だけを書き込む）
         properties = {
             "日付": {
                 "date": {
                     "start": iso_date
                 }
-            },
-            "天気": {
-                "rich_text": [
-                    {
-                        "text": {
-                            "content": weather_data["天気"]
-                        }
-                    }
-                ]
-            },
-            "気温": {
-                "rich_text": [
-                    {
-                        "text": {
-                            "content": weather_data["気温"]
-                        }
-                    }
-                ]
-            },
-            "湿度": {
-                "rich_text": [
-                    {
-                        "text": {
-                            "content": weather_data["湿度"]
-                        }
-                    }
-                ]
-            },
-            "降水量": {
-                "rich_text": [
-                    {
-                        "text": {
-                            "content": weather_data["降水量"]
-                        }
-                    }
-                ]
-            },
-            "気圧": {
-                "rich_text": [
-                    {
-                        "text": {
-                            "content": weather_data["気圧"]
-                        }
-                    }
-                ]
-            },
-            "日照時間": {
-                "rich_text": [
-                    {
-                        "text": {
-                            "content": weather_data["日照時間"]
-                        }
-                    }
-                ]
             }
         }
+        for name in station_property_names(stations):
+            if name in weather_data:
+                properties[name] = {
+                    "rich_text": [
+                        {
+                            "text": {
+                                "content": weather_data[name]
+                            }
+                        }
+                    ]
+                }
+
+        # データベースに無いプロパティが1つでもあるとNotionが400を返し、主地点も含めて更新できないため、
+        # 地点ごとのプロパティはデータベースのプロパティと照らし合わせてから書き込む
+        if stations and any(station.property_suffix for station in stations):
+            properties = _drop_unknown_properties(properties, page_index)
 
         # 既存のページがある場合は更新、なければ新規作成
         if target_page:
+            # 現在の値から変化したプロパティだけを送信する
+            changed = diff_properties(target_page, properties)
+            if not changed:
+                print(f"Notionページの天気データは最新のため、更新をスキップします: {date_str}")
+                return True
+
             page_id = target_page["id"]
-            notion.pages.update(page_id=page_id, properties=properties)
-            print(f"Notionページを更新しました: {date_str}")
+            with span("notion.write"):
+                response = session.patch(
+                    f"https://api.notion.com/v1/pages/{page_id}",
+                    json={"properties": changed}
+                )
+            response.raise_for_status()
+            apply_properties(target_page, response.json())
+            print(f"Notionページを更新しました: {date_str}（{', '.join(changed)}）")
         else:
-            notion.pages.create(
-                parent={"database_id": database_id},
-                properties=properties
-            )
+            with span("notion.write"):
+                response = session.post(
+                    "https://api.notion.com/v1/pages",
+                    json={"parent": {"database_id": database_id}, "properties": properties}
+                )
+            response.raise_for_status()
+            page_index.add_page(response.json())
             print(f"Notionに新しいページを作成しました: {date_str}")
 
         return True